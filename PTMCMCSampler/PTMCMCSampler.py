@@ -6,13 +6,24 @@ from __future__ import division, print_function, absolute_import
 import numpy as np
 import scipy.stats as ss
 import os
-import sys
 import time
+import copy
+import pickle
+import warnings
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from .nutsjump import NUTSJump, HMCJump, MALAJump
 from . import proposals as prop
 from .result import Result
-import tqdm
-from tqdm import trange
+from .buffers import CircularBuffer, ReservoirBuffer, RunningStatistics
+from .cycle import ProposalCycle
+from .rng import RandomStream
+from .covariance import BlockCovariance, CovarianceFactorization
+from . import chainfile
+from .jumpstats import JumpStatistics
+from .timings import Timings
+from .progress import ProgressReporter
+from .writer import AsyncWriter, write_text, write_atomic, append_text
 try:
     from mpi4py import MPI
 except ImportError:
@@ -58,6 +69,26 @@ class PTSampler(object):
     @param outDir: Full path to output directory for chain files (default = ./chains)
     @param verbose: Update current run-status to the screen (default=True)
     @param resume: Resume from a previous chain (still in testing so beware) (default=False)
+    @param vectorized: logl and logp accept an array of shape (k, ndim) and return
+    an array of k values. Cold chains are then advanced in lockstep with a single
+    call per step (default=False)
+    @param pool: object with a ``map`` method used to evaluate logl and logp on
+    several parameter vectors at once, e.g. the temperatures of an in-process
+    ladder. Ignored when ``vectorized=True`` (default=None)
+    @param chain_format: Format of the chain files, either "text" or "binary".
+    Binary files hold float64 records which are much faster to write and read
+    back, see ``PTMCMCSampler.chainfile`` (default="text")
+    @param covariance: How the adaptive covariance matrix is stored, either
+    "dense" or "block". A "block" covariance only holds one block for each
+    parameter group, so the memory and the cost of adapting it scale with the
+    sizes of the groups rather than ndim**2. Parameters in different groups
+    are then treated as uncorrelated and cov may be given as a list of the
+    covariance matrix of each group, see
+    ``PTMCMCSampler.covariance.BlockCovariance`` (default="dense")
+    @param timing: Record the time spent in each phase of the sampling loop, and
+    in each jump proposal, in ``PTSampler.timings``. The timings of each process
+    are written to a _timings.csv file next to its chain file, see
+    ``PTMCMCSampler.timings.Timings`` (default=False)
 
     """
 
@@ -78,6 +109,11 @@ class PTSampler(object):
         outDir="./chains",
         verbose=True,
         resume=False,
+        vectorized=False,
+        pool=None,
+        chain_format="text",
+        covariance="dense",
+        timing=False,
     ):
 
         # MPI initialization
@@ -86,8 +122,17 @@ class PTSampler(object):
         self.nchain = self.comm.Get_size()
 
         self.ndim = ndim
-        self.logl = _function_wrapper(logl, loglargs, loglkwargs)
-        self.logp = _function_wrapper(logp, logpargs, logpkwargs)
+        self.vectorized = vectorized
+        if self.vectorized:
+            self._logl_batch = _function_wrapper(logl, loglargs, loglkwargs)
+            self._logp_batch = _function_wrapper(logp, logpargs, logpkwargs)
+            self.logl = _single_point_wrapper(self._logl_batch)
+            self.logp = _single_point_wrapper(self._logp_batch)
+        else:
+            self.logl = _function_wrapper(logl, loglargs, loglkwargs)
+            self.logp = _function_wrapper(logp, logpargs, logpkwargs)
+            self._logl_batch = _batch_wrapper(self.logl, pool)
+            self._logp_batch = _batch_wrapper(self.logp, pool)
         if logl_grad is not None and logp_grad is not None:
             self.logl_grad = _function_wrapper(logl_grad, loglargs, loglkwargs)
             self.logp_grad = _function_wrapper(logp_grad, logpargs, logpkwargs)
@@ -98,6 +143,21 @@ class PTSampler(object):
         self.outDir = outDir
         self.verbose = verbose
         self.resume = resume
+        self._resumeChains = []
+        self._progress = None
+        # index of the first cold chain held, which is not 0 in the workers
+        # of a pool
+        self._chainOffset = 0
+
+        if chain_format not in ["text", "binary"]:
+            raise ValueError(
+                "chain_format must be either 'text' or 'binary'. You have "
+                "passed %s" % (chain_format)
+            )
+        self.chain_format = chain_format
+
+        # chain and jump statistics files are written in a background thread
+        self._writer = AsyncWriter()
 
         # setup output file
         if not os.path.exists(self.outDir):
@@ -112,29 +172,38 @@ class PTSampler(object):
             self.groups = [np.arange(0, self.ndim)]
 
         # set up covariance matrix
-        self.cov = cov
-        self.U = [[]] * len(self.groups)
-        self.S = [[]] * len(self.groups)
-
-        # do svd on parameter groups
-        for ct, group in enumerate(self.groups):
-            covgroup = np.zeros((len(group), len(group)))
-            for ii in range(len(group)):
-                for jj in range(len(group)):
-                    covgroup[ii, jj] = self.cov[group[ii], group[jj]]
-
-            self.U[ct], self.S[ct], v = np.linalg.svd(covgroup)
+        if covariance not in ["dense", "block"]:
+            raise ValueError(
+                "covariance must be either 'dense' or 'block'. You have "
+                "passed %s" % (covariance)
+            )
+        if covariance == "block":
+            # the running mean and sums of squares are held by the blocks
+            self.cov = BlockCovariance(ndim, self.groups, cov)
+            self.M2 = None
+            self.mu = None
+        else:
+            self.cov = cov
+            self.M2 = np.zeros((ndim, ndim))
+            self.mu = np.zeros(ndim)
 
-        self.M2 = np.zeros((ndim, ndim))
-        self.mu = np.zeros(ndim)
+        # factorize the covariance of each parameter group
+        self._factorization = CovarianceFactorization(self.groups)
+        self._factorization.update(self.cov)
 
         # initialize proposal cycle
-        self.propCycle = []
-        self.jumpDict = {}
+        self.propCycle = ProposalCycle()
+        self.jumpStats = JumpStatistics()
+        self.jump_proposal_kwargs = prop.ProposalContext()
+        self._trackChainStats = True
 
         # indicator for auxilary jumps
         self.aux = []
 
+        # opt-in profiling of the sampling loop
+        self.timings = Timings(self.MPIrank) if timing else None
+        self._instrument()
+
     @staticmethod
     def get_proposal_object_from_name(key):
         """Return the jump proposal object from a string
@@ -210,14 +279,28 @@ class PTSampler(object):
         save_jump_stats=False,
         hotChain=False,
         n_cold_chains=2,
+        ntemps=1,
+        memmap=False,
+        checkpoint=False,
+        adapt_weights=False,
+        DEthin=10,
+        seed=None,
     ):
         """
         Initialize MCMC quantities
 
         @param maxIter: maximum number of iterations
         @Tmin: minumum temperature to use in temperature ladder
+        @param memmap: Store the chains in memory-mapped files in outDir
+        @param checkpoint: Save the state of the sampler every isave iterations
+        @param adapt_weights: Re-weight the proposal cycle during burn in
+        @param DEthin: Offer every DEthin-th sample to the DE buffer reservoir
+        @param seed: Seed of the random stream of this process
+        @param save_jump_stats: Deprecated and ignored, see sample
 
         """
+        _warnSaveJumpStats(save_jump_stats)
+
         # get maximum number of iteration
         if maxIter is None and self.MPIrank > 0:
             maxIter = 2 * Niter
@@ -232,33 +315,57 @@ class PTSampler(object):
         self.thin = thin
         self.isave = isave
         self.Niter = Niter
+        self.maxIter = maxIter
         self.neff = neff
         self.tstart = 0
         self.iter = i0
         self.write_cold_chains = write_cold_chains
-        self.save_jump_stats = save_jump_stats
         self.n_cold_chains = n_cold_chains
+        self.ntemps = ntemps
+        self.memmap = memmap
+        self.checkpoint = checkpoint
+        self.adapt_weights = adapt_weights
+
+        if self.ntemps > 1 and self.nchain > 1:
+            raise ValueError(
+                "In-process parallel tempering (ntemps > 1) is only available "
+                "when not using MPI. Each MPI rank already runs one temperature"
+            )
 
         N = int(maxIter / thin)
 
-        self._lnprob = np.zeros((self.n_cold_chains, N))
-        self._lnlike = np.zeros((self.n_cold_chains, N))
-        self._chain = np.zeros((self.n_cold_chains, N, self.ndim))
         self.naccepted = 0
         self.swapProposed = 0
         self.nswap_accepted = 0
 
-        # set up covariance matrix and DE buffers
-        # TODO: better way of allocating this to save memory
+        # set up covariance matrix and DE buffers. Only the samples since the
+        # last covariance update are needed, so these are kept in a circular
+        # buffer. The DE buffer is drawn from a reservoir of thinned samples
+        # covering the whole run. Hotter chains receive the DE buffer from
+        # the T = 1 chain
         if self.MPIrank == 0:
-            self._AMbuffer = np.zeros((self.n_cold_chains, self.Niter + 1, self.ndim))
-            self._DEbuffer = np.zeros((self.n_cold_chains, self.burn + 1, self.ndim))
+            self._AMbuffer = CircularBuffer(
+                self.n_cold_chains, self.covUpdate + 1, self.ndim
+            )
+            self._DEreservoir = ReservoirBuffer(
+                self.n_cold_chains, self.burn, self.ndim, thin=DEthin
+            )
+        self._DEbuffer = np.zeros((self.n_cold_chains, self.burn + 1, self.ndim))
+
+        # each process draws from its own random stream. Without a seed, the
+        # seed is drawn from the global numpy random state so that runs can
+        # still be repeated with np.random.seed
+        if seed is None:
+            seed = np.random.randint(0, 2 ** 32, size=4, dtype=np.uint32)
+        self._setRandomStream(
+            RandomStream(np.random.SeedSequence(seed, spawn_key=(self.MPIrank,)))
+        )
 
         if self.logl_grad is not None and self.logp_grad is not None:
             self.initialize_jump_proposal_kwargs["MALA"] = {
                 "loglik_grad": self.logl_grad,
                 "logprior_grad": self.logp_grad,
-                "mm_inv": self.cov,
+                "mm_inv": self._denseCovariance(),
                 "nburn": self.burn,
             }
 
@@ -287,22 +394,36 @@ class PTSampler(object):
             #     self.addProposalToCycle(nutsjump, weights["nuts"])
 
         # setup default temperature ladder
-        if self.ladder is None:
+        if self.ladder is None and self.ntemps > 1:
+            self.ladder = self.temperatureLadder(Tmin, Tmax=Tmax, ntemps=self.ntemps)
+            if hotChain:
+                self.ladder[-1] = 1e80
+        elif self.ladder is None:
             self.ladder = self.temperatureLadder(Tmin, Tmax=Tmax)
+        elif self.ntemps > 1 and len(self.ladder) != self.ntemps:
+            raise ValueError(
+                "The temperature ladder must have ntemps=%s temperatures"
+                % (self.ntemps)
+            )
 
         # temperature for current chain
         self.temp = self.ladder[self.MPIrank]
 
         # hot chain sampling from prior
+        ext = ".txt" if self.chain_format == "text" else ".bin"
         if hotChain and self.MPIrank == self.nchain - 1:
             self.temp = 1e80
-            self.fname = self.outDir + "/chain_hot.txt"
+            self.fname = self.outDir + "/chain_hot" + ext
         else:
-            self.fname = self.outDir + "/chain_{0}.txt".format(self.temp)
+            self.fname = self.outDir + "/chain_{0}".format(self.temp) + ext
+
+        self._allocateChains(N)
 
         # write hot chains
         self.writeHotChains = writeHotChains
 
+        self._postReceives()
+
         self.initialize_jump_proposals(weights, self.initialize_jump_proposal_kwargs)
 
         # check length of jump cycle
@@ -313,22 +434,314 @@ class PTSampler(object):
         self.randomizeProposalCycle()
 
         self.resumeLength = 0
-        if self.resume and os.path.isfile(self.fname):
-            if self.verbose:
-                print("Resuming run from chain file {0}".format(self.fname))
-            try:
-                self.resumechain = np.loadtxt(self.fname)
-                self.resumeLength = self.resumechain.shape[0]
-            except ValueError:
-                print("WARNING: Cant read in file. Removing last line.")
-                os.system("sed -ie '$d' {0}".format(self.fname))
-                self.resumechain = np.loadtxt(self.fname)
-                self.resumeLength = self.resumechain.shape[0]
-            self._chainfile = open(self.fname, "a")
-            self._chainfile.close()
+        self._resumeChains = []
+        fnames = [self._chainFileName(ii) for ii in range(self.n_cold_chains)]
+        if self.resume and self.checkpoint and os.path.isfile(self._checkpointFileName()):
+            # the chain files are restored along with the checkpoint
+            pass
+        elif self.resume and any(os.path.isfile(fname) for fname in fnames):
+            # replay the chain file of each cold chain. Existing chain files
+            # are never emptied, so chains without a file start a new one
+            self._resumeChains = [self._readChainFile(fname) for fname in fnames]
+            self._setResumeChain(0)
         elif self.write_cold_chains:
-            self._chainfile = open(self.fname, "w")
-            self._chainfile.close()
+            if self.MPIrank == 0:
+                write_text(self.outDir + "/jump_stats.csv", JumpStatistics.header)
+            for chain_ind in range(self.n_cold_chains):
+                if self.chain_format == "binary":
+                    chainfile.create(self._chainFileName(chain_ind), self.ndim + 4)
+                else:
+                    open(self._chainFileName(chain_ind), "w").close()
+
+    def _readChainFile(self, fname):
+        """
+        Return the samples in the chain file of a previous run, so that they
+        can be replayed when resuming. A chain file that does not exist is
+        created empty if the cold chains are written.
+
+        @param fname: Name of the chain file
+
+        """
+        if not os.path.isfile(fname):
+            if self.write_cold_chains:
+                if self.chain_format == "binary":
+                    chainfile.create(fname, self.ndim + 4)
+                else:
+                    open(fname, "w").close()
+            return np.zeros((0, self.ndim + 4))
+
+        if self.verbose:
+            print("Resuming run from chain file {0}".format(fname))
+        if self.chain_format == "binary":
+            return chainfile.load(fname)
+        try:
+            return np.loadtxt(fname, ndmin=2)
+        except ValueError:
+            print("WARNING: Cant read in file. Removing last line.")
+            with open(fname, "r") as f:
+                nrows = len(f.readlines()) - 1
+            self._truncateChainFile(fname, nrows)
+            return np.loadtxt(fname, ndmin=2)
+
+    def _setResumeChain(self, chain_ind):
+        """
+        Replay the chain file of a previous run for the cold chain
+        chain_ind, if there is one.
+
+        @param chain_ind: Index of the cold chain
+
+        """
+        if chain_ind < len(self._resumeChains):
+            self.resumechain = self._resumeChains[chain_ind]
+            self.resumeLength = self.resumechain.shape[0]
+        else:
+            self.resumeLength = 0
+
+    def _truncateChainFile(self, fname, nrows):
+        """
+        Keep only the first nrows samples of a chain file
+
+        @param fname: Name of the chain file
+        @param nrows: Number of samples to keep
+
+        """
+        if self.chain_format == "binary":
+            chainfile.truncate(fname, nrows)
+        else:
+            with open(fname, "r") as f:
+                lines = f.readlines()[:nrows]
+            write_atomic(fname, "".join(lines).encode())
+
+    def _checkpointFileName(self):
+        """
+        Return the name of the checkpoint file of this chain
+
+        """
+        return os.path.splitext(self.fname)[0] + ".ckpt"
+
+    def _saveCheckpoint(self, p0, lnlike0, lnprob0, iter, chain_ind):
+        """
+        Save everything needed to carry on sampling from this iteration: the
+        current point, the adapted covariance matrix, the AM and DE buffers,
+        the proposal cycle, the acceptance counters and the state of the
+        random number generator. The state is pickled straight away and
+        written atomically by the background writer, after the chain file has
+        been written up to this iteration.
+
+        @param p0: Current parameter vector
+        @param lnlike0: Current log-likelihood value
+        @param lnprob0: Current log probability value
+        @param iter: Iteration number
+        @param chain_ind: Index of the cold chain
+
+        """
+        state = {
+            "iter": iter,
+            "chain_ind": chain_ind,
+            "p0": p0,
+            "lnlike0": lnlike0,
+            "lnprob0": lnprob0,
+            "cov": self.cov,
+            "M2": self.M2,
+            "mu": self.mu,
+            "factorization": self._factorization,
+            "AMbuffer": getattr(self, "_AMbuffer", None),
+            "DEreservoir": getattr(self, "_DEreservoir", None),
+            "DEbuffer": self._DEbuffer,
+            "chainStats": self._chainStats,
+            "propCycle": self.propCycle.get_state(),
+            "jumpStats": self.jumpStats,
+            "naccepted": self.naccepted,
+            "swapProposed": self.swapProposed,
+            "nswap_accepted": self.nswap_accepted,
+            "rng": self.rng.get_state(),
+            "random_state": np.random.get_state(),
+        }
+        data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        self._writer.submit(write_atomic, self._checkpointFileName(), data)
+
+    def _loadCheckpoint(self):
+        """
+        Restore the state of the sampler from its checkpoint file, if resuming.
+        The chain files are cut back to the checkpoint and the samples before
+        it are read back into the chain arrays. When the chains are stored in
+        memory-mapped files these already hold the earlier samples.
+
+        @return state: dictionary saved by _saveCheckpoint, or None if there
+                       is no checkpoint to resume from
+
+        """
+        fname = self._checkpointFileName()
+        if not (self.resume and self.checkpoint and os.path.isfile(fname)):
+            return None
+        if self.verbose:
+            print("Resuming run from checkpoint {0}".format(fname))
+        with open(fname, "rb") as f:
+            state = pickle.load(f)
+
+        if isinstance(self.cov, BlockCovariance):
+            self.cov = state["cov"]
+        else:
+            self.cov[:, :] = state["cov"]
+        self.M2, self.mu = state["M2"], state["mu"]
+        self._factorization = state["factorization"]
+        if state["AMbuffer"] is not None:
+            self._AMbuffer = state["AMbuffer"]
+            self._DEreservoir = state["DEreservoir"]
+        self._DEbuffer = state["DEbuffer"]
+        self._chainStats = state["chainStats"]
+        self.jumpStats = state["jumpStats"]
+        self.naccepted = state["naccepted"]
+        self.swapProposed = state["swapProposed"]
+        self.nswap_accepted = state["nswap_accepted"]
+
+        # DE jumps are only added to the cycle after burn in
+        proposals = {jump.__name__: jump for jump in self.propCycle}
+        if (
+            "DifferentialEvolution" in state["propCycle"]["names"]
+            and "DifferentialEvolution" not in proposals
+        ):
+            name = self.get_proposal_object_from_name("DifferentialEvolution")
+            proposals["DifferentialEvolution"] = name(kwargs=None)
+        try:
+            self.propCycle.set_state(state["propCycle"], proposals)
+        except KeyError as e:
+            raise ValueError(
+                "Unable to resume from {0}: the jump proposal {1} is not in "
+                "the proposal cycle".format(fname, e)
+            )
+
+        # remove anything written after the checkpoint and read back the
+        # samples before it
+        iter, chain_ind = state["iter"], state["chain_ind"]
+        self.resumeLength = iter
+        for ii in range(chain_ind, self.n_cold_chains):
+            nrows = len(range(0, iter, self.thin)) if ii == chain_ind else 0
+            chain_fname = self._chainFileName(ii)
+            if self.write_cold_chains and os.path.isfile(chain_fname):
+                self._truncateChainFile(chain_fname, nrows)
+        if self.write_cold_chains and not self.memmap:
+            for ii in range(chain_ind + 1):
+                chain_fname = self._chainFileName(ii)
+                if self.chain_format == "binary":
+                    chain = chainfile.load(chain_fname)
+                else:
+                    chain = np.loadtxt(chain_fname, ndmin=2)
+                self._chain[ii, : len(chain)] = chain[:, :-4]
+                self._lnprob[ii, : len(chain)] = chain[:, -4]
+                self._lnlike[ii, : len(chain)] = chain[:, -3]
+        if iter % self.thin == 0:
+            ind = iter // self.thin
+            self._chain[chain_ind, ind] = state["p0"]
+            self._lnlike[chain_ind, ind] = state["lnlike0"]
+            self._lnprob[chain_ind, ind] = state["lnprob0"]
+
+        # restore the random state last so the run carries on exactly as it
+        # would have done
+        self.rng.set_state(state["rng"])
+        self._setRandomStream(self.rng)
+        np.random.set_state(state["random_state"])
+        return state
+
+    def _chainFileName(self, chain_ind):
+        """
+        Return the name of the file that a cold chain is written to. When
+        there are several cold chains the index of the chain is added to the
+        name of the chain file.
+
+        @param chain_ind: Index of the cold chain
+
+        """
+        if self.n_cold_chains == 1:
+            return self.fname
+        root, ext = os.path.splitext(self.fname)
+        return "{0}_{1}{2}".format(root, chain_ind, ext)
+
+    def _allocateChains(self, N):
+        """
+        Allocate the arrays holding the chain, log-likelihood and
+        log-posterior of each cold chain. If memmap is set these are
+        memory-mapped .npy files next to the chain file, which are filled in
+        place by updateChains so the run is not limited by the available
+        memory.
+
+        @param N: Number of samples stored for each cold chain
+
+        """
+        shapes = {
+            "_chain": (self.n_cold_chains, N, self.ndim),
+            "_lnlike": (self.n_cold_chains, N),
+            "_lnprob": (self.n_cold_chains, N),
+        }
+        self.memmapFiles = {}
+        for attr, shape in shapes.items():
+            if not self.memmap:
+                setattr(self, attr, np.zeros(shape))
+                continue
+            fname = "{0}{1}.npy".format(os.path.splitext(self.fname)[0], attr)
+            if self.resume and os.path.isfile(fname):
+                array = np.lib.format.open_memmap(fname, mode="r+")
+            else:
+                array = np.lib.format.open_memmap(
+                    fname, mode="w+", dtype=np.float64, shape=shape
+                )
+            setattr(self, attr, array)
+            self.memmapFiles[attr] = fname
+
+        # running mean and variance of each parameter of each chain
+        self._chainStats = RunningStatistics(self.n_cold_chains, self.ndim)
+
+    def _result(self):
+        """
+        Return the samples as a Result object. If the chains are stored in
+        memory-mapped files these are flushed, and the Result opens the
+        files when the samples are first needed.
+
+        """
+        if not self.memmap:
+            return Result(
+                self._chain, self._lnlike, self._lnprob, self.burn, self.n_cold_chains
+            )
+
+        for attr in self.memmapFiles:
+            getattr(self, attr).flush()
+        return Result(
+            self.memmapFiles["_chain"],
+            self.memmapFiles["_lnlike"],
+            self.memmapFiles["_lnprob"],
+            self.burn,
+            self.n_cold_chains,
+        )
+
+    def _postReceives(self):
+        """
+        Post non-blocking receives for all messages that a hot chain can be
+        sent at any time: the covariance matrix and DE buffer from the T = 1
+        chain, and swap proposals and the termination signal from the next
+        colder chain. These are then tested once per step instead of probing
+        the communicator and sleeping.
+
+        """
+        if self.nchain == 1:
+            return
+
+        # duplicating the communicator is collective so every rank does it
+        if not hasattr(self, "_covBroadcast"):
+            self._covBroadcast = _CovarianceBroadcast(self.comm, self.cov, self.groups)
+
+        if self.MPIrank == 0:
+            return
+
+        if not hasattr(self, "_postedRecvs"):
+            self._postedRecvs = _PostedReceives(self.comm)
+
+        self._covBroadcast.post()
+
+        # buffers must hold the pickled arrays, so allow for some overhead
+        overhead = 2 ** 12
+        self._postedRecvs.post("DE", 0, 222, self._DEbuffer[0].nbytes + overhead)
+        self._postedRecvs.post("swap", self.MPIrank - 1, 18)
+        self._postedRecvs.post("stop", self.MPIrank - 1, 55)
 
     def updateChains(self, p0, lnlike0, lnprob0, iter, chain_ind):
         """
@@ -338,7 +751,8 @@ class PTSampler(object):
         # update buffer
         if self.MPIrank == 0:
             # sHACK
-            self._AMbuffer[chain_ind, iter, :] = p0
+            self._AMbuffer.append(chain_ind, iter, p0)
+            self._DEreservoir.append(chain_ind, iter, p0)
 
         # put results into arrays
         if iter % self.thin == 0:
@@ -346,26 +760,27 @@ class PTSampler(object):
             self._chain[chain_ind, ind, :] = p0
             self._lnlike[chain_ind, ind] = lnlike0
             self._lnprob[chain_ind, ind] = lnprob0
+            if self._trackChainStats:
+                self._chainStats.update(chain_ind, p0)
 
         # write to file
         if self.write_cold_chains:
             if iter % self.isave == 0 and iter > 1 and iter > self.resumeLength:
                 if self.writeHotChains or self.MPIrank == 0:
-                    self._writeToFile(iter)
+                    with self._timer("write"):
+                        self._writeToFile(
+                            iter, chain_ind, start=max(iter - self.isave, self.resumeLength)
+                        )
 
                 # write output covariance matrix
-                np.save(self.outDir + "/cov.npy", self.cov)
-                if self.MPIrank == 0 and self.verbose and iter > 1:
-                    sys.stdout.write("\r")
-                    sys.stdout.write(
-                        "Finished %2.2f percent in %f s Acceptance rate = %g"
-                        % (
-                            iter / self.Niter * 100,
-                            time.time() - self.tstart,
-                            self.naccepted / iter,
-                        )
+                if isinstance(self.cov, BlockCovariance):
+                    self._writer.submit(
+                        np.savez, self.outDir + "/cov.npz", *self.cov.blocks
+                    )
+                else:
+                    self._writer.submit(
+                        np.save, self.outDir + "/cov.npy", np.copy(self.cov)
                     )
-                    sys.stdout.flush()
 
     def sample(
         self,
@@ -389,6 +804,15 @@ class PTSampler(object):
         save_jump_stats=False,
         hotChain=False,
         n_cold_chains=2,
+        ntemps=1,
+        parallel_chains=None,
+        nworkers=None,
+        memmap=False,
+        checkpoint=False,
+        adapt_weights=False,
+        DEthin=10,
+        seed=None,
+        progress_interval=1.0,
     ):
         """
         Function to carry out PTMCMC sampling.
@@ -415,9 +839,78 @@ class PTSampler(object):
         @param self.thin: Save every self.thin MCMC samples
         @param i0: Iteration to start MCMC (if i0 !=0, do not re-initialize)
         @param neff: Number of effective samples to collect before terminating
+        @param save_jump_stats: Deprecated and ignored. The statistics of every
+                                jump proposal are written to jump_stats.csv
+                                in outDir whenever write_cold_chains is set
+        @param n_cold_chains: Number of independent cold chains to run (default=2)
+        @param ntemps: Number of temperatures to hold in this process. When larger
+                       than 1 the whole ladder is sampled in-process with replica
+                       exchange swaps every Tskip steps, so no MPI is needed.
+                       Only available when not running under MPI (default=1)
+        @param parallel_chains: Run the cold chains concurrently using either a
+                                "thread" or "process" pool rather than one after
+                                another. Only available when not running under
+                                MPI (default=None)
+        @param nworkers: Number of workers in the pool (default=n_cold_chains)
+        @param memmap: Store the chains, log-likelihoods and log-posteriors in
+                       memory-mapped .npy files in outDir rather than in memory.
+                       These are written as the chains are sampled and the
+                       returned Result opens them when needed, so runs can
+                       be longer than the memory allows (default=False)
+        @param checkpoint: Save the state of the sampler to a .ckpt file next to
+                           the chain file every isave iterations. A sampler
+                           created with resume=True then carries on from the
+                           last checkpoint instead of replaying the chain file.
+                           The earlier samples are read back from the chain
+                           files, so use write_cold_chains=True or memmap=True.
+                           Not available with parallel_chains, ntemps > 1 or
+                           vectorized cold chains (default=False)
+        @param adapt_weights: Every covUpdate iterations during burn in, set the
+                              weight of each jump proposal in proportion to
+                              the squared distance its accepted jumps moved
+                              per second spent proposing and evaluating them.
+                              The weights are then fixed after burn in. The
+                              weights given in `weights` are the starting
+                              point (default=False)
+        @param DEthin: The DE jumps draw from a buffer of burn samples chosen
+                       at random from every DEthin-th sample of the run so far,
+                       which is refreshed every burn iterations (default=10)
+        @param seed: Seed of the random numbers. Each MPI process and each
+                     parallel cold chain draws from its own stream spawned
+                     from this seed, so runs can be repeated and the chains
+                     are independent. When None the seed is taken from the
+                     global numpy random state (default=None)
+        @param progress_interval: Minimum number of seconds between reports of
+                                  the progress of the cold chains, which are
+                                  written to stderr when verbose. Set to None
+                                  or 0 to switch the reports off. Cold chains
+                                  run with parallel_chains are not reported
+                                  (default=1)
 
         """
 
+        _warnSaveJumpStats(save_jump_stats)
+        if parallel_chains not in [None, "thread", "process"]:
+            raise ValueError(
+                "parallel_chains must be one of None, 'thread' or 'process'. "
+                "You have passed %s" % (parallel_chains)
+            )
+        if parallel_chains is not None and self.nchain > 1:
+            raise ValueError(
+                "Running the cold chains in parallel is only supported when "
+                "not using MPI"
+            )
+        # checked before initialize, which empties the chain files
+        if checkpoint and (
+            parallel_chains is not None
+            or ntemps > 1
+            or (self.vectorized and self.nchain == 1)
+        ):
+            raise ValueError(
+                "Checkpointing is not available with parallel_chains, ntemps > 1 "
+                "or vectorized cold chains"
+            )
+
         # get maximum number of iteration
         if maxIter is None and self.MPIrank > 0:
             maxIter = 2 * Niter
@@ -448,12 +941,95 @@ class PTSampler(object):
                 write_cold_chains=write_cold_chains,
                 hotChain=hotChain,
                 n_cold_chains=n_cold_chains,
+                ntemps=ntemps,
+                memmap=memmap,
+                checkpoint=checkpoint,
+                adapt_weights=adapt_weights,
+                DEthin=DEthin,
+                seed=seed,
             )
 
-        self.jump_proposal_kwargs = {}
         self.weights = weights
+        self._planStep()
+
+        # only the process of the T = 1 chain reports its progress
+        if self.verbose and progress_interval and self.MPIrank == 0:
+            self._progress = ProgressReporter(progress_interval)
+        else:
+            self._progress = None
+
+        try:
+            if parallel_chains is not None:
+                return self._sampleParallel(p0, Niter, i0, parallel_chains, nworkers)
+
+            if self.ntemps > 1:
+                return self._sampleTempered(p0, Niter, i0)
+
+            if self.vectorized and self.nchain == 1:
+                return self._sampleLockstep(p0, Niter, i0)
+
+            return self._sampleSerial(p0, Niter, i0)
+        finally:
+            # finish writing the output files, even if sampling failed
+            self._writer.close()
+
+    def _sampleSerial(self, p0, Niter, i0):
+        """
+        Run the cold chains one after another, with one temperature per MPI
+        process.
+
+        @param p0: Initial parameter vector
+        @param Niter: Number of iterations to use for T = 1 chain
+        @param i0: Iteration to start MCMC
+
+        """
+        state = self._loadCheckpoint()
+        if state is None:
+            p0, lnlike0, lnprob0 = self._initialState(p0)
+
+            # record first values
+            self.updateChains(p0, lnlike0, lnprob0, i0, 0)
+            start_chain, start_iter = 0, i0
+        else:
+            p0, lnlike0, lnprob0 = state["p0"], state["lnlike0"], state["lnprob0"]
+            start_chain, start_iter = state["chain_ind"], state["iter"]
+
+        self.comm.barrier()
+
+        # start iterations
+
+        self.tstart = time.time()
+        for i in range(start_chain, self.n_cold_chains):
+            if state is None and i > 0:
+                self._setResumeChain(i)
+                if self.resumeLength > 0:
+                    # start from the first sample in the chain file
+                    p0, lnlike0, lnprob0 = self._initialState(p0)
+                    self.updateChains(p0, lnlike0, lnprob0, i0, i)
+            p0, lnlike0, lnprob0 = self._runChain(
+                p0, lnlike0, lnprob0, start_iter, Niter - (start_iter - i0), i
+            )
+            start_iter = i0
+            if state is not None:
+                # only the interrupted chain had been written past i0
+                self.resumeLength = 0
+
+        if self.nchain > 1:
+            self._applyCovariance(self._covBroadcast.finish())
+        return self._result()
+
+    def _initialState(self, p0):
+        """
+        Compute the log-likelihood and log-posterior of the initial point
+        in the chain
+
+        @param p0: Initial parameter vector
+
+        @return p0: initial parameter vector
+        @return lnlike0: initial log-likelihood value
+        @return lnprob0: initial log posterior value
 
-        ### compute lnprob for initial point in chain ###
+        """
 
         # if resuming, just start with first point in chain
         if self.resume and self.resumeLength > 0:
@@ -476,206 +1052,853 @@ class PTSampler(object):
                 lnlike0 = self.logl(p0)
                 lnprob0 = 1 / self.temp * lnlike0 + lp
 
-        # record first values
-        self.updateChains(p0, lnlike0, lnprob0, i0, 0)
+        return p0, lnlike0, lnprob0
 
-        self.comm.barrier()
+    def _runChain(self, p0, lnlike0, lnprob0, i0, Niter, chain_ind):
+        """
+        Advance a single cold chain for Niter - 1 iterations
 
-        # start iterations
+        @param p0: Initial parameter vector
+        @param lnlike0: Initial log-likelihood value
+        @param lnprob0: Initial log probability value
+        @param i0: Iteration to start the chain from
+        @param Niter: Number of iterations to run the chain for
+        @param chain_ind: Index of the cold chain
 
-        self.tstart = time.time()
+        @return p0: final value of parameter vector
+        @return lnlike0: final value of likelihood
+        @return lnprob0: final value of posterior
+
+        """
         runComplete = False
         Neff = 0
-        for i in trange(n_cold_chains, desc="chains completed"):
-            iter = i0
-            for j in trange(Niter - 1, desc="samples per chain completed"):
-                iter += 1
-                accepted = 0
-
-                # call PTMCMCOneStep
-                p0, lnlike0, lnprob0 = self.PTMCMCOneStep(p0, lnlike0, lnprob0, iter, i)
-
-                # compute effective number of samples
-                if iter % 10000 == 0 and iter > 2 * self.burn and self.MPIrank == 0:
-                    try:
-                        ### this will calculate the number of effective
-                        ### samples for each chain
-                        samples = np.expand_dims(self._chain[i, : iter - 1], axis=0)
-                        arviz_samples = az.convert_to_inference_data(samples)
-                        Neff = int(np.min(az.ess(arviz_samples).to_array().values))
-                        tqdm.tqdm.write("\n {0} total samples".format(iter), end="")
-                        tqdm.tqdm.write("\n {0} effective samples".format(Neff), end="")
-
-                    except NameError:
-                        Neff = 0
-                        pass
-
-                # stop if reached effective number of samples
-                if self.MPIrank == 0 and int(Neff) > self.neff:
-                    if self.verbose:
-                        print(
-                            "\nRun Complete with {0} effective samples".format(
-                                int(Neff)
-                            )
-                        )
+        iter = i0
+
+        # hotter chains keep going until the next colder chain has finished
+        nsteps = Niter - 1 if self.MPIrank == 0 else self.maxIter - 1
+        step = self._serialStep if self._serial else self.PTMCMCOneStep
+        nextReport = i0 + self._startProgress(nsteps, chain_ind)
+        for j in range(nsteps):
+            iter += 1
+
+            # call PTMCMCOneStep
+            p0, lnlike0, lnprob0 = step(p0, lnlike0, lnprob0, iter, chain_ind)
+
+            if iter >= nextReport:
+                nextReport = iter + self._reportProgress(iter - i0, Neff)
+
+            if self.checkpoint and iter % self.isave == 0:
+                with self._timer("checkpoint"):
+                    self._saveCheckpoint(p0, lnlike0, lnprob0, iter, chain_ind)
+
+            # compute effective number of samples
+            if iter % 10000 == 0 and iter > 2 * self.burn and self.MPIrank == 0:
+                Neff = self._effectiveSamples(iter, chain_ind)
+
+            # stop if reached effective number of samples
+            if self.MPIrank == 0 and int(Neff) > self.neff:
+                if self.verbose:
+                    print(
+                        "\nRun Complete with {0} effective samples".format(int(Neff))
+                    )
+                break
+
+            # check if the next colder chain has finished
+            if self.MPIrank > 0:
+                runComplete, _ = self._postedRecvs.test("stop")
+                if runComplete:
                     break
 
-                if self.MPIrank == 0 and runComplete:
-                    for jj in range(1, self.nchain):
-                        self.comm.send(runComplete, dest=jj, tag=55)
+        self._reportProgress(iter - i0, Neff, final=True)
 
-                # check for other chains
-                if self.MPIrank > 0:
-                    runComplete = self.comm.Iprobe(source=0, tag=55)
-                    time.sleep(0.000001)  # trick to get around
-        return Result(
-            self._chain, self._lnlike, self._lnprob, self.burn, self.n_cold_chains
-        )
+        # write the samples since the last multiple of isave, leaving out
+        # those replayed from the chain file
+        start = max(iter - iter % self.isave, self.resumeLength)
+        if (
+            self.write_cold_chains
+            and (self.writeHotChains or self.MPIrank == 0)
+            and start <= iter
+        ):
+            with self._timer("write"):
+                self._writeToFile(iter + 1, chain_ind, start=start)
 
-    def PTMCMCOneStep(self, p0, lnlike0, lnprob0, iter, chain_ind):
-        """
-        Function to carry out PTMCMC sampling.
+        self._finishChain(runComplete)
+        return p0, lnlike0, lnprob0
 
-        @param p0: Initial parameter vector
-        @param lnlike0: Initial log-likelihood value
-        @param lnprob0: Initial log probability value
-        @param iter: iteration number
+    def _finishChain(self, runComplete=False):
+        """
+        Tell the next hotter chain that this chain has finished. A hot chain
+        first waits for the next colder chain to finish, rejecting any swap
+        that it proposes in the meantime, so that no chain is ever left
+        waiting on a swap partner that has stopped.
 
-        @return p0: next value of parameter vector after one MCMC step
-        @return lnlike0: next value of likelihood after one MCMC step
-        @return lnprob0: next value of posterior after one MCMC step
+        @param runComplete: the next colder chain has already finished
 
         """
-        # update covariance matrix
-        if (iter - 1) % self.covUpdate == 0 and (iter - 1) != 0 and self.MPIrank == 0:
-            self._updateRecursive(iter - 1, self.covUpdate, chain_ind)
-
-            # broadcast to other chains
-            [
-                self.comm.send(self.cov, dest=rank + 1, tag=111)
-                for rank in range(self.nchain - 1)
-            ]
+        if self.MPIrank > 0:
+            while not runComplete:
+                self._receiveUpdates()
+                readyToSwap, _ = self._postedRecvs.test("swap")
+                if readyToSwap:
+                    self.comm.send(0, dest=self.MPIrank - 1, tag=888)
+                runComplete, _ = self._postedRecvs.test("stop")
 
-        # check for sent covariance matrix from T = 0 chain
-        getCovariance = self.comm.Iprobe(source=0, tag=111)
-        time.sleep(0.000001)
-        if getCovariance and self.MPIrank > 0:
-            self.cov[:, :] = self.comm.recv(source=0, tag=111)
-            for ct, group in enumerate(self.groups):
-                covgroup = np.zeros((len(group), len(group)))
-                for ii in range(len(group)):
-                    for jj in range(len(group)):
-                        covgroup[ii, jj] = self.cov[group[ii], group[jj]]
+                # nothing left to compute so do not spin at 100% cpu
+                time.sleep(0.0001)
 
-                self.U[ct], self.S[ct], v = np.linalg.svd(covgroup)
-            getCovariance = 0
+        if self.MPIrank < self.nchain - 1:
+            self.comm.send(True, dest=self.MPIrank + 1, tag=55)
 
-        # update DE buffer
-        if (iter - 1) % self.burn == 0 and (iter - 1) != 0 and self.MPIrank == 0:
-            self._updateDEbuffer(iter - 1, self.burn, chain_ind)
+    def _effectiveSamples(self, iter, chain_ind):
+        """
+        Return the number of effective samples collected so far by a cold
+        chain. This relies on arviz and returns 0 if it is not installed
 
-            # broadcast to other chains
-            [
-                self.comm.send(self._DEbuffer, dest=rank + 1, tag=222)
-                for rank in range(self.nchain - 1)
-            ]
+        @param iter: current iteration number
+        @param chain_ind: Index of the cold chain
 
-        # check for sent DE buffer from T = 0 chain
-        getDEbuf = self.comm.Iprobe(source=0, tag=222)
-        time.sleep(0.000001)
+        """
+        try:
+            ### this will calculate the number of effective
+            ### samples for each chain
+            samples = np.expand_dims(self._chain[chain_ind, : iter - 1], axis=0)
+            arviz_samples = az.convert_to_inference_data(samples)
+            Neff = int(np.min(az.ess(arviz_samples).to_array().values))
+
+        except NameError:
+            Neff = 0
+        return Neff
+
+    def _sampleLockstep(self, p0, Niter, i0):
+        """
+        Advance all cold chains in lockstep so that the vectorized
+        log-likelihood and log-prior are called once per step on an array of
+        shape (n_cold_chains, ndim)
 
-        if (
-            getDEbuf
-            and self.MPIrank > 0
-            and "DifferentialEvolution" in list(self.weights.keys())
-        ):
-            name = self.get_proposal_object_from_name("DifferentialEvolution")
-            self._DEbuffer = self.comm.recv(source=0, tag=222)
+        @param p0: Initial parameter vector, or array of initial parameter
+                   vectors with one row per cold chain
+        @param Niter: Number of iterations to run each chain for
+        @param i0: Iteration to start the chains from
 
-            # randomize cycle
-            if prop.DEJump not in self.propCycle:
-                self.addProposalToCycle(
-                    name(kwargs=None), self.weights["DifferentialEvolution"]
-                )
-                self.randomizeProposalCycle()
+        """
+        p0 = np.array(
+            np.broadcast_to(p0, (self.n_cold_chains, self.ndim)), dtype=float
+        )
+        betas = np.ones(self.n_cold_chains) / self.temp
+        chain_inds = np.arange(self.n_cold_chains)
 
-            # reset
-            getDEbuf = 0
+        lnlike0, lnprob0, lnprior0 = self._evaluateBatch(p0, betas)
 
-        # after burn in, add DE jumps
-        if (
-            (iter - 1) == self.burn
-            and self.MPIrank == 0
-            and "DifferentialEvolution" in list(self.weights.keys())
-        ):
-            name = self.get_proposal_object_from_name("DifferentialEvolution")
-            if self.verbose:
-                print(
-                    "Adding DE jump with weight {0}".format(
-                        self.weights["DifferentialEvolution"]
-                    )
-                )
-            self.addProposalToCycle(
-                name(kwargs=None), self.weights["DifferentialEvolution"]
+        # record first values
+        for chain_ind in chain_inds:
+            self.updateChains(
+                p0[chain_ind], lnlike0[chain_ind], lnprob0[chain_ind], i0, chain_ind
             )
 
-            # randomize cycle
-            self.randomizeProposalCycle()
-
-        ### jump proposal ###
+        self.tstart = time.time()
+        Neff = 0
+        iter = i0
+        nextReport = i0 + self._startProgress(
+            Niter - 1, None, nchains=self.n_cold_chains
+        )
+        for j in range(Niter - 1):
+            iter += 1
 
-        # if resuming, just use previous chain points
-        if self.resume and self.resumeLength > 0 and iter < self.resumeLength:
-            p0, lnlike0, lnprob0 = (
-                self.resumechain[iter, :-4],
-                self.resumechain[iter, -3],
-                self.resumechain[iter, -4],
+            p0, lnlike0, lnprob0, lnprior0 = self.PTMCMCBatchStep(
+                p0, lnlike0, lnprob0, lnprior0, iter, betas, chain_inds
             )
 
-            # update acceptance counter
-            self.naccepted = iter * self.resumechain[iter, -2]
-            accepted = 1
-        else:
-            y, qxy, jump_name = self._jump(p0, iter)
-            self.jumpDict[jump_name][0] += 1
+            if iter >= nextReport:
+                nextReport = iter + self._reportProgress(iter - i0, Neff)
 
-            # compute prior and likelihood
-            lp = self.logp(y)
+            # compute effective number of samples
+            if iter % 10000 == 0 and iter > 2 * self.burn:
+                Neff = min(self._effectiveSamples(iter, ii) for ii in chain_inds)
 
-            if lp == -np.inf:
+            # stop if reached effective number of samples
+            if int(Neff) > self.neff:
+                if self.verbose:
+                    print(
+                        "\nRun Complete with {0} effective samples".format(int(Neff))
+                    )
+                break
 
-                newlnprob = -np.inf
+        self._reportProgress(iter - i0, Neff, final=True)
+        return self._result()
 
-            else:
+    def _sampleTempered(self, p0, Niter, i0):
+        """
+        Sample every cold chain with an in-process temperature ladder
 
-                newlnlike = self.logl(y)
-                newlnprob = 1 / self.temp * newlnlike + lp
+        @param p0: Initial parameter vector
+        @param Niter: Number of iterations to run each chain for
+        @param i0: Iteration to start the chains from
 
-            # hastings step
-            diff = newlnprob - lnprob0 + qxy
-            if diff > np.log(np.random.rand()):
+        """
+        self.tstart = time.time()
+        for i in range(self.n_cold_chains):
+            p0 = self._runTemperedChain(p0, i0, Niter, i)
+        return self._result()
 
-                # accept jump
-                p0, lnlike0, lnprob0 = y, newlnlike, newlnprob
+    def _runTemperedChain(self, p0, i0, Niter, chain_ind):
+        """
+        Advance all temperatures of the ladder for one cold chain in a single
+        process. The state of the ladder is held in an array of shape
+        (ntemps, ndim) and only the T = 1 replica is stored.
 
-                # update acceptance counter
-                self.naccepted += 1
-                accepted = 1
-                self.jumpDict[jump_name][1] += 1
+        @param p0: Initial parameter vector, or array of initial parameter
+                   vectors with one row per temperature
+        @param i0: Iteration to start the chain from
+        @param Niter: Number of iterations to run the chain for
+        @param chain_ind: Index of the cold chain
 
-        
-        # temperature swap
-        swapReturn, p0, lnlike0, lnprob0 = self.PTswap(p0, lnlike0, lnprob0, iter)
+        @return p0: final parameter vector of the coldest replica
 
-        # check return value
-        if swapReturn != 0:
-            self.swapProposed += 1
-            if swapReturn == 2:
-                self.nswap_accepted += 1
+        """
+        p0 = np.array(np.broadcast_to(p0, (self.ntemps, self.ndim)), dtype=float)
+        betas = 1 / np.asarray(self.ladder, dtype=float)
 
-        self.updateChains(p0, lnlike0, lnprob0, iter, chain_ind)
+        # only the coldest replica is recorded in the chain arrays
+        chain_inds = np.full(self.ntemps, -1)
+        chain_inds[0] = chain_ind
 
-        return p0, lnlike0, lnprob0
+        lnlike0, lnprob0, lnprior0 = self._evaluateBatch(p0, betas)
+        self.updateChains(p0[0], lnlike0[0], lnprob0[0], i0, chain_ind)
+
+        Neff = 0
+        iter = i0
+        nextReport = i0 + self._startProgress(Niter - 1, chain_ind)
+        for j in range(Niter - 1):
+            iter += 1
+
+            p0, lnlike0, lnprob0, lnprior0 = self.PTMCMCBatchStep(
+                p0, lnlike0, lnprob0, lnprior0, iter, betas, chain_inds
+            )
+
+            if iter >= nextReport:
+                nextReport = iter + self._reportProgress(iter - i0, Neff)
+
+            # compute effective number of samples
+            if iter % 10000 == 0 and iter > 2 * self.burn:
+                Neff = self._effectiveSamples(iter, chain_ind)
+
+            # stop if reached effective number of samples
+            if int(Neff) > self.neff:
+                if self.verbose:
+                    print(
+                        "\nRun Complete with {0} effective samples".format(int(Neff))
+                    )
+                break
+
+        self._reportProgress(iter - i0, Neff, final=True)
+        return p0[0]
+
+    def PTswapLocal(self, p0, lnlike0, lnprob0, lnprior0, betas):
+        """
+        Do parallel tempering swaps between neighbouring temperatures of a
+        ladder held in a single process. Swaps are proposed from the hottest
+        pair down to the coldest, as each hot MPI rank would do.
+
+        @param p0: Current parameter vectors with shape (ntemps, ndim)
+        @param lnlike0: Current log-likelihood values
+        @param lnprob0: Current log posterior values
+        @param lnprior0: Current log prior values
+        @param betas: inverse temperature of each replica, coldest first
+
+        @return p0: parameter vectors after the swaps
+        @return lnlike0: log-likelihood values after the swaps
+        @return lnprob0: log posterior values after the swaps
+        @return lnprior0: log prior values after the swaps
+
+        """
+        for ii in range(len(betas) - 1, 0, -1):
+            logChainSwap = (betas[ii - 1] - betas[ii]) * (lnlike0[ii] - lnlike0[ii - 1])
+            swapAccepted = logChainSwap > self.rng.log_random()
+
+            if ii == 1:
+                self.swapProposed += 1
+                self.nswap_accepted += int(swapAccepted)
+
+            if swapAccepted:
+                p0[[ii - 1, ii]] = p0[[ii, ii - 1]]
+                lnlike0[[ii - 1, ii]] = lnlike0[[ii, ii - 1]]
+                lnprior0[[ii - 1, ii]] = lnprior0[[ii, ii - 1]]
+
+        lnprob0[:] = betas * lnlike0 + lnprior0
+        return p0, lnlike0, lnprob0, lnprior0
+
+    def _evaluateBatch(self, y, betas):
+        """
+        Evaluate the log-likelihood and tempered log-posterior for a stack of
+        parameter vectors. The likelihood is only evaluated for points with
+        non-zero prior probability
+
+        @param y: array of parameter vectors with shape (k, ndim)
+        @param betas: inverse temperature for each parameter vector
+
+        @return lnlike: log-likelihood for each parameter vector
+        @return lnprob: tempered log posterior for each parameter vector
+        @return lp: log prior for each parameter vector
+
+        """
+        lp = np.asarray(self._logp_batch(y), dtype=float)
+        lnlike = np.full(len(y), -np.inf)
+        lnprob = np.full(len(y), -np.inf)
+
+        inprior = lp > -np.inf
+        if np.any(inprior):
+            lnlike[inprior] = self._logl_batch(y[inprior])
+            lnprob[inprior] = betas[inprior] * lnlike[inprior] + lp[inprior]
+        return lnlike, lnprob, lp
+
+    def PTMCMCBatchStep(self, p0, lnlike0, lnprob0, lnprior0, iter, betas, chain_inds):
+        """
+        Function to carry out one MCMC step for several chains at once. The
+        proposals for every chain are evaluated with a single call to the
+        batched log-likelihood and log-prior.
+
+        @param p0: Current parameter vectors with shape (k, ndim)
+        @param lnlike0: Current log-likelihood values
+        @param lnprob0: Current log probability values
+        @param lnprior0: Current log prior values
+        @param iter: iteration number
+        @param betas: inverse temperature of each chain
+        @param chain_inds: index of the cold chain that each row is stored in.
+                           Rows with a negative index, e.g. the hot replicas of
+                           an in-process ladder, are not stored
+
+        @return p0: next values of parameter vectors after one MCMC step
+        @return lnlike0: next values of likelihood after one MCMC step
+        @return lnprob0: next values of posterior after one MCMC step
+        @return lnprior0: next values of prior after one MCMC step
+
+        """
+        # update covariance matrix and DE buffer from the first chain
+        if (iter - 1) % self.covUpdate == 0 and (iter - 1) != 0:
+            with self._timer("covariance"):
+                self._updateRecursive(iter - 1, self.covUpdate, chain_inds[0])
+
+        if (iter - 1) % self.burn == 0 and (iter - 1) != 0:
+            with self._timer("DE"):
+                self._updateDEbuffer(chain_inds[0])
+
+        # re-weight the proposal cycle during burn in
+        if self.adapt_weights and (iter - 1) % self.covUpdate == 0 and 0 < iter - 1 <= self.burn:
+            self._adaptProposalWeights()
+
+        # after burn in, add DE jumps
+        if (iter - 1) == self.burn and "DifferentialEvolution" in self.weights:
+            name = self.get_proposal_object_from_name("DifferentialEvolution")
+            self.addProposalToCycle(
+                name(kwargs=None), self.weights["DifferentialEvolution"]
+            )
+            self.randomizeProposalCycle()
+
+        ### jump proposals ###
+        y = np.empty_like(p0)
+        qxy = np.zeros(len(p0))
+        jump_names = []
+        elapsed = np.zeros(len(p0))
+        for row in range(len(p0)):
+            tstart = time.perf_counter()
+            y[row], qxy[row], jump_name = self._jump(
+                p0[row], iter, beta=betas[row], chain_ind=max(chain_inds[row], 0)
+            )
+            elapsed[row] = time.perf_counter() - tstart
+            jump_names.append(jump_name)
+
+        # the evaluation time is shared equally between the proposals
+        tstart = time.perf_counter()
+        newlnlike, newlnprob, newlnprior = self._evaluateBatch(y, betas)
+        elapsed += (time.perf_counter() - tstart) / len(p0)
+
+        # hastings step
+        diff = newlnprob - lnprob0 + qxy
+        accepted = diff > np.log(self.rng.random(len(p0)))
+
+        # squared jump distance scaled by the variance of each parameter
+        sqjump = np.sum((y - p0) ** 2 / self._variances(), axis=1)
+
+        p0[accepted] = y[accepted]
+        lnlike0[accepted] = newlnlike[accepted]
+        lnprob0[accepted] = newlnprob[accepted]
+        lnprior0[accepted] = newlnprior[accepted]
+
+        # update acceptance counters
+        stored = chain_inds >= 0
+        self.naccepted += int(np.sum(accepted & stored))
+        for row in range(len(p0)):
+            self.jumpStats.record(
+                jump_names[row], accepted[row], elapsed[row], sqjump[row] * accepted[row]
+            )
+
+        # temperature swaps
+        if self.ntemps > 1 and iter % self.Tskip == 0:
+            with self._timer("swap"):
+                p0, lnlike0, lnprob0, lnprior0 = self.PTswapLocal(
+                    p0, lnlike0, lnprob0, lnprior0, betas
+                )
+
+        for row in np.flatnonzero(stored):
+            self.updateChains(p0[row], lnlike0[row], lnprob0[row], iter, chain_inds[row])
+
+        return p0, lnlike0, lnprob0, lnprior0
+
+    def _coldChainWorker(self, chain_ind):
+        """
+        Return a copy of the sampler that only advances the cold chain
+        ``chain_ind``. The copy has its own adaptive covariance, DE buffer
+        and proposal state while its chain arrays are single chain views of
+        the arrays held by this sampler.
+
+        @param chain_ind: Index of the cold chain
+
+        """
+        worker = copy.copy(self)
+        chain_slice = slice(chain_ind, chain_ind + 1)
+        worker.n_cold_chains = 1
+        worker._chain = self._chain[chain_slice]
+        worker._lnlike = self._lnlike[chain_slice]
+        worker._lnprob = self._lnprob[chain_slice]
+        worker._AMbuffer = self._AMbuffer[chain_slice]
+        worker._DEreservoir = self._DEreservoir[chain_slice]
+        worker._chainStats = self._chainStats[chain_slice]
+        worker._DEbuffer = self._DEbuffer[chain_slice]
+        worker.cov, worker.M2, worker.mu = copy.deepcopy((self.cov, self.M2, self.mu))
+        worker._factorization = copy.deepcopy(self._factorization)
+        worker.propCycle = copy.deepcopy(self.propCycle)
+        # the counts of each chain start from zero as they are merged back
+        # into the counts of this sampler
+        worker.jumpStats = JumpStatistics()
+        for name, weight in zip(self.jumpStats.names, self.jumpStats.weights):
+            worker.jumpStats.add(name, weight)
+        # each chain draws its own jumps
+        worker.propCycle.reset()
+        worker.aux = list(self.aux)
+        worker._resumeChains = self._resumeChains[chain_slice]
+        worker._setResumeChain(0)
+        worker.jump_proposal_kwargs = prop.ProposalContext()
+        # the chains in the pool would write over each other's reports
+        worker._progress = None
+        worker._setRandomStream(self.rng.spawn(1)[0])
+        if self.timings is not None:
+            worker.timings = Timings(self.MPIrank)
+            worker._instrument()
+        worker.naccepted = 0
+        worker.swapProposed = 0
+        worker.nswap_accepted = 0
+        root, ext = os.path.splitext(self.fname)
+        worker.fname = "{0}_{1}{2}".format(root, chain_ind, ext)
+        worker._chainOffset = chain_ind
+        return worker
+
+    def _sampleParallel(self, p0, Niter, i0, pool, nworkers):
+        """
+        Run all cold chains concurrently, each starting from p0, and
+        assemble the results
+
+        @param p0: Initial parameter vector
+        @param Niter: Number of iterations to run each chain for
+        @param i0: Iteration to start the chains from
+        @param pool: Type of pool to use: "thread" or "process"
+        @param nworkers: Number of workers in the pool
+
+        """
+        if pool == "thread":
+            Executor = ThreadPoolExecutor
+            seeds = [None] * self.n_cold_chains
+        else:
+            # forked processes inherit the global random state, which is
+            # still used by the NUTS jumps, so each chain needs its own seed
+            Executor = ProcessPoolExecutor
+            seeds = self.rng.generator.integers(0, 2 ** 32 - 1, self.n_cold_chains)
+
+        if nworkers is None:
+            nworkers = self.n_cold_chains
+
+        self.tstart = time.time()
+        with Executor(max_workers=nworkers) as executor:
+            futures = [
+                executor.submit(
+                    _sample_cold_chain,
+                    self._coldChainWorker(ii),
+                    p0,
+                    i0,
+                    Niter,
+                    seeds[ii],
+                )
+                for ii in range(self.n_cold_chains)
+            ]
+            results = [future.result() for future in futures]
+
+        self.naccepted = 0
+        self.swapProposed = 0
+        self.nswap_accepted = 0
+        for ii, result in enumerate(results):
+            chain, lnlike, lnprob, naccepted, jumpStats = result[:5]
+            self.swapProposed += result[5]
+            self.nswap_accepted += result[6]
+            if pool == "process":
+                self._chain[ii] = chain[0]
+                self._lnlike[ii] = lnlike[0]
+                self._lnprob[ii] = lnprob[0]
+            self.naccepted += naccepted
+            self.jumpStats.merge(jumpStats)
+            if self.timings is not None:
+                self.timings.merge(result[7])
+
+        return self._result()
+
+    def _startProgress(self, total, chain_ind, nchains=1):
+        """
+        Start reporting the progress of a chain, if progress reports are
+        switched on.
+
+        @param total: Number of iterations the chain is run for
+        @param chain_ind: Index of the cold chain, or None if all cold chains
+                          are advanced together
+        @param nchains: Number of chains advanced on each iteration
+
+        @return: number of iterations before the progress is next checked.
+                 This is larger than total if reports are switched off
+
+        """
+        if self._progress is None:
+            return total + 1
+        if chain_ind is None:
+            label = "%d chains" % nchains
+        else:
+            label = "chain %d/%d" % (chain_ind + 1, self.n_cold_chains)
+        self._progress.start(total, label, self.naccepted, nchains)
+        return self._progress.stride
+
+    def _reportProgress(self, done, Neff, final=False):
+        """
+        Report the progress of the chain if the reporting interval has
+        passed, or if this is the final report of the chain.
+
+        @param done: Number of iterations done since the chain started
+        @param Neff: Latest number of effective samples, or 0
+        @param final: Always report, as the chain has finished
+
+        @return: number of iterations before the progress is next checked
+
+        """
+        if self._progress is None:
+            return 0
+        swap_acceptance = None
+        if self.swapProposed:
+            swap_acceptance = self.nswap_accepted / self.swapProposed
+        if final:
+            self._progress.finish(done, self.naccepted, swap_acceptance, Neff)
+        else:
+            self._progress.update(done, self.naccepted, swap_acceptance, Neff)
+        return self._progress.stride
+
+    def _instrument(self):
+        """
+        Time every evaluation of the likelihood and prior, by replacing them
+        with timed wrappers, if timing is switched on. Nothing is wrapped
+        otherwise so that the sampling loop carries no extra cost.
+
+        """
+        if self.timings is None:
+            return
+        for attr, phase in [
+            ("logl", "likelihood"),
+            ("logp", "prior"),
+            ("_logl_batch", "likelihood"),
+            ("_logp_batch", "prior"),
+        ]:
+            f = getattr(self, attr)
+            if isinstance(f, _timed_wrapper):
+                f = f.f
+            setattr(self, attr, _timed_wrapper(f, self.timings, phase))
+
+    def _timer(self, phase):
+        """
+        Return a context manager which adds the time spent in its block to
+        phase, or does nothing if timing is switched off.
+
+        @param phase: name of the phase in PTSampler.timings
+
+        """
+        if self.timings is None:
+            return _null_timer()
+        return self.timings.timer(phase)
+
+    def _setRandomStream(self, rng):
+        """
+        Draw the random numbers of the chain steps, proposal cycle, DE
+        reservoir and jump proposals from rng.
+
+        @param rng: RandomStream of this process or chain
+
+        """
+        self.rng = rng
+        self.propCycle.rng = rng
+        self.jump_proposal_kwargs.rng = rng
+        if hasattr(self, "_DEreservoir"):
+            self._DEreservoir.rng = rng
+
+    def _planStep(self):
+        """
+        Decide once per run which step function the chains use, and which
+        per-step bookkeeping is needed. A single process run uses _serialStep,
+        which leaves out the communication and temperature swaps, unless the
+        chain file of a previous run is being replayed.
+
+        """
+        resuming = (
+            self.resume
+            and max([len(chain) for chain in self._resumeChains] + [0]) > 0
+            and not self.checkpoint
+        )
+        self._serial = self.nchain == 1 and not resuming
+        self._addDE = "DifferentialEvolution" in self.weights
+
+        # the running statistics of the chains are only kept if a proposal
+        # reads them. Proposals which are plain functions may read anything
+        self._trackChainStats = any(
+            not isinstance(jump, prop.base.JumpProposal)
+            or "chain_std" in jump.required_kwargs.get(jump.name, [])
+            for jump in self.propCycle
+        )
+
+        # constants of the serial step, refreshed when the covariance adapts
+        self._invTemp = 1 / self.temp
+        self._stepVariances = self._variances()
+
+    def _serialStep(self, p0, lnlike0, lnprob0, iter, chain_ind):
+        """
+        Carry out one MCMC step of a single process run. This gives exactly
+        the same samples as PTMCMCOneStep, but skips the messaging, swap
+        proposals and per-step dictionary lookups that are only needed when
+        there is more than one process.
+
+        @param p0: Initial parameter vector
+        @param lnlike0: Initial log-likelihood value
+        @param lnprob0: Initial log probability value
+        @param iter: iteration number
+        @param chain_ind: Index of the cold chain
+
+        @return p0: next value of parameter vector after one MCMC step
+        @return lnlike0: next value of likelihood after one MCMC step
+        @return lnprob0: next value of posterior after one MCMC step
+
+        """
+        # periodic updates of the covariance matrix, DE buffer and cycle
+        if iter > 1:
+            if (iter - 1) % self.covUpdate == 0:
+                with self._timer("covariance"):
+                    self._updateRecursive(iter - 1, self.covUpdate, chain_ind)
+                self._stepVariances = self._variances()
+            if (iter - 1) % self.burn == 0:
+                with self._timer("DE"):
+                    self._updateDEbuffer(chain_ind)
+            if self.adapt_weights and (iter - 1) % self.covUpdate == 0 and iter - 1 <= self.burn:
+                self._adaptProposalWeights()
+            if iter - 1 == self.burn and self._addDE:
+                name = self.get_proposal_object_from_name("DifferentialEvolution")
+                if self.verbose:
+                    print(
+                        "Adding DE jump with weight {0}".format(
+                            self.weights["DifferentialEvolution"]
+                        )
+                    )
+                self.addProposalToCycle(
+                    name(kwargs=None), self.weights["DifferentialEvolution"]
+                )
+                self.randomizeProposalCycle()
+
+        tstart = time.perf_counter()
+        y, qxy, jump_name = self._jump(p0, iter, chain_ind=chain_ind)
+        accepted = 0
+        sqjump = 0.0
+
+        # compute prior and likelihood
+        lp = self.logp(y)
+        if lp == -np.inf:
+            newlnprob = -np.inf
+        else:
+            newlnlike = self.logl(y)
+            newlnprob = self._invTemp * newlnlike + lp
+
+        # hastings step
+        if newlnprob - lnprob0 + qxy > self.rng.log_random():
+            sqjump = np.sum((y - p0) ** 2 / self._stepVariances)
+            p0, lnlike0, lnprob0 = y, newlnlike, newlnprob
+            self.naccepted += 1
+            accepted = 1
+
+        self.jumpStats.record(jump_name, accepted, time.perf_counter() - tstart, sqjump)
+        self.updateChains(p0, lnlike0, lnprob0, iter, chain_ind)
+
+        return p0, lnlike0, lnprob0
+
+    def PTMCMCOneStep(self, p0, lnlike0, lnprob0, iter, chain_ind):
+        """
+        Function to carry out PTMCMC sampling.
+
+        @param p0: Initial parameter vector
+        @param lnlike0: Initial log-likelihood value
+        @param lnprob0: Initial log probability value
+        @param iter: iteration number
+
+        @return p0: next value of parameter vector after one MCMC step
+        @return lnlike0: next value of likelihood after one MCMC step
+        @return lnprob0: next value of posterior after one MCMC step
+
+        """
+        # update covariance matrix
+        if (iter - 1) % self.covUpdate == 0 and (iter - 1) != 0 and self.MPIrank == 0:
+            with self._timer("covariance"):
+                self._updateRecursive(iter - 1, self.covUpdate, chain_ind)
+
+            # broadcast to other chains
+            if self.nchain > 1:
+                self._covBroadcast.send(self.cov, self.U, self.S)
+
+        # update DE buffer
+        if (iter - 1) % self.burn == 0 and (iter - 1) != 0 and self.MPIrank == 0:
+            with self._timer("DE"):
+                self._updateDEbuffer(chain_ind)
+
+            # broadcast to other chains
+            [
+                self.comm.send(self._DEbuffer, dest=rank + 1, tag=222)
+                for rank in range(self.nchain - 1)
+            ]
+
+        # check for covariance and DE buffer updates from T = 1 chain
+        if self.MPIrank > 0:
+            self._receiveUpdates()
+
+        # re-weight the proposal cycle during burn in
+        if self.adapt_weights and (iter - 1) % self.covUpdate == 0 and 0 < iter - 1 <= self.burn:
+            self._adaptProposalWeights()
+
+        # after burn in, add DE jumps
+        if (
+            (iter - 1) == self.burn
+            and self.MPIrank == 0
+            and "DifferentialEvolution" in list(self.weights.keys())
+        ):
+            name = self.get_proposal_object_from_name("DifferentialEvolution")
+            if self.verbose:
+                print(
+                    "Adding DE jump with weight {0}".format(
+                        self.weights["DifferentialEvolution"]
+                    )
+                )
+            self.addProposalToCycle(
+                name(kwargs=None), self.weights["DifferentialEvolution"]
+            )
+
+            # randomize cycle
+            self.randomizeProposalCycle()
+
+        ### jump proposal ###
+
+        # if resuming, just use previous chain points
+        if self.resume and self.resumeLength > 0 and iter < self.resumeLength:
+            p0, lnlike0, lnprob0 = (
+                self.resumechain[iter, :-4],
+                self.resumechain[iter, -3],
+                self.resumechain[iter, -4],
+            )
+
+            # update acceptance counter
+            self.naccepted = iter * self.resumechain[iter, -2]
+            accepted = 1
+        else:
+            tstart = time.perf_counter()
+            y, qxy, jump_name = self._jump(p0, iter, chain_ind=chain_ind)
+            accepted = 0
+            sqjump = 0.0
+
+            # compute prior and likelihood
+            lp = self.logp(y)
+
+            if lp == -np.inf:
+
+                newlnprob = -np.inf
+
+            else:
+
+                newlnlike = self.logl(y)
+                newlnprob = 1 / self.temp * newlnlike + lp
+
+            # hastings step
+            diff = newlnprob - lnprob0 + qxy
+            if diff > self.rng.log_random():
+
+                # squared jump distance scaled by the variance of each parameter
+                sqjump = np.sum((y - p0) ** 2 / self._variances())
+
+                # accept jump
+                p0, lnlike0, lnprob0 = y, newlnlike, newlnprob
+
+                # update acceptance counter
+                self.naccepted += 1
+                accepted = 1
+
+            self.jumpStats.record(
+                jump_name, accepted, time.perf_counter() - tstart, sqjump
+            )
+
+        
+        # temperature swap
+        swapReturn, p0, lnlike0, lnprob0 = self.PTswap(p0, lnlike0, lnprob0, iter)
+
+        # check return value
+        if swapReturn != 0:
+            self.swapProposed += 1
+            if swapReturn == 2:
+                self.nswap_accepted += 1
+
+        self.updateChains(p0, lnlike0, lnprob0, iter, chain_ind)
+
+        return p0, lnlike0, lnprob0
+
+    def _receiveUpdates(self):
+        """
+        Apply any covariance matrix, along with the eigendecomposition of each
+        parameter group, or DE buffer sent by the T = 1 chain
+
+        """
+        self._applyCovariance(self._covBroadcast.test())
+
+        getDEbuf, DEbuffer = self._postedRecvs.test("DE")
+        if getDEbuf and "DifferentialEvolution" in list(self.weights.keys()):
+            name = self.get_proposal_object_from_name("DifferentialEvolution")
+            self._DEbuffer = DEbuffer
+
+            # randomize cycle
+            if name.__name__ not in self.jumpStats:
+                self.addProposalToCycle(
+                    name(kwargs=None), self.weights["DifferentialEvolution"]
+                )
+                self.randomizeProposalCycle()
+
+    def _applyCovariance(self, update):
+        """
+        Replace the covariance matrix and eigendecomposition of each parameter
+        group with those broadcast by the T = 1 chain
+
+        @param update: tuple of covariance matrix, list of eigenvectors and list
+                       of eigenvalues, or None if there is nothing to apply
+
+        """
+        if update is None:
+            return
+        cov, U, S = update
+        if isinstance(self.cov, BlockCovariance):
+            self.cov.set_blocks(cov)
+        else:
+            self.cov[:, :] = cov
+        for ct in range(len(self.groups)):
+            self._factorization.set(ct, U[ct], S[ct])
 
     def PTswap(self, p0, lnlike0, lnprob0, iter):
         """
@@ -710,24 +1933,24 @@ class PTSampler(object):
             self.comm.send(lnlike0, dest=self.MPIrank + 1, tag=18)
 
             # determine if swap was accepted
-            swapAccepted = self.comm.recv(source=self.MPIrank + 1, tag=888)
+            with self._timer("swap_wait"):
+                swapAccepted = self.comm.recv(source=self.MPIrank + 1, tag=888)
 
             # perform swap
             if swapAccepted:
 
-                # exchange likelihood
-                lnlike0 = self.comm.recv(source=self.MPIrank + 1, tag=18)
-
-                # exchange parameters
+                # exchange likelihood and parameters
                 pnew = np.empty(self.ndim)
-                self.comm.Sendrecv(
-                    p0,
-                    dest=self.MPIrank + 1,
-                    sendtag=19,
-                    recvbuf=pnew,
-                    source=self.MPIrank + 1,
-                    recvtag=19,
-                )
+                with self._timer("swap_wait"):
+                    lnlike0 = self.comm.recv(source=self.MPIrank + 1, tag=18)
+                    self.comm.Sendrecv(
+                        p0,
+                        dest=self.MPIrank + 1,
+                        sendtag=19,
+                        recvbuf=pnew,
+                        source=self.MPIrank + 1,
+                        recvtag=19,
+                    )
                 p0 = pnew
 
                 # calculate new posterior values
@@ -736,20 +1959,17 @@ class PTSampler(object):
         # check if next lowest temperature is ready to swap
         elif self.MPIrank > 0:
 
-            readyToSwap = self.comm.Iprobe(source=self.MPIrank - 1, tag=18)
-            # trick to get around processor using 100% cpu while waiting
-            time.sleep(0.000001)
+            readyToSwap, newlnlike = self._postedRecvs.test("swap")
 
             # hotter chain decides acceptance
             if readyToSwap:
-                newlnlike = self.comm.recv(source=self.MPIrank - 1, tag=18)
 
                 # determine if swap is accepted and tell other chain
                 logChainSwap = (
                     1 / self.ladder[self.MPIrank - 1] - 1 / self.ladder[self.MPIrank]
                 ) * (lnlike0 - newlnlike)
 
-                if logChainSwap > np.log(np.random.rand()):
+                if logChainSwap > self.rng.log_random():
                     swapAccepted = 1
                 else:
                     swapAccepted = 0
@@ -766,14 +1986,15 @@ class PTSampler(object):
 
                     # exchange parameters
                     pnew = np.empty(self.ndim)
-                    self.comm.Sendrecv(
-                        p0,
-                        dest=self.MPIrank - 1,
-                        sendtag=19,
-                        recvbuf=pnew,
-                        source=self.MPIrank - 1,
-                        recvtag=19,
-                    )
+                    with self._timer("swap_wait"):
+                        self.comm.Sendrecv(
+                            p0,
+                            dest=self.MPIrank - 1,
+                            sendtag=19,
+                            recvbuf=pnew,
+                            source=self.MPIrank - 1,
+                            recvtag=19,
+                        )
                     p0 = pnew
 
                     # calculate new posterior values
@@ -791,81 +2012,89 @@ class PTSampler(object):
 
         return swapReturn, p0, lnlike0, lnprob0
 
-    def temperatureLadder(self, Tmin, Tmax=None, tstep=None):
+    def temperatureLadder(self, Tmin, Tmax=None, tstep=None, ntemps=None):
         """
         Method to compute temperature ladder. At the moment this uses
         a geometrically spaced temperature ladder with a temperature
         spacing designed to give 25 % temperature swap acceptance rate.
 
+        @param ntemps: number of temperatures (default=number of MPI ranks)
+
         """
 
         # TODO: make options to do other temperature ladders
 
-        if self.nchain > 1:
+        if ntemps is None:
+            ntemps = self.nchain
+
+        if ntemps > 1:
             if tstep is None and Tmax is None:
                 tstep = 1 + np.sqrt(2 / self.ndim)
             elif tstep is None and Tmax is not None:
-                tstep = np.exp(np.log(Tmax / Tmin) / (self.nchain - 1))
-            ladder = np.zeros(self.nchain)
-            for ii in range(self.nchain):
+                tstep = np.exp(np.log(Tmax / Tmin) / (ntemps - 1))
+            ladder = np.zeros(ntemps)
+            for ii in range(ntemps):
                 ladder[ii] = Tmin * tstep ** ii
         else:
             ladder = np.array([1])
 
         return ladder
 
-    def _writeToFile(self, iter):
+    def _writeToFile(self, iter, chain_ind=0, start=None):
         """
-        Function to write chain file. File has 3+ndim columns,
-        the first is log-posterior (unweighted), log-likelihood,
-        and acceptance probability, followed by parameter values.
+        Function to write chain file. File has 4+ndim columns,
+        the parameter values, followed by the log-posterior (unweighted),
+        log-likelihood, acceptance rate and swap acceptance rate. Each cold
+        chain is written to its own file.
 
         @param iter: Iteration of sampler
+        @param chain_ind: Index of the cold chain to write
+        @param start: First iteration to write (default=iter - isave)
 
         """
 
-        self._chainfile = open(self.fname, "a+")
-        for jj in range((iter - self.isave), iter, self.thin):
-            ind = int(jj / self.thin)
-            pt_acc = 1
-            if self.MPIrank < self.nchain - 1 and self.swapProposed != 0:
-                pt_acc = self.nswap_accepted / self.swapProposed
+        pt_acc = 1
+        if self.MPIrank < self.nchain - 1 and self.swapProposed != 0:
+            pt_acc = self.nswap_accepted / self.swapProposed
 
-            self._chainfile.write(
-                "\t".join(
-                    ["%22.22f" % (self._chain[ind, kk]) for kk in range(self.ndim)]
-                )
-            )
-            self._chainfile.write(
-                "\t%f\t%f\t%f\t%f\n"
-                % (self._lnprob[ind], self._lnlike[ind], self.naccepted / iter, pt_acc)
-            )
-        self._chainfile.close()
+        if start is None:
+            start = iter - self.isave
+        inds = np.arange(start, iter, self.thin) // self.thin
+        records = np.column_stack(
+            [
+                self._chain[chain_ind, inds],
+                self._lnprob[chain_ind, inds],
+                self._lnlike[chain_ind, inds],
+                np.full(len(inds), self.naccepted / iter),
+                np.full(len(inds), pt_acc),
+            ]
+        )
+        fname = self._chainFileName(chain_ind)
+        if self.chain_format == "binary":
+            self._writer.submit(chainfile.append, fname, records)
+        else:
+            fmt = ["%22.22f"] * self.ndim + ["%f"] * 4
+            self._writer.submit(append_text, fname, records, fmt)
 
-        #### write jump statistics files ####
+        #### write jump statistics file ####
 
         # only for T=1 chain
         if self.MPIrank == 0:
+            self._writer.submit(
+                write_text,
+                self.outDir + "/jump_stats.csv",
+                self.jumpStats.to_csv(iter, self._chainOffset + chain_ind),
+                "a",
+            )
 
-            # first write file contaning jump names and jump rates
-            fout = open(self.outDir + "/jumps.txt", "w")
-            njumps = len(self.propCycle)
-            ujumps = np.array(list(set(self.propCycle)))
-            for jump in ujumps:
-                fout.write(
-                    "%s %4.2g\n"
-                    % (jump.__name__, np.sum(np.array(self.propCycle) == jump) / njumps)
-                )
-
-            fout.close()
-
-            # now write jump statistics for each jump proposal
-            for jump in self.jumpDict:
-                fout = open(self.outDir + "/" + jump + "_jump.txt", "a+")
-                fout.write(
-                    "%g\n" % (self.jumpDict[jump][1] / max(1, self.jumpDict[jump][0]))
-                )
-                fout.close()
+        # timings of this process so far
+        if self.timings is not None:
+            self._writer.submit(
+                write_text,
+                os.path.splitext(self.fname)[0] + "_timings.csv",
+                Timings.header + self.timings.to_csv(),
+                "w",
+            )
 
     # function to update covariance matrix for jump proposals
     def _updateRecursive(self, iter, mem, chain_ind):
@@ -880,45 +2109,42 @@ class PTSampler(object):
         it = iter - mem
         ndim = self.ndim
 
+        if isinstance(self.cov, BlockCovariance):
+            self.cov.update(self._AMbuffer.last(chain_ind, iter, mem), it)
+            self._factorization.update(self.cov)
+            return
+
         if it == 0:
             self.M2 = np.zeros((ndim, ndim))
             self.mu = np.zeros(ndim)
 
-        for ii in range(mem):
-            diff = np.zeros(ndim)
-            it += 1
-            for jj in range(ndim):
-
-                diff[jj] = self._AMbuffer[chain_ind, iter - mem + ii, jj] - self.mu[jj]
-                self.mu[jj] += diff[jj] / it
+        # merge the statistics of the new block of samples into the running
+        # mean and sum of squared deviations (Chan et al. parallel update)
+        block = self._AMbuffer.last(chain_ind, iter, mem)
+        mublock = block.mean(axis=0)
+        diff = block - mublock
+        delta = mublock - self.mu
 
-            self.M2 += np.outer(
-                diff, (self._AMbuffer[chain_ind, iter - mem + ii, :] - self.mu)
-            )
+        it += mem
+        self.mu += delta * mem / it
+        self.M2 += np.dot(diff.T, diff) + np.outer(delta, delta) * (it - mem) * mem / it
 
         self.cov[:, :] = self.M2 / (it - 1)
 
-        # do svd on parameter groups
-        for ct, group in enumerate(self.groups):
-            covgroup = np.zeros((len(group), len(group)))
-            for ii in range(len(group)):
-                for jj in range(len(group)):
-                    covgroup[ii, jj] = self.cov[group[ii], group[jj]]
-
-            self.U[ct], self.S[ct], v = np.linalg.svd(covgroup)
+        # factorize the covariance of the groups which have changed
+        self._factorization.update(self.cov)
 
     # update DE buffer samples
-    def _updateDEbuffer(self, iter, burn, chain_ind):
+    def _updateDEbuffer(self, chain_ind):
         """
-        Update Differential Evolution with last burn
-        values in the total chain
+        Update the Differential Evolution buffer with the samples held in the
+        reservoir, which are drawn from the whole chain so far
 
-        @param iter: Iteration of sampler
-        @param burn: Total number of samples in DE buffer
+        @param chain_ind: Index of the cold chain
 
         """
 
-        self._DEbuffer = self._AMbuffer[chain_ind, iter - burn : iter]
+        self._DEbuffer = self._DEreservoir.samples(chain_ind)
 
     # add jump proposal distribution functions
     def addProposalToCycle(self, func, weight):
@@ -930,25 +2156,94 @@ class PTSampler(object):
 
         """
 
-        # get length of cycle so far
-        length = len(self.propCycle)
-
         # check for 0 weight
         if weight == 0:
             # print('ERROR: Can not have 0 weight in proposal cycle!')
             # sys.exit()
             return
 
+        # check once that the proposal can be used with the sampler context
+        if isinstance(func, prop.base.JumpProposal):
+            func.bind(self.jump_proposal_kwargs)
+
         # add proposal to cycle
-        for ii in range(length, length + weight):
-            self.propCycle.append(func)
+        self.propCycle.add(func, weight)
+
+        # add to jump statistics
+        self.jumpStats.add(func.__name__, weight)
+
+    def _adaptProposalWeights(self):
+        """
+        Re-weight the proposal cycle towards the proposals which move the chain
+        furthest per second. Each proposal which has been used at least ten
+        times is given a weight proportional to the squared distance moved by
+        its accepted jumps divided by the time spent on all of its jumps, which
+        is the acceptance rate times the mean squared jump distance per second.
+        Every proposal keeps at least a tenth of an equal share of the total
+        weight, so that its statistics continue to be measured.
+
+        """
+        weights = self.propCycle.weights.copy()
+        names = self.propCycle.names
+        inds = [self.jumpStats.names.index(name) for name in names]
+        rates = self.jumpStats.jump_rates[inds]
+        measured = self.jumpStats.proposed[inds] >= 10
+        if not np.any(rates[measured] > 0):
+            return
+
+        total = np.sum(weights)
+        weights[measured] = np.sum(weights[measured]) * rates[measured] / np.sum(rates[measured])
+        weights = np.maximum(weights, 0.1 * total / len(weights))
+        weights *= total / np.sum(weights)
+
+        self.propCycle.set_weights(weights)
+        for name, weight in zip(names, weights):
+            self.jumpStats.set_weight(name, weight)
+
+    def _variances(self):
+        """
+        Return the variance of each parameter from the adaptive covariance
+        matrix
+
+        """
+        if isinstance(self.cov, BlockCovariance):
+            return self.cov.variances
+        return np.diag(self.cov)
+
+    def _denseCovariance(self):
+        """
+        Return the adaptive covariance matrix as a full ndim x ndim matrix
 
-        # add to jump dictionary and initialize file
-        if func.__name__ not in self.jumpDict:
-            self.jumpDict[func.__name__] = [0, 0]
-            if self.save_jump_stats:
-                fout = open(self.outDir + "/" + func.__name__ + "_jump.txt", "w")
-                fout.close()
+        """
+        if isinstance(self.cov, BlockCovariance):
+            return self.cov.toarray()
+        return self.cov
+
+    @property
+    def U(self):
+        """
+        Eigenvectors of the covariance matrix of each parameter group
+
+        """
+        return self._factorization.U
+
+    @property
+    def S(self):
+        """
+        Eigenvalues of the covariance matrix of each parameter group
+
+        """
+        return self._factorization.S
+
+    @property
+    def jumpDict(self):
+        """
+        Number of times that each jump proposal has been proposed and
+        accepted, as a dictionary of [proposed, accepted]. This is built from
+        jumpStats, which holds the statistics.
+
+        """
+        return self.jumpStats.as_dict()
 
     # add auxilary jump proposal distribution functions
     def addAuxilaryJump(self, func):
@@ -967,62 +2262,296 @@ class PTSampler(object):
     # randomized proposal cycle
     def randomizeProposalCycle(self):
         """
-        Randomize proposal cycle that has already been filled
+        Discard the proposals that have already been drawn from the cycle, so
+        that the next jumps are drawn with the current weights
 
         """
+        self.propCycle.reset()
 
-        # get length of full cycle
-        length = len(self.propCycle)
-
-        # get random integers
-        index = np.arange(length)
-        np.random.shuffle(index)
-
-        # randomize proposal cycle
-        self.randomizedPropCycle = [self.propCycle[ind] for ind in index]
-
-    def update_jump_proposal_kwargs(self, iter):
-        """Update the jump proposal kwargs
+    def update_jump_proposal_kwargs(self, iter, beta=None, chain_ind=0):
+        """Update the sampler context passed to the jump proposals in place
         """
-        self.jump_proposal_kwargs = {
-            "iter": iter,
-            "beta": 1 / self.temp,
-            "groups": self.groups,
-            "U": self.U,
-            "S": self.S,
-            "naccepted": self.naccepted,
-            "chain": self._chain,
-            "DEBuffer": self._DEbuffer,
-        }
+        if beta is None:
+            beta = 1 / self.temp
+        context = self.jump_proposal_kwargs
+        context.iter = iter
+        context.beta = beta
+        context.groups = self.groups
+        context.U = self.U
+        context.S = self.S
+        context.L = self._factorization.L
+        context.naccepted = self.naccepted
+        context.chain = self._chain
+        if self._trackChainStats:
+            context.chain_std = self._chainStats.std(chain_ind)
+        context.DEBuffer = self._DEbuffer
 
     # call proposal functions from cycle
-    def _jump(self, x, iter):
+    def _jump(self, x, iter, beta=None, chain_ind=0):
         """
         Call Jump proposals
 
-        """
+        @param x: current parameter vector
+        @param iter: current iteration number
+        @param beta: inverse temperature of the chain (default=1/self.temp)
+        @param chain_ind: index of the cold chain whose running statistics are
+                          passed to the proposals (default=0)
 
-        # get length of cycle
-        length = len(self.propCycle)
+        """
+        if beta is None:
+            beta = 1 / self.temp
 
-        # call function
-        ind = np.random.randint(0, length)
+        # draw function from cycle
+        jump = self.propCycle.draw()
 
-        self.update_jump_proposal_kwargs(iter)
+        self.update_jump_proposal_kwargs(iter, beta=beta, chain_ind=chain_ind)
 
-        q, qxy = self.propCycle[ind](x, self.jump_proposal_kwargs)
+        if self.timings is None:
+            q, qxy = jump(x, self.jump_proposal_kwargs)
+        else:
+            tstart = time.perf_counter()
+            q, qxy = jump(x, self.jump_proposal_kwargs)
+            self.timings.add("proposal:" + jump.__name__, time.perf_counter() - tstart)
 
         # axuilary jump
         if len(self.aux) > 0:
             for aux in self.aux:
-                q, qxy_aux = aux(x, q, iter, 1 / self.temp)
+                q, qxy_aux = aux(x, q, iter, beta)
                 qxy += qxy_aux
 
-        return q, qxy, self.propCycle[ind].__name__
+        return q, qxy, jump.__name__
 
     # TODO: jump statistics
 
 
+class _PostedReceives(object):
+
+    """
+    Collection of non-blocking receives that are posted ahead of time with
+    ``comm.irecv`` and tested without blocking. A receive is posted again as
+    soon as it completes, so there is always exactly one outstanding receive
+    for each (source, tag) pair.
+
+    """
+
+    def __init__(self, comm):
+        self.comm = comm
+        self.requests = {}
+
+    def post(self, key, source, tag, bufsize=None):
+        """
+        Post a receive for messages from ``source`` with ``tag``. If a
+        receive is already outstanding for ``key`` it is kept, unless its
+        buffer is too small, in which case it is cancelled and reposted.
+
+        @param key: name used to test the receive
+        @param source: rank the messages are sent from
+        @param tag: tag of the messages
+        @param bufsize: size in bytes of the receive buffer (default=None)
+
+        """
+        if key in self.requests:
+            request, _, _, oldsize = self.requests[key]
+            if bufsize is None or (oldsize is not None and oldsize >= bufsize):
+                return
+            request.Cancel()
+            request.Wait()
+        self.requests[key] = [self._irecv(source, tag, bufsize), source, tag, bufsize]
+
+    def test(self, key):
+        """
+        Test whether the receive posted for ``key`` has completed
+
+        @return flag: True if a message was received
+        @return message: the received message, None if flag is False
+
+        """
+        entry = self.requests[key]
+        flag, message = entry[0].test()
+        if flag:
+            entry[0] = self._irecv(*entry[1:])
+        return flag, message
+
+    def _irecv(self, source, tag, bufsize):
+        if bufsize is None:
+            return self.comm.irecv(source=source, tag=tag)
+        return self.comm.irecv(bytearray(bufsize), source=source, tag=tag)
+
+
+class _CovarianceBroadcast(object):
+
+    """
+    Broadcast the adapted covariance matrix, together with the
+    eigendecomposition of each parameter group, from the T = 1 chain to all
+    other chains. Everything is packed into a single float64 buffer and sent
+    with a non-blocking collective (``Ibcast``) on a duplicate of the
+    communicator, so nothing is pickled and hotter chains never recompute the
+    decomposition.
+
+    Hotter chains always have one broadcast posted, which is tested once per
+    step and posted again when it completes. The first element of the buffer
+    is 1 for an update and 0 for the final broadcast sent by ``finish``.
+
+    """
+
+    def __init__(self, comm, cov, groups):
+        self.comm = comm.Dup()
+        self.rank = comm.Get_rank()
+        self.block = isinstance(cov, BlockCovariance)
+        if self.block:
+            self.shapes = [np.shape(block) for block in cov.blocks]
+        else:
+            self.shapes = [np.shape(cov)]
+        self.ncov = len(self.shapes)
+        for group in groups:
+            self.shapes += [(len(group), len(group)), (len(group),)]
+        self.sizes = [int(np.prod(shape)) for shape in self.shapes]
+        self.buf = np.zeros(1 + sum(self.sizes))
+        self.request = None
+
+    def post(self):
+        """
+        Post a broadcast on a hot chain if one is not already outstanding
+
+        """
+        if self.request is None:
+            self.request = self.comm.Ibcast(self.buf, root=0)
+
+    def send(self, cov, U, S):
+        """
+        Broadcast a new covariance matrix and decomposition from the T = 1
+        chain
+
+        @param cov: covariance matrix, or BlockCovariance holding its blocks
+        @param U: list of eigenvector matrices, one for each group
+        @param S: list of eigenvalues, one for each group
+
+        """
+        if self.request is not None:
+            self.request.Wait()
+        arrays = list(cov.blocks) if self.block else [cov]
+        for ct in range(len(U)):
+            arrays += [U[ct], S[ct]]
+        self.buf[0] = 1
+        self.buf[1:] = np.concatenate([np.ravel(array) for array in arrays])
+        self.request = self.comm.Ibcast(self.buf, root=0)
+
+    def test(self):
+        """
+        Test for a broadcast on a hot chain
+
+        @return: None if nothing has been received, otherwise the covariance
+                 matrix and the lists of eigenvectors and eigenvalues
+
+        """
+        if self.request is None or not self.request.Test():
+            return None
+        if self.buf[0] == 0:
+            # the final broadcast can arrive while a hot chain is still
+            # waiting for the chain below it to stop
+            self.request = None
+            return None
+        update = self._unpack()
+        self.request = self.comm.Ibcast(self.buf, root=0)
+        return update
+
+    def finish(self):
+        """
+        Match the outstanding broadcasts at the end of a run. The T = 1 chain
+        sends a final broadcast, and hotter chains wait for it.
+
+        @return: None, or on a hot chain the last update received while
+                 waiting
+
+        """
+        update = None
+        if self.rank == 0:
+            if self.request is not None:
+                self.request.Wait()
+            self.buf[0] = 0
+            self.comm.Ibcast(self.buf, root=0).Wait()
+            self.request = None
+            return update
+
+        while self.request is not None:
+            self.request.Wait()
+            if self.buf[0] == 0:
+                self.request = None
+            else:
+                update = self._unpack()
+                self.request = self.comm.Ibcast(self.buf, root=0)
+        return update
+
+    def _unpack(self):
+        arrays, start = [], 1
+        for shape, size in zip(self.shapes, self.sizes):
+            arrays.append(self.buf[start : start + size].reshape(shape).copy())
+            start += size
+        cov = arrays[: self.ncov] if self.block else arrays[0]
+        return cov, arrays[self.ncov :: 2], arrays[self.ncov + 1 :: 2]
+
+
+def _sample_cold_chain(worker, p0, i0, Niter, seed=None):
+    """
+    Run a single cold chain with a worker returned by
+    ``PTSampler._coldChainWorker``. Defined at module level so that it can be
+    dispatched to a process pool.
+
+    @param worker: single chain copy of the sampler
+    @param p0: Initial parameter vector
+    @param i0: Iteration to start the chain from
+    @param Niter: Number of iterations to run the chain for
+    @param seed: Seed for the random number generator of the worker process
+
+    """
+    if seed is not None:
+        np.random.seed(seed)
+
+    if worker.ntemps > 1:
+        worker._runTemperedChain(p0, i0, Niter, 0)
+    else:
+        p0, lnlike0, lnprob0 = worker._initialState(p0)
+        worker.updateChains(p0, lnlike0, lnprob0, i0, 0)
+        worker._runChain(p0, lnlike0, lnprob0, i0, Niter, 0)
+    worker._writer.flush()
+    return (
+        worker._chain,
+        worker._lnlike,
+        worker._lnprob,
+        worker.naccepted,
+        worker.jumpStats,
+        worker.swapProposed,
+        worker.nswap_accepted,
+        worker.timings,
+    )
+
+
+def _warnSaveJumpStats(save_jump_stats):
+    """
+    Warn that save_jump_stats is deprecated if it has been set.
+
+    @param save_jump_stats: value passed to sample or initialize
+
+    """
+    if save_jump_stats:
+        warnings.warn(
+            "save_jump_stats is deprecated and ignored. The jump statistics "
+            "are written to jump_stats.csv whenever write_cold_chains is set",
+            DeprecationWarning,
+            stacklevel=3,
+        )
+
+
+@contextmanager
+def _null_timer():
+    """
+    Context manager that does nothing, used in place of a timer when timing
+    is switched off.
+
+    """
+    yield
+
+
 class _function_wrapper(object):
 
     """
@@ -1038,3 +2567,63 @@ class _function_wrapper(object):
 
     def __call__(self, x):
         return self.f(x, *self.args, **self.kwargs)
+
+
+class _timed_wrapper(object):
+
+    """
+    Add the time spent in each call of a function to a phase of a Timings
+    object.
+
+    """
+
+    def __init__(self, f, timings, phase):
+        self.f = f
+        self.timings = timings
+        self.phase = phase
+
+    def __call__(self, x):
+        tstart = time.perf_counter()
+        out = self.f(x)
+        self.timings.add(self.phase, time.perf_counter() - tstart)
+        return out
+
+
+class _batch_wrapper(object):
+
+    """
+    Evaluate a function of a single parameter vector on each row of an
+    array of parameter vectors, optionally farming the calls out to a
+    pool with a ``map`` method.
+
+    """
+
+    def __init__(self, f, pool=None):
+        self.f = f
+        self.pool = pool
+
+    def __call__(self, x):
+        if self.pool is not None and len(x) > 1:
+            return np.array(list(self.pool.map(self.f, x)), dtype=float)
+        return np.array([self.f(xx) for xx in x], dtype=float)
+
+    def __getstate__(self):
+        # pools can not be pickled, so drop it when sent to a worker process
+        state = self.__dict__.copy()
+        state["pool"] = None
+        return state
+
+
+class _single_point_wrapper(object):
+
+    """
+    Evaluate a vectorized function, which accepts an array of shape
+    (k, ndim), on a single parameter vector.
+
+    """
+
+    def __init__(self, f):
+        self.f = f
+
+    def __call__(self, x):
+        return np.asarray(self.f(np.atleast_2d(x)), dtype=float).ravel()[0]
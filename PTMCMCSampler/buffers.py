@@ -0,0 +1,209 @@
+import numpy as np
+
+
+class CircularBuffer(object):
+    """Fixed size buffer holding the most recent samples of each chain.
+    Samples are stored at their iteration number modulo the size of the
+    buffer, so the memory needed does not depend on the length of the run
+
+    Parameters
+    ----------
+    nchains: int
+        number of chains to store samples for
+    size: int
+        maximum number of samples stored for each chain
+    ndim: int
+        number of parameters
+    """
+    def __init__(self, nchains, size, ndim):
+        self.size = size
+        self.data = np.zeros((nchains, size, ndim))
+
+    def __getitem__(self, chain_slice):
+        """Return a buffer for a subset of the chains which shares memory
+        with this one
+
+        Parameters
+        ----------
+        chain_slice: slice
+            chains to include in the new buffer
+        """
+        buffer = CircularBuffer.__new__(CircularBuffer)
+        buffer.size = self.size
+        buffer.data = self.data[chain_slice]
+        return buffer
+
+    def append(self, chain_ind, iter, sample):
+        """Store the sample from a given iteration
+
+        Parameters
+        ----------
+        chain_ind: int
+            index of the chain
+        iter: int
+            iteration the sample was drawn at
+        sample: np.ndarray
+            the sample
+        """
+        self.data[chain_ind, iter % self.size] = sample
+
+    def last(self, chain_ind, iter, n):
+        """Return a copy of the ``n`` samples stored before a given iteration,
+        oldest first
+
+        Parameters
+        ----------
+        chain_ind: int
+            index of the chain
+        iter: int
+            samples from iterations ``iter - n`` to ``iter - 1`` are returned
+        n: int
+            number of samples to return
+        """
+        if n > self.size:
+            raise ValueError(
+                "Unable to return {} samples from a buffer of size {}".format(
+                    n, self.size
+                )
+            )
+        return self.data[chain_ind, np.arange(iter - n, iter) % self.size]
+
+
+class RunningStatistics(object):
+    """Running mean and variance of each parameter of each chain, updated one
+    sample at a time with Welford's algorithm so that the cost of an update
+    does not depend on the length of the chain
+
+    Parameters
+    ----------
+    nchains: int
+        number of chains to store statistics for
+    ndim: int
+        number of parameters
+    """
+    def __init__(self, nchains, ndim):
+        self.count = np.zeros(nchains, dtype=np.int64)
+        self.mean = np.zeros((nchains, ndim))
+        self.M2 = np.zeros((nchains, ndim))
+
+    def __getitem__(self, chain_slice):
+        """Return the statistics of a subset of the chains which share memory
+        with these
+
+        Parameters
+        ----------
+        chain_slice: slice
+            chains to include
+        """
+        stats = RunningStatistics.__new__(RunningStatistics)
+        stats.count = self.count[chain_slice]
+        stats.mean = self.mean[chain_slice]
+        stats.M2 = self.M2[chain_slice]
+        return stats
+
+    def update(self, chain_ind, sample):
+        """Add a sample to the statistics of a chain
+
+        Parameters
+        ----------
+        chain_ind: int
+            index of the chain
+        sample: np.ndarray
+            the sample
+        """
+        self.count[chain_ind] += 1
+        delta = sample - self.mean[chain_ind]
+        self.mean[chain_ind] += delta / self.count[chain_ind]
+        self.M2[chain_ind] += delta * (sample - self.mean[chain_ind])
+
+    def std(self, chain_ind):
+        """Return the standard deviation of each parameter of a chain. This
+        is 0 before any samples have been added
+
+        Parameters
+        ----------
+        chain_ind: int
+            index of the chain
+        """
+        return np.sqrt(self.M2[chain_ind] / max(1, self.count[chain_ind]))
+
+
+class ReservoirBuffer(object):
+    """Fixed size, uniformly drawn subset of the samples of each chain over
+    the whole run. Every ``thin``-th sample is offered to the buffer, and
+    once the buffer is full each offered sample replaces a random stored
+    sample with probability ``size / n``, where ``n`` is the number of
+    samples offered so far (reservoir sampling). The memory needed and the
+    cost of an update do not depend on the length of the run
+
+    Parameters
+    ----------
+    nchains: int
+        number of chains to store samples for
+    size: int
+        maximum number of samples stored for each chain
+    ndim: int
+        number of parameters
+    thin: int, optional
+        only samples from every ``thin``-th iteration are offered. Default 1
+    rng: RandomStream, optional
+        random numbers used to choose the samples that are replaced. Default None,
+        which uses the global numpy random state
+    """
+    def __init__(self, nchains, size, ndim, thin=1, rng=None):
+        self.size = size
+        self.thin = thin
+        self.rng = rng
+        self.count = np.zeros(nchains, dtype=np.int64)
+        self.data = np.zeros((nchains, size, ndim))
+
+    def __getitem__(self, chain_slice):
+        """Return a buffer for a subset of the chains which shares memory
+        with this one
+
+        Parameters
+        ----------
+        chain_slice: slice
+            chains to include in the new buffer
+        """
+        buffer = ReservoirBuffer.__new__(ReservoirBuffer)
+        buffer.size = self.size
+        buffer.thin = self.thin
+        buffer.rng = self.rng
+        buffer.count = self.count[chain_slice]
+        buffer.data = self.data[chain_slice]
+        return buffer
+
+    def append(self, chain_ind, iter, sample):
+        """Offer the sample from a given iteration to the buffer
+
+        Parameters
+        ----------
+        chain_ind: int
+            index of the chain
+        iter: int
+            iteration the sample was drawn at
+        sample: np.ndarray
+            the sample
+        """
+        if iter % self.thin != 0:
+            return
+        n = self.count[chain_ind]
+        self.count[chain_ind] += 1
+        if n < self.size:
+            self.data[chain_ind, n] = sample
+        else:
+            rng = np.random if self.rng is None else self.rng
+            ind = int(rng.random() * (n + 1))
+            if ind < self.size:
+                self.data[chain_ind, ind] = sample
+
+    def samples(self, chain_ind):
+        """Return a copy of the samples stored for a chain
+
+        Parameters
+        ----------
+        chain_ind: int
+            index of the chain
+        """
+        return self.data[chain_ind, : min(self.count[chain_ind], self.size)].copy()
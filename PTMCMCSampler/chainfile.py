@@ -0,0 +1,97 @@
+"""Binary chain files. A chain file starts with a fixed size header giving
+the number of columns, followed by one little-endian float64 record per
+stored sample. Records are appended without any formatting, and a file is
+read back with a single ``np.fromfile`` call. The columns are the same as
+those of the text chain files: the parameter values followed by the
+log-posterior, log-likelihood, acceptance rate and parallel tempering swap
+acceptance rate
+"""
+import struct
+import numpy as np
+
+MAGIC = b"PTMCMCCH"
+VERSION = 1
+_HEADER = struct.Struct("<8sqq")
+_DTYPE = np.dtype("<f8")
+
+
+def is_chain_file(fname):
+    """Return True if a file is a binary chain file
+
+    Parameters
+    ----------
+    fname: str
+        path to the file
+    """
+    with open(fname, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def create(fname, ncols):
+    """Create an empty binary chain file, overwriting any existing file
+
+    Parameters
+    ----------
+    fname: str
+        path to the file
+    ncols: int
+        number of columns in each record
+    """
+    with open(fname, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, ncols))
+
+
+def append(fname, records):
+    """Append records to a binary chain file
+
+    Parameters
+    ----------
+    fname: str
+        path to the file
+    records: np.ndarray
+        2d array of records with one row per sample
+    """
+    with open(fname, "ab") as f:
+        f.write(np.ascontiguousarray(records, dtype=_DTYPE).tobytes())
+
+
+def truncate(fname, nrecords):
+    """Remove every record after the first ``nrecords`` from a binary chain
+    file
+
+    Parameters
+    ----------
+    fname: str
+        path to the file
+    nrecords: int
+        number of records to keep
+    """
+    with open(fname, "rb+") as f:
+        magic, version, ncols = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("{} is not a binary chain file".format(fname))
+        f.truncate(_HEADER.size + nrecords * ncols * _DTYPE.itemsize)
+
+
+def load(fname):
+    """Read all complete records from a binary chain file. A record which was
+    only partially written, for example because the run was killed, is
+    ignored
+
+    Parameters
+    ----------
+    fname: str
+        path to the file
+    """
+    with open(fname, "rb") as f:
+        magic, version, ncols = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("{} is not a binary chain file".format(fname))
+        if version > VERSION:
+            raise ValueError(
+                "{} was written with a newer version ({}) of the chain file "
+                "format".format(fname, version)
+            )
+        data = np.fromfile(f, dtype=_DTYPE)
+    nrecords = len(data) // ncols
+    return data[: nrecords * ncols].reshape(nrecords, ncols)
@@ -0,0 +1,176 @@
+import numpy as np
+
+
+class CovarianceFactorization(object):
+    """Eigendecomposition of the covariance matrix of each parameter group,
+    used by the adaptive covariance jumps. The covariance of each group is
+    taken from the full covariance matrix with fancy indexing and factorized
+    with ``eigh``. A group is only factorized again if its covariance has
+    changed by more than ``rtol`` since it was last factorized. The
+    eigenvectors scaled by the square root of the eigenvalues,
+    ``L = U * sqrt(S)``, are kept so that a jump along the covariance is a
+    single matrix-vector product
+
+    Parameters
+    ----------
+    groups: list
+        list of arrays of the parameter indices in each group
+    rtol: float, optional
+        relative change, in the Frobenius norm, of the covariance of a group
+        below which it is not factorized again. Default 1e-3
+    """
+    def __init__(self, groups, rtol=1e-3):
+        self.groups = [np.asarray(group) for group in groups]
+        self.rtol = rtol
+        self.U = [None] * len(self.groups)
+        self.S = [None] * len(self.groups)
+        self.L = [None] * len(self.groups)
+        self._cov = [None] * len(self.groups)
+
+    def update(self, cov, force=False):
+        """Factorize the covariance of every group which has changed
+
+        Parameters
+        ----------
+        cov: np.ndarray, BlockCovariance
+            covariance matrix of all parameters
+        force: Bool, optional
+            factorize every group even if its covariance has not changed.
+            Default False
+
+        Returns
+        -------
+        nupdated: int
+            number of groups which were factorized
+        """
+        nupdated = 0
+        for ct, group in enumerate(self.groups):
+            if isinstance(cov, BlockCovariance):
+                covgroup = cov.blocks[ct]
+            else:
+                covgroup = cov[np.ix_(group, group)]
+            old = self._cov[ct]
+            if not force and old is not None and np.linalg.norm(
+                covgroup - old
+            ) <= self.rtol * np.linalg.norm(old):
+                continue
+            S, U = np.linalg.eigh(covgroup)
+            # largest eigenvalues first, as returned by an svd. Round off
+            # can make the smallest eigenvalues slightly negative
+            self.set(ct, U[:, ::-1], np.maximum(S[::-1], 0.0))
+            self._cov[ct] = covgroup
+            nupdated += 1
+        return nupdated
+
+    def set(self, ct, U, S):
+        """Set the eigenvectors and eigenvalues of a group, for example when
+        they were computed by another chain
+
+        Parameters
+        ----------
+        ct: int
+            index of the group
+        U: np.ndarray
+            eigenvectors, one per column
+        S: np.ndarray
+            eigenvalues
+        """
+        self.U[ct], self.S[ct] = U, S
+        self.L[ct] = U * np.sqrt(S)
+        self._cov[ct] = None
+
+
+class BlockCovariance(object):
+    """Block diagonal covariance matrix with one block for each parameter
+    group. Only the blocks, and the sums of squared deviations used to adapt
+    them, are stored, so the memory needed and the cost of an update scale
+    with the sizes of the groups rather than with the square of the number
+    of parameters. Parameters in different groups are treated as
+    uncorrelated
+
+    Parameters
+    ----------
+    ndim: int
+        number of parameters
+    groups: list
+        list of arrays of the parameter indices in each group
+    cov: np.ndarray, list
+        initial covariance, either the full covariance matrix, from which
+        the blocks are taken, or a list of the covariance matrix of each group
+    """
+    def __init__(self, ndim, groups, cov):
+        self.ndim = ndim
+        self.groups = [np.asarray(group) for group in groups]
+        if isinstance(cov, np.ndarray):
+            cov = [cov[np.ix_(group, group)] for group in self.groups]
+        if len(cov) != len(self.groups):
+            raise ValueError(
+                "Expected {} covariance blocks but received {}".format(
+                    len(self.groups), len(cov)
+                )
+            )
+        self.blocks = [np.array(block, dtype=float) for block in cov]
+        self.M2 = [np.zeros_like(block) for block in self.blocks]
+        self.mu = np.zeros(self.ndim)
+        self._set_variances()
+
+    @property
+    def nbytes(self):
+        """Return the memory used by the blocks and sums of squares
+        """
+        return sum(block.nbytes + M2.nbytes for block, M2 in zip(self.blocks, self.M2))
+
+    def update(self, samples, count):
+        """Merge a block of samples into the running mean and sums of squared
+        deviations of each group (Chan et al. parallel update) and update the
+        covariance blocks
+
+        Parameters
+        ----------
+        samples: np.ndarray
+            array of new samples with shape (n, ndim)
+        count: int
+            number of samples merged before these. The statistics are reset
+            when this is 0
+        """
+        n = len(samples)
+        if count == 0:
+            self.mu[:] = 0
+            for M2 in self.M2:
+                M2[:] = 0
+        mublock = samples.mean(axis=0)
+        diff = samples - mublock
+        delta = mublock - self.mu
+        total = count + n
+        for ct, group in enumerate(self.groups):
+            self.M2[ct] += np.dot(diff[:, group].T, diff[:, group]) + np.outer(
+                delta[group], delta[group]
+            ) * count * n / total
+            self.blocks[ct] = self.M2[ct] / (total - 1)
+        self.mu += delta * n / total
+        self._set_variances()
+
+    def set_blocks(self, blocks):
+        """Replace the covariance blocks, for example with those adapted by
+        another chain
+
+        Parameters
+        ----------
+        blocks: list
+            covariance matrix of each group
+        """
+        self.blocks = [np.array(block, dtype=float) for block in blocks]
+        self._set_variances()
+
+    def toarray(self):
+        """Return the full covariance matrix
+        """
+        cov = np.zeros((self.ndim, self.ndim))
+        for group, block in zip(self.groups, self.blocks):
+            cov[np.ix_(group, group)] = block
+        return cov
+
+    def _set_variances(self):
+        self.variances = np.ones(self.ndim)
+        for group, block in zip(self.groups, self.blocks):
+            self.variances[group] = np.diag(block)
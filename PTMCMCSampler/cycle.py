@@ -0,0 +1,160 @@
+import numpy as np
+
+
+class ProposalCycle(object):
+    """Weighted random selection of jump proposals. Each proposal is stored
+    once with a (possibly fractional) weight, and proposals are selected
+    with Walker's alias method, so a selection takes the same time however
+    many proposals there are and however large their weights. Selections
+    are drawn in blocks of ``blocksize`` to avoid calling the random number
+    generator every iteration
+
+    Parameters
+    ----------
+    blocksize: int, optional
+        number of selections drawn at once. Default 1000
+    rng: RandomStream, optional
+        random numbers the selections are drawn from. Default None, which uses
+        the global numpy random state
+    """
+    def __init__(self, blocksize=1000, rng=None):
+        self.blocksize = blocksize
+        self.rng = rng
+        self.proposals = []
+        self.weights = np.zeros(0)
+        self._prob = np.zeros(0)
+        self._alias = np.zeros(0, dtype=int)
+        self._draws = np.zeros(0, dtype=int)
+        self._next = 0
+
+    def __len__(self):
+        return len(self.proposals)
+
+    def __iter__(self):
+        return iter(self.proposals)
+
+    def __getitem__(self, ind):
+        return self.proposals[ind]
+
+    @property
+    def names(self):
+        """Return the name of each proposal
+        """
+        return [proposal.__name__ for proposal in self.proposals]
+
+    def add(self, proposal, weight):
+        """Add a proposal to the cycle. If the proposal is already in the
+        cycle its weight is increased
+
+        Parameters
+        ----------
+        proposal: function
+            jump proposal
+        weight: float
+            weight of the proposal
+        """
+        if weight < 0:
+            raise ValueError("Proposal weights must not be negative")
+        for ind, existing in enumerate(self.proposals):
+            if existing is proposal:
+                weights = self.weights.copy()
+                weights[ind] += weight
+                self.set_weights(weights)
+                return
+        self.proposals.append(proposal)
+        self.set_weights(np.append(self.weights, weight))
+
+    def set_weights(self, weights):
+        """Change the weights of the proposals. Any selections already drawn
+        are discarded
+
+        Parameters
+        ----------
+        weights: np.ndarray
+            new weight of each proposal, in the order they were added
+        """
+        weights = np.array(weights, dtype=float)
+        if len(weights) != len(self.proposals):
+            raise ValueError(
+                "Expected {} weights but received {}".format(
+                    len(self.proposals), len(weights)
+                )
+            )
+        if np.any(weights < 0) or np.sum(weights) <= 0:
+            raise ValueError(
+                "Proposal weights must not be negative and must not all be 0"
+            )
+        self.weights = weights
+        self._prob, self._alias = _alias_table(weights / np.sum(weights))
+        self.reset()
+
+    def reset(self):
+        """Discard any selections that have already been drawn
+        """
+        self._draws = np.zeros(0, dtype=int)
+        self._next = 0
+
+    def draw(self):
+        """Select a proposal at random according to the weights
+        """
+        if self._next == len(self._draws):
+            rng = np.random if self.rng is None else self.rng
+            ind = (rng.random(self.blocksize) * len(self.proposals)).astype(int)
+            u = rng.random(self.blocksize)
+            self._draws = np.where(u < self._prob[ind], ind, self._alias[ind])
+            self._next = 0
+        proposal = self.proposals[self._draws[self._next]]
+        self._next += 1
+        return proposal
+
+    def get_state(self):
+        """Return the names and weights of the proposals and any selections
+        that have been drawn but not used, for example to save in a
+        checkpoint
+        """
+        return {
+            "names": self.names,
+            "weights": self.weights.copy(),
+            "draws": self._draws[self._next :].copy(),
+        }
+
+    def set_state(self, state, proposals):
+        """Restore the cycle from the output of ``get_state``
+
+        Parameters
+        ----------
+        state: dict
+            dictionary returned by ``get_state``
+        proposals: dict
+            dictionary of proposals keyed by name
+        """
+        self.proposals = [proposals[name] for name in state["names"]]
+        self.set_weights(state["weights"])
+        self._draws = state["draws"].copy()
+
+
+def _alias_table(prob):
+    """Return the probability and alias tables of Walker's alias method
+    (using Vose's construction) for a normalized array of probabilities
+
+    Parameters
+    ----------
+    prob: np.ndarray
+        probability of each outcome
+    """
+    n = len(prob)
+    scaled = prob * n
+    table = np.ones(n)
+    alias = np.arange(n)
+    small = [ind for ind in range(n) if scaled[ind] < 1]
+    large = [ind for ind in range(n) if scaled[ind] >= 1]
+    while small and large:
+        less, more = small.pop(), large.pop()
+        table[less] = scaled[less]
+        alias[less] = more
+        scaled[more] -= 1 - scaled[less]
+        if scaled[more] < 1:
+            small.append(more)
+        else:
+            large.append(more)
+    return table, alias
@@ -0,0 +1,158 @@
+import numpy as np
+
+
+class JumpStatistics(object):
+    """Running statistics of each jump proposal in the proposal cycle. The
+    number of times that each proposal has been proposed and accepted, its
+    weight in the cycle, the total squared distance of its accepted jumps and
+    the time spent proposing and evaluating its jumps are stored in arrays
+    indexed by proposal
+    """
+    header = (
+        "iter,chain,proposal,weight,proposed,accepted,acceptance_rate,time,"
+        "mean_sq_jump\n"
+    )
+
+    def __init__(self):
+        self.names = []
+        self._index = {}
+        self.weights = np.zeros(0)
+        self.proposed = np.zeros(0, dtype=np.int64)
+        self.accepted = np.zeros(0, dtype=np.int64)
+        self.time = np.zeros(0)
+        self.sqjump = np.zeros(0)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, weight=0):
+        """Add a proposal, or increase its weight if it has already been
+        added
+
+        Parameters
+        ----------
+        name: str
+            name of the proposal
+        weight: float, optional
+            weight of the proposal in the cycle
+        """
+        if name not in self._index:
+            self._index[name] = len(self.names)
+            self.names.append(name)
+            self.weights = np.append(self.weights, 0.0)
+            self.proposed = np.append(self.proposed, 0)
+            self.accepted = np.append(self.accepted, 0)
+            self.time = np.append(self.time, 0.0)
+            self.sqjump = np.append(self.sqjump, 0.0)
+        self.weights[self._index[name]] += weight
+
+    def set_weight(self, name, weight):
+        """Set the weight of a proposal
+
+        Parameters
+        ----------
+        name: str
+            name of the proposal
+        weight: float
+            weight of the proposal in the cycle
+        """
+        self.weights[self._index[name]] = weight
+
+    def record(self, name, accepted, elapsed=0.0, sqjump=0.0):
+        """Record a jump made with a proposal
+
+        Parameters
+        ----------
+        name: str
+            name of the proposal
+        accepted: Bool
+            whether the jump was accepted
+        elapsed: float, optional
+            time in seconds spent proposing and evaluating the jump
+        sqjump: float, optional
+            squared distance of the jump if it was accepted
+        """
+        ind = self._index[name]
+        self.proposed[ind] += 1
+        self.accepted[ind] += accepted
+        self.time[ind] += elapsed
+        self.sqjump[ind] += sqjump
+
+    def merge(self, other):
+        """Add the counts and times of another JumpStatistics object, for
+        example from a chain run in another process
+
+        Parameters
+        ----------
+        other: JumpStatistics
+            statistics to add to these
+        """
+        for ind, name in enumerate(other.names):
+            self.add(name)
+            self.proposed[self._index[name]] += other.proposed[ind]
+            self.accepted[self._index[name]] += other.accepted[ind]
+            self.time[self._index[name]] += other.time[ind]
+            self.sqjump[self._index[name]] += other.sqjump[ind]
+
+    @property
+    def acceptance_rates(self):
+        """Return the acceptance rate of each proposal
+        """
+        return self.accepted / np.maximum(1, self.proposed)
+
+    @property
+    def mean_sq_jumps(self):
+        """Return the mean squared jump distance of each proposal, with
+        rejected jumps counted as a distance of 0
+        """
+        return self.sqjump / np.maximum(1, self.proposed)
+
+    @property
+    def jump_rates(self):
+        """Return the squared jump distance moved per second by each proposal
+        """
+        return self.sqjump / np.where(self.time > 0, self.time, np.inf)
+
+    def as_dict(self):
+        """Return a dictionary of [number proposed, number accepted] for each
+        proposal, in the format of ``PTSampler.jumpDict``
+        """
+        return {
+            name: [int(self.proposed[ind]), int(self.accepted[ind])]
+            for ind, name in enumerate(self.names)
+        }
+
+    def to_csv(self, iter, chain=0):
+        """Return the statistics of every proposal as lines of a csv file
+        with columns given by ``JumpStatistics.header``
+
+        Parameters
+        ----------
+        iter: int
+            iteration that the statistics are recorded at
+        chain: int, optional
+            index of the cold chain that the statistics are recorded for.
+            Default 0
+        """
+        total = np.sum(self.weights)
+        weights = self.weights / total if total > 0 else self.weights
+        rates = self.acceptance_rates
+        sqjumps = self.mean_sq_jumps
+        return "".join(
+            "%d,%d,%s,%.4g,%d,%d,%.6g,%.6g,%.6g\n"
+            % (
+                iter,
+                chain,
+                name,
+                weights[ind],
+                self.proposed[ind],
+                self.accepted[ind],
+                rates[ind],
+                self.time[ind],
+                sqjumps[ind],
+            )
+            for ind, name in enumerate(self.names)
+        )
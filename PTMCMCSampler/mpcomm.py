@@ -0,0 +1,513 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Communicator built on ``multiprocessing`` that can be used in place of
+``MPI.COMM_WORLD`` to run one temperature per process on a single node
+without an MPI installation.
+
+Small python objects are passed through a ``multiprocessing.Queue`` per
+rank. Numpy arrays, such as the parameter vectors exchanged during a
+temperature swap, are written into a shared-memory ring buffer owned by the
+sending rank and only a short header travels through the queue, so the
+array data is never pickled. This needs ``multiprocessing.shared_memory``,
+so Python 3.8 or later.
+
+Example
+-------
+>>> from PTMCMCSampler import mpcomm
+>>> from PTMCMCSampler.PTMCMCSampler import PTSampler
+>>> def run_sampler(comm):
+...     sampler = PTSampler(ndim, logl, logp, cov, comm=comm)
+...     return sampler.sample(p0, 10000)
+>>> results = mpcomm.run(run_sampler, 4)
+"""
+
+from __future__ import division, print_function, absolute_import
+
+import copy
+import uuid
+import time
+import traceback
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+
+
+# tag reserved for the messages sent by Ibcast
+_BCAST_TAG = -1
+
+
+class _Ring(object):
+    """Fixed size ring of shared-memory slots used to send arrays from one
+    rank to another. The first 8 bytes of the block hold the number of
+    messages that the receiving rank has read, so that the sender never
+    overwrites a slot that has not yet been consumed.
+
+    Parameters
+    ----------
+    name: str
+        name of the shared memory block
+    nslots: int
+        number of slots in the ring
+    slotsize: int
+        size of each slot in bytes
+    create: Bool
+        if True, create the shared memory block. Otherwise attach to an
+        existing block
+    """
+    header = 8
+
+    def __init__(self, name, nslots, slotsize, create=False):
+        self.nslots = nslots
+        self.slotsize = slotsize
+        size = self.header + nslots * slotsize
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        if not create:
+            _untrack(self.shm)
+        self.nread = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf)
+        if create:
+            self.nread[0] = 0
+        self.nwritten = 0
+
+    def write(self, array):
+        """Copy an array into the next free slot and return the slot index
+
+        Parameters
+        ----------
+        array: numpy.ndarray
+            contiguous array to copy into shared memory
+        """
+        while self.nwritten - self.nread[0] >= self.nslots:
+            time.sleep(0.00001)
+        slot = self.nwritten % self.nslots
+        self._view(slot, array.shape, array.dtype)[...] = array
+        self.nwritten += 1
+        return slot
+
+    def read(self, slot, shape, dtype):
+        """Return a copy of the array stored in a slot and mark it as read
+
+        Parameters
+        ----------
+        slot: int
+            index of the slot
+        shape: tuple
+            shape of the stored array
+        dtype: numpy.dtype
+            data type of the stored array
+        """
+        array = np.array(self._view(slot, shape, dtype))
+        self.nread[0] += 1
+        return array
+
+    def _view(self, slot, shape, dtype):
+        offset = self.header + slot * self.slotsize
+        return np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+
+    def close(self, unlink=False):
+        """Release the shared memory block
+
+        Parameters
+        ----------
+        unlink: Bool
+            if True, also remove the block. Only the creating rank should do
+            this
+        """
+        del self.nread
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _untrack(shm):
+    """Stop the resource tracker of this process from removing a shared
+    memory block that was created, and will be removed, by another process
+    """
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+class SharedMemoryComm(object):
+    """Communicator for one rank of a group of processes on a single node.
+    Implements the subset of the ``mpi4py`` communicator interface used by
+    ``PTSampler``. Communicators are normally created by ``run``.
+
+    Parameters
+    ----------
+    rank: int
+        rank of this process
+    size: int
+        total number of processes
+    inboxes: list
+        list of ``multiprocessing.Queue`` objects, one for each rank
+    barrier: multiprocessing.Barrier
+        barrier shared by all ranks
+    prefix: str
+        prefix used to name the shared memory blocks of this group
+    nslots: int
+        number of slots in each shared-memory ring. Default 4
+    slotsize: int
+        size of each slot in bytes. Arrays which do not fit are sent through
+        the queue instead. Default 262144
+    """
+    def __init__(
+        self, rank, size, inboxes, barrier, prefix, nslots=4, slotsize=262144
+    ):
+        self.rank = rank
+        self.size = size
+        self.inboxes = inboxes
+        self.inbox = inboxes[rank]
+        self._barrier = barrier
+        self.prefix = prefix
+        self.nslots = nslots
+        self.slotsize = slotsize
+        self._pending = []
+        self._sendrings = {}
+        self._recvrings = {}
+        self.context = ()
+        self._ndup = 0
+
+    def Get_rank(self):
+        return self.rank
+
+    def Get_size(self):
+        return self.size
+
+    def barrier(self):
+        self._barrier.wait()
+
+    def Dup(self):
+        """Return a communicator over the same ranks whose messages never
+        match those sent on this communicator. Like ``MPI.Comm.Dup`` this
+        must be called in the same order on every rank
+        """
+        self._ndup += 1
+        dup = copy.copy(self)
+        dup.context = self.context + (self._ndup,)
+        dup._ndup = 0
+        return dup
+
+    def Ibcast(self, buf, root=0):
+        """Broadcast the contents of ``buf`` from ``root`` to all other ranks
+        without blocking. On the other ranks the data is copied into their
+        ``buf`` when the returned request completes
+
+        Parameters
+        ----------
+        buf: numpy.ndarray
+            array to send on root, and to receive into on the other ranks
+        root: int
+            rank to broadcast from
+        """
+        if self.rank == root:
+            for dest in range(self.size):
+                if dest != root:
+                    self.send(buf, dest=dest, tag=_BCAST_TAG)
+            return _CompletedRequest()
+        return _Request(self, root, _BCAST_TAG, buf=buf)
+
+    def send(self, obj, dest=1, tag=55):
+        """Send a python object or numpy array to another rank. This does not
+        block
+
+        Parameters
+        ----------
+        obj: object
+            object to send
+        dest: int
+            rank to send the object to
+        tag: int
+            message tag
+        """
+        if self._use_shared_memory(obj):
+            obj = np.ascontiguousarray(obj)
+            ring = self._sendring(dest)
+            slot = ring.write(obj)
+            self.inboxes[dest].put(
+                ("shm", self.rank, self.context, tag,
+                 (slot, obj.shape, obj.dtype.str))
+            )
+        else:
+            # the queue pickles in a background thread, so arrays must be
+            # copied in case the caller modifies them straight away
+            if isinstance(obj, np.ndarray):
+                obj = obj.copy()
+            self.inboxes[dest].put(("obj", self.rank, self.context, tag, obj))
+
+    def recv(self, source=1, tag=55):
+        """Block until a message from ``source`` with ``tag`` arrives and
+        return it
+
+        Parameters
+        ----------
+        source: int
+            rank to receive the message from
+        tag: int
+            message tag
+        """
+        while True:
+            ind = self._find(source, tag)
+            if ind is not None:
+                return self._pending.pop(ind)[3]
+            self._store(self.inbox.get())
+
+    def Iprobe(self, source=1, tag=55):
+        """Return True if a message from ``source`` with ``tag`` is waiting to
+        be received
+
+        Parameters
+        ----------
+        source: int
+            rank the message is from
+        tag: int
+            message tag
+        """
+        self._drain()
+        return self._find(source, tag) is not None
+
+    def irecv(self, buf=None, source=1, tag=55):
+        """Post a non-blocking receive for a message from ``source`` with
+        ``tag``. Messages are matched when the returned request is tested, so
+        ``buf`` is not needed and is ignored
+
+        Parameters
+        ----------
+        buf: bytearray
+            ignored, accepted for compatibility with mpi4py
+        source: int
+            rank to receive the message from
+        tag: int
+            message tag
+        """
+        return _Request(self, source, tag)
+
+    def Sendrecv(
+        self, sendbuf, dest=0, sendtag=0, recvbuf=None, source=0, recvtag=0
+    ):
+        """Send an array to one rank and receive an array from another into
+        ``recvbuf``
+
+        Parameters
+        ----------
+        sendbuf: numpy.ndarray
+            array to send
+        dest: int
+            rank to send the array to
+        sendtag: int
+            tag of the sent message
+        recvbuf: numpy.ndarray
+            array to store the received data in
+        source: int
+            rank to receive the array from
+        recvtag: int
+            tag of the received message
+        """
+        self.send(sendbuf, dest=dest, tag=sendtag)
+        data = self.recv(source=source, tag=recvtag)
+        if recvbuf is not None:
+            np.copyto(recvbuf, np.reshape(data, np.shape(recvbuf)))
+        return data
+
+    def close(self):
+        """Release all shared memory blocks used by this rank
+        """
+        for ring in self._recvrings.values():
+            ring.close()
+        for ring in self._sendrings.values():
+            ring.close(unlink=True)
+        self._recvrings, self._sendrings = {}, {}
+
+    def _use_shared_memory(self, obj):
+        return (
+            isinstance(obj, np.ndarray)
+            and obj.dtype.kind in "biuf"
+            and obj.nbytes <= self.slotsize
+        )
+
+    def _ringname(self, source, dest):
+        return "%s_%d_%d" % (self.prefix, source, dest)
+
+    def _sendring(self, dest):
+        if dest not in self._sendrings:
+            self._sendrings[dest] = _Ring(
+                self._ringname(self.rank, dest), self.nslots, self.slotsize,
+                create=True)
+        return self._sendrings[dest]
+
+    def _recvring(self, source):
+        if source not in self._recvrings:
+            self._recvrings[source] = _Ring(
+                self._ringname(source, self.rank), self.nslots, self.slotsize)
+        return self._recvrings[source]
+
+    def _store(self, message):
+        """Add a message taken from the inbox to the list of pending messages,
+        copying any array out of shared memory so that the slot can be reused
+        """
+        kind, source, context, tag, payload = message
+        if kind == "shm":
+            slot, shape, dtype = payload
+            payload = self._recvring(source).read(slot, shape, np.dtype(dtype))
+        self._pending.append((source, context, tag, payload))
+
+    def _drain(self):
+        # only this rank reads from its inbox, so a message reported by
+        # empty() can not be taken by anyone else before the get()
+        while not self.inbox.empty():
+            self._store(self.inbox.get())
+
+    def _find(self, source, tag):
+        for ind, (msource, mcontext, mtag, _) in enumerate(self._pending):
+            if msource == source and mtag == tag and mcontext == self.context:
+                return ind
+        return None
+
+
+class _Request(object):
+    """Non-blocking receive returned by ``SharedMemoryComm.irecv``
+
+    Parameters
+    ----------
+    comm: SharedMemoryComm
+        communicator that posted the receive
+    source: int
+        rank to receive the message from
+    tag: int
+        message tag
+    buf: numpy.ndarray
+        array to copy the received data into, used by ``Ibcast``
+    """
+    def __init__(self, comm, source, tag, buf=None):
+        self.comm = comm
+        self.source = source
+        self.tag = tag
+        self.buf = buf
+        self.inactive = False
+
+    def test(self):
+        """Return (True, message) if the message has arrived, otherwise
+        (False, None)
+        """
+        if self.inactive:
+            return False, None
+        self.comm._drain()
+        ind = self.comm._find(self.source, self.tag)
+        if ind is None:
+            return False, None
+        return True, self._complete(self.comm._pending.pop(ind)[3])
+
+    def wait(self):
+        """Block until the message arrives and return it
+        """
+        return self._complete(self.comm.recv(source=self.source, tag=self.tag))
+
+    def Test(self):
+        return self.test()[0]
+
+    def Wait(self):
+        if not self.inactive:
+            self.wait()
+
+    def Cancel(self):
+        self.inactive = True
+
+    def _complete(self, message):
+        if self.buf is not None:
+            np.copyto(self.buf, np.reshape(message, np.shape(self.buf)))
+        self.inactive = True
+        return message
+
+
+class _CompletedRequest(object):
+    """Request for an operation that completed when it was started
+    """
+    def test(self):
+        return True, None
+
+    def Test(self):
+        return True
+
+    def wait(self):
+        pass
+
+    def Wait(self):
+        pass
+
+
+def _bootstrap(target, rank, size, inboxes, barrier, results, prefix, args,
+               kwargs, comm_kwargs):
+    """Entry point of each process started by ``run``
+    """
+    comm = SharedMemoryComm(rank, size, inboxes, barrier, prefix, **comm_kwargs)
+    try:
+        output = target(comm, *args, **kwargs)
+        results.put((rank, True, output))
+    except Exception:
+        results.put((rank, False, traceback.format_exc()))
+        raise
+    finally:
+        # wait for all ranks before removing the shared memory blocks that
+        # other ranks may still be reading
+        try:
+            comm.barrier()
+        except Exception:
+            pass
+        comm.close()
+
+
+def run(target, size, args=(), kwargs=None, nslots=4, slotsize=262144):
+    """Run ``target(comm, *args, **kwargs)`` on ``size`` processes, each with
+    a ``SharedMemoryComm`` communicator, and return the values returned by
+    each rank ordered by rank
+
+    Parameters
+    ----------
+    target: function
+        function to run on each process. It must accept the communicator as
+        its first argument
+    size: int
+        number of processes to run
+    args: tuple
+        additional arguments passed to target
+    kwargs: dict
+        additional keyword arguments passed to target
+    nslots: int
+        number of slots in each shared-memory ring. Default 4
+    slotsize: int
+        size of each slot in bytes. Default 262144
+    """
+    if kwargs is None:
+        kwargs = {}
+    prefix = "ptmcmc_%s" % (uuid.uuid4().hex[:12])
+    inboxes = [multiprocessing.Queue() for _ in range(size)]
+    barrier = multiprocessing.Barrier(size)
+    results = multiprocessing.Queue()
+    comm_kwargs = {"nslots": nslots, "slotsize": slotsize}
+
+    processes = [
+        multiprocessing.Process(
+            target=_bootstrap,
+            args=(target, rank, size, inboxes, barrier, results, prefix, args,
+                  kwargs, comm_kwargs))
+        for rank in range(size)]
+    for process in processes:
+        process.start()
+
+    outputs = [None] * size
+    for _ in range(size):
+        rank, success, output = results.get()
+        if not success:
+            for process in processes:
+                process.terminate()
+            raise RuntimeError(
+                "Rank %s failed with the following error:\n\n%s" % (
+                    rank, output))
+        outputs[rank] = output
+
+    for process in processes:
+        process.join()
+    return outputs
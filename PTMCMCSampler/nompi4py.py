@@ -21,6 +21,24 @@ class MPIDummy(object):
     def Iprobe(self, source=1, tag=55):
         pass
 
+    def irecv(self, buf=None, source=1, tag=55):
+        return RequestDummy()
+
+
+# Dummy class for a non-blocking receive that never completes
+class RequestDummy(object):
+    def test(self):
+        return False, None
+
+    def wait(self):
+        pass
+
+    def Cancel(self):
+        pass
+
+    def Wait(self):
+        pass
+
 
 # Global object representing no MPI:
 COMM_WORLD = MPIDummy()
@@ -0,0 +1,151 @@
+import sys
+import time
+
+
+class ProgressReporter(object):
+    """Report the progress of a chain at most once every ``interval``
+    seconds. The sampling loops only call ``update`` once every ``stride``
+    iterations, so that the clock is read rarely, and ``stride`` is adapted
+    to the speed of the chain so that the clock is checked about ten times
+    per interval. When progress reporting is switched off the sampler holds
+    no reporter and the loops do no work for it.
+
+    Each report gives the number of iterations done, the iterations per
+    second since the last report, the acceptance rate of the jumps and of
+    the temperature swaps and the latest estimate of the number of
+    effective samples. On a terminal the report is written over the
+    previous one, otherwise each report is written on a new line.
+
+    Parameters
+    ----------
+    interval: float, optional
+        minimum time in seconds between reports. Default 1
+    stream: file, optional
+        stream the reports are written to. Default sys.stderr
+    """
+    def __init__(self, interval=1.0, stream=None):
+        self.interval = interval
+        self.stream = stream
+        self.stride = 1
+        self.reports = 0
+        self.start(0)
+
+    def start(self, total, label="", naccepted=0, nchains=1):
+        """Start reporting the progress of a chain
+
+        Parameters
+        ----------
+        total: int
+            number of iterations the chain is run for
+        label: str, optional
+            label at the start of each report. Default ""
+        naccepted: int, optional
+            number of jumps accepted by the sampler before the chain
+            started. Default 0
+        nchains: int, optional
+            number of chains advanced on each iteration. Default 1
+        """
+        self.total = total
+        self.label = label
+        self.nchains = nchains
+        self._naccepted = naccepted
+        self._tstart = self._tlast = time.monotonic()
+        self._last = 0
+        self.rate = 0.0
+
+    def update(self, done, naccepted, swap_acceptance=None, neff=0, force=False):
+        """Write a report if at least ``interval`` seconds have passed since
+        the last one, and adapt ``stride``
+
+        Parameters
+        ----------
+        done: int
+            number of iterations done since the chain started
+        naccepted: int
+            number of jumps accepted by the sampler
+        swap_acceptance: float, optional
+            acceptance rate of the temperature swaps, or None if no swaps
+            have been proposed. Default None
+        neff: int, optional
+            latest estimate of the number of effective samples, or 0 if
+            there is none. Default 0
+        force: bool, optional
+            write the report even if the interval has not passed. Default
+            False
+
+        Returns
+        -------
+        reported: bool
+            True if a report was written
+        """
+        now = time.monotonic()
+        elapsed = now - self._tlast
+        if elapsed > 0:
+            self.rate = (done - self._last) / elapsed
+        # check the clock about ten times per interval
+        self.stride = max(1, int(self.rate * self.interval / 10))
+        if elapsed < self.interval and not force:
+            return False
+
+        self._tlast, self._last = now, done
+        self.reports += 1
+        line = self.format(
+            done,
+            (naccepted - self._naccepted) / max(1, done * self.nchains),
+            swap_acceptance,
+            neff,
+            now - self._tstart,
+        )
+        stream = self.stream or sys.stderr
+        if stream.isatty():
+            stream.write("\r\033[K" + line)
+        else:
+            stream.write(line + "\n")
+        stream.flush()
+        return True
+
+    def finish(self, done, naccepted, swap_acceptance=None, neff=0):
+        """Write the final report of a chain. See ``update`` for the
+        parameters
+        """
+        self.update(done, naccepted, swap_acceptance, neff, force=True)
+        stream = self.stream or sys.stderr
+        if stream.isatty():
+            stream.write("\n")
+            stream.flush()
+
+    def format(self, done, acceptance, swap_acceptance, neff, elapsed):
+        """Return the text of a report
+
+        Parameters
+        ----------
+        done: int
+            number of iterations done since the chain started
+        acceptance: float
+            acceptance rate of the jumps
+        swap_acceptance: float
+            acceptance rate of the temperature swaps, or None
+        neff: int
+            latest estimate of the number of effective samples, or 0
+        elapsed: float
+            time in seconds since the chain started
+        """
+        fields = [
+            "%d/%d (%.1f%%)" % (done, self.total, 100 * done / max(1, self.total)),
+            "%.0f it/s" % self.rate,
+            "acceptance %.3f" % acceptance,
+        ]
+        if swap_acceptance is not None:
+            fields.append("swap acceptance %.3f" % swap_acceptance)
+        if neff:
+            fields.append("ESS %d" % neff)
+        if self.rate > 0 and done < self.total:
+            fields.append(
+                "%.0f s elapsed, %.0f s left"
+                % (elapsed, (self.total - done) / self.rate)
+            )
+        else:
+            fields.append("%.0f s elapsed" % elapsed)
+        if self.label:
+            fields.insert(0, self.label)
+        return " | ".join(fields)
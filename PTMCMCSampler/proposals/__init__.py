@@ -6,3 +6,4 @@ from .normal import *
 from .uniform import *
 from .gradient import *
 from .base import available_jump_proposals, default_jump_proposals, __all__, __default__
+from .base import ProposalContext
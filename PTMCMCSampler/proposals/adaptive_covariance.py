@@ -8,6 +8,8 @@ from .base import JumpProposal
 class SingleComponentAdaptiveCovariance(JumpProposal):
     """Chooses one parameter at a time along covariance
     """
+    uses_context = True
+
     def __init__(self, kwargs=None):
         super(SingleComponentAdaptiveCovariance, self).__init__()
         self.name = "SingleComponentAdaptiveCovariance"
@@ -24,18 +26,18 @@ class SingleComponentAdaptiveCovariance(JumpProposal):
         ----------
         samples: list
             list of samples
-        kwargs: dict
-            dictionary of kwargs
+        kwargs: ProposalContext, dict
+            sampler context
         """
-        self.check_kwargs(kwargs, self.required_kwargs[self.name])
-        self.assign_kwargs(self.required_kwargs[self.name], kwargs)
+        kwargs = self.context(kwargs)
+        rng = kwargs.random
 
         new_samples = samples.copy()
 
-        jumpind = np.random.randint(0, len(self.groups))
-        ndim = len(self.groups[jumpind])
+        jumpind = int(rng.random() * len(kwargs.groups))
+        ndim = len(kwargs.groups[jumpind])
 
-        prob = np.random.rand()
+        prob = rng.random()
         if prob > 0.97:
             scale = 10
         elif prob > 0.9:
@@ -43,16 +45,16 @@ class SingleComponentAdaptiveCovariance(JumpProposal):
         else:
             scale = 1.0
 
-        if 1 / self.beta <= 100:
-            scale *= np.sqrt(1 / self.beta)
+        if 1 / kwargs.beta <= 100:
+            scale *= np.sqrt(1 / kwargs.beta)
 
-        ind = np.unique(np.random.randint(0, ndim, 1))
-        neff = len(ind)
+        ind = int(rng.random() * ndim)
+        neff = 1
         cd = 2.4 / np.sqrt(2 * neff) * scale
 
-        new_samples[self.groups[jumpind]] += (
-            np.random.randn() * cd * np.sqrt(self.S[jumpind][ind]) *
-            self.U[jumpind][:, ind].flatten()
+        # L = U * sqrt(S), so this moves along one eigenvector
+        new_samples[kwargs.groups[jumpind]] += (
+            rng.standard_normal() * cd * kwargs.L[jumpind][:, ind]
         )
 
         return new_samples, 0.0
@@ -61,6 +63,8 @@ class SingleComponentAdaptiveCovariance(JumpProposal):
 class AdaptiveCovariance(JumpProposal):
     """Moves in more than one parameter
     """
+    uses_context = True
+
     def __init__(self, kwargs):
         super(AdaptiveCovariance, self).__init__()
         self.name = "AdaptiveCovariance"
@@ -77,16 +81,18 @@ class AdaptiveCovariance(JumpProposal):
         ----------
         samples: list
             list of samples
+        kwargs: ProposalContext, dict
+            sampler context
         """
-        self.check_kwargs(kwargs, self.required_kwargs[self.name])
-        self.assign_kwargs(self.required_kwargs[self.name], kwargs)
+        kwargs = self.context(kwargs)
+        rng = kwargs.random
 
         new_samples = samples.copy()
 
-        jumpind = np.random.randint(0, len(self.groups))
-        ndim = len(self.groups[jumpind])
+        jumpind = int(rng.random() * len(kwargs.groups))
+        ndim = len(kwargs.groups[jumpind])
 
-        prob = np.random.rand()
+        prob = rng.random()
         if prob > 0.97:
             scale = 10
         elif prob > 0.9:
@@ -94,16 +100,14 @@ class AdaptiveCovariance(JumpProposal):
         else:
             scale = 1.0
 
-        if 1.0 / self.beta <= 100:
-            scale *= np.sqrt(1.0 / self.beta)
-
-        y = np.dot(self.U[jumpind].T, samples[self.groups[jumpind]])
+        if 1.0 / kwargs.beta <= 100:
+            scale *= np.sqrt(1.0 / kwargs.beta)
 
-        ind = np.arange(len(self.groups[jumpind]))
-        neff = len(ind)
+        neff = len(kwargs.groups[jumpind])
         cd = 2.4 / np.sqrt(2 * neff) * scale
 
-        y[ind] += np.random.randn(neff) * cd * np.sqrt(self.S[jumpind][ind])
-        new_samples[self.groups[jumpind]] = np.dot(self.U[jumpind], y)
+        # L = U * sqrt(S), so this is a draw from the covariance of the group
+        new_samples[kwargs.groups[jumpind]] += np.dot(
+            kwargs.L[jumpind], rng.standard_normal(neff) * cd)
 
         return new_samples, 0.0
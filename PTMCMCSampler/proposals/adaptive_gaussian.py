@@ -1,7 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import numpy as np
 from .base import JumpProposal
 
 
@@ -11,6 +10,8 @@ class SingleComponentAdaptiveGaussian(JumpProposal):
     distribution where sigma is an adaptive parameter that adjusts according
     to the current acceptance rate
     """
+    uses_context = True
+
     def __init__(self, kwargs=None):
         super(SingleComponentAdaptiveGaussian, self).__init__()
         self.name = "SingleComponentAdaptiveGaussian"
@@ -27,21 +28,23 @@ class SingleComponentAdaptiveGaussian(JumpProposal):
         ----------
         samples: list
             list of samples
+        kwargs: ProposalContext, dict
+            sampler context
         """
-        self.check_kwargs(kwargs, self.required_kwargs[self.name])
-        self.assign_kwargs(self.required_kwargs[self.name], kwargs)
+        kwargs = self.context(kwargs)
+        rng = kwargs.random
         new_samples = samples.copy()
 
         # choose parameter
-        jumpind = np.random.randint(0, len(new_samples))
-        acc_rate = self.naccepted / self.iter
+        jumpind = int(rng.random() * len(new_samples))
+        acc_rate = kwargs.naccepted / kwargs.iter
 
         scaling_factor = 1./100
 
-        if np.std(self.chain[:, jumpind]) == 0 :
+        if kwargs.chain_std[jumpind] == 0 :
             current_sigma = 1
         else :
-            current_sigma = np.std(self.chain[:, jumpind])
+            current_sigma = kwargs.chain_std[jumpind]
 
         scaled_samples = new_samples[jumpind] * scaling_factor * acc_rate
 
@@ -50,7 +53,7 @@ class SingleComponentAdaptiveGaussian(JumpProposal):
         else:
             sigma = current_sigma - scaled_samples
 
-        new_samples[jumpind] += np.random.normal(0, sigma)
+        new_samples[jumpind] += sigma * rng.standard_normal()
         return new_samples, 0.0
 
 
@@ -65,6 +68,8 @@ class MultiComponentAdaptiveGaussian(JumpProposal):
     kwargs: dict
         dictionary of kwargs
     """
+    uses_context = True
+
     def __init__(self, kwargs=None):
         super(MultiComponentAdaptiveGaussian, self).__init__()
         self.name = "MultiComponentAdaptiveGaussian"
@@ -81,28 +86,30 @@ class MultiComponentAdaptiveGaussian(JumpProposal):
         ----------
         samples: list
             list of samples
+        kwargs: ProposalContext, dict
+            sampler context
         """
-        self.check_kwargs(kwargs, self.required_kwargs[self.name])
-        self.assign_kwargs(self.required_kwargs[self.name], kwargs)
+        kwargs = self.context(kwargs)
+        rng = kwargs.random
 
         new_samples = samples.copy()
-        n_jump_ind = np.random.randint(0, len(new_samples))
-        jumpind = np.random.randint(0, len(new_samples), n_jump_ind)
-        acc_rate = self.naccepted / self.iter
+        n_jump_ind = int(rng.random() * len(new_samples))
+        jumpind = (rng.random(n_jump_ind) * len(new_samples)).astype(int)
+        acc_rate = kwargs.naccepted / kwargs.iter
 
         scaling_factor = 1.0 / 100
         for ind in jumpind:
-            if np.std(self.chain[:, ind]) == 0:
+            if kwargs.chain_std[ind] == 0:
                 current_sigma = 1
             else:
-                current_sigma = np.std(self.chain[:, ind])
+                current_sigma = kwargs.chain_std[ind]
 
             scaled_samples = new_samples[ind] * scaling_factor * acc_rate
             if acc_rate > 0.234:
                 sigma = current_sigma + scaled_samples
             else:
                 sigma = current_sigma - scaled_samples
-            new_samples[ind] += np.random.normal(0, abs(sigma))
+            new_samples[ind] += abs(sigma) * rng.standard_normal()
         return new_samples, 0.0
 
 
@@ -112,6 +119,8 @@ class AdaptiveGaussian(JumpProposal):
     an adaptive parameter that adjusts according to the current acceptance
     rate
     """
+    uses_context = True
+
     def __init__(self, kwargs=None):
         super(AdaptiveGaussian, self).__init__()
         self.name = "AdaptiveGaussian"
@@ -128,27 +137,27 @@ class AdaptiveGaussian(JumpProposal):
         ----------
         samples: list
             list of samples
-        kwargs: dict
-            dictionary of kwargs
+        kwargs: ProposalContext, dict
+            sampler context
         """
-        self.check_kwargs(kwargs, self.required_kwargs[self.name])
-        self.assign_kwargs(self.required_kwargs[self.name], kwargs)
+        kwargs = self.context(kwargs)
+        rng = kwargs.random
 
         new_samples = samples.copy()
 
-        acc_rate = self.naccepted / self.iter
+        acc_rate = kwargs.naccepted / kwargs.iter
         scaling_factor = 1.0 / 100
 
         for ind in range(len(new_samples)):
-            if np.std(self.chain[:, ind]) == 0:
+            if kwargs.chain_std[ind] == 0:
                 current_sigma = 1
             else:
-                current_sigma = np.std(self.chain[:, ind])
+                current_sigma = kwargs.chain_std[ind]
 
             scaled_samples = new_samples[ind] * scaling_factor * acc_rate
             if acc_rate > 0.234:
                 sigma = current_sigma + scaled_samples
             else:
                 sigma = current_sigma - scaled_samples
-            new_samples[ind] += np.random.normal(0, sigma)
+            new_samples[ind] += sigma * rng.standard_normal()
         return new_samples, 0.0
@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+from collections.abc import Mapping
+import numpy as np
+
 __all__ = [
     "SingleComponentAdaptiveCovariance", "AdaptiveCovariance",
     "SingleComponentAdaptiveGaussian", "MultiComponentAdaptiveGaussian",
@@ -38,21 +41,95 @@ class ProposalError(Exception):
         super(ProposalError, self).__init__(message)
 
 
+class ProposalContext(object):
+    """State of the sampler that is read by the jump proposals. The sampler
+    keeps one context for each chain and updates its attributes in place
+    every iteration rather than building a new dictionary of kwargs. The
+    attributes can also be read with ``context["iter"]``, ``get``, ``items``
+    and the other methods of a read-only mapping, so jump functions written
+    for a dictionary of kwargs keep working. ``L`` holds the
+    eigenvectors of the covariance of each group scaled by the square root
+    of the eigenvalues, ``U * sqrt(S)``. ``rng`` holds the random numbers of
+    the chain, and the jumps draw from ``random``, which falls back to the
+    global numpy random state when the context has no random stream
+
+    Parameters
+    ----------
+    **kwargs: dict
+        initial value of the attributes. Attributes which are not given are
+        set to None, except ``L`` which is computed from ``U`` and ``S`` if
+        these are given
+    """
+    __slots__ = (
+        "iter", "beta", "groups", "U", "S", "L", "naccepted", "chain",
+        "chain_std", "DEBuffer", "rng")
+
+    def __init__(self, **kwargs):
+        for key in self.__slots__:
+            setattr(self, key, kwargs.get(key))
+        if self.L is None and self.U is not None and self.S is not None:
+            self.L = [U * np.sqrt(S) for U, S in zip(self.U, self.S)]
+
+    @property
+    def random(self):
+        """Return the random stream of the chain, or ``np.random`` if there
+        is none
+        """
+        return np.random if self.rng is None else self.rng
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def keys(self):
+        return list(self.__slots__)
+
+    def values(self):
+        return [getattr(self, key) for key in self.__slots__]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.__slots__]
+
+    def get(self, key, default=None):
+        if key not in self.__slots__:
+            return default
+        return getattr(self, key)
+
+
+# a ProposalContext is registered rather than derived from Mapping so that
+# the isinstance checks made on every jump stay cheap
+Mapping.register(ProposalContext)
+
+
 class JumpProposal(object):
     """Base class for jump proposals
 
     Parameters
     ----------
     """
+    # whether the required kwargs are read from the sampler context on every
+    # jump rather than given when the class is initialized
+    uses_context = False
+
     def __init__(self, iter=None):
         self.iter = iter
         self.name = "JumpProposal"
         self.required_kwargs = {
             "SingleComponentAdaptiveCovariance": ["groups", "beta", "U", "S"],
             "AdaptiveCovariance": ["groups", "beta", "U", "S"],
-            "SingleComponentAdaptiveGaussian": ["naccepted", "iter", "chain"],
-            "MultiComponentAdaptiveGaussian": ["naccepted", "iter", "chain"],
-            "AdaptiveGaussian": ["naccepted", "iter", "chain"],
+            "SingleComponentAdaptiveGaussian": ["naccepted", "iter", "chain_std"],
+            "MultiComponentAdaptiveGaussian": ["naccepted", "iter", "chain_std"],
+            "AdaptiveGaussian": ["naccepted", "iter", "chain_std"],
             "DifferentialEvolution": ["beta", "groups", "DEBuffer"],
             "Normal": ["step_size"],
             "Uniform": ["pmin", "pmax"],
@@ -92,6 +169,40 @@ class JumpProposal(object):
                         self.name, " and ".join(keys),
                         " and ".join(kwargs.keys())))
 
+    def bind(self, context):
+        """Check that the sampler context provides every argument needed by
+        the jump proposal. This is called once when the proposal is added to
+        the sampler, so the context is not checked on every jump
+
+        Parameters
+        ----------
+        context: ProposalContext
+            the sampler context passed to each jump
+        """
+        if self.uses_context:
+            self.check_kwargs(context, self.required_kwargs[self.name])
+
+    def context(self, kwargs):
+        """Return the sampler context for a jump. A ProposalContext has
+        already been checked by ``bind`` and is returned as it is, while a
+        dictionary of kwargs is checked, if the proposal reads the context,
+        and converted
+
+        Parameters
+        ----------
+        kwargs: ProposalContext, dict
+            sampler context or dictionary of kwargs. The std of each parameter
+        is computed from ``chain`` if a dictionary has no ``chain_std``
+        """
+        if isinstance(kwargs, ProposalContext):
+            return kwargs
+        if kwargs and "chain" in kwargs and "chain_std" not in kwargs:
+            # kwargs written before chain_std was added give the whole chain
+            kwargs = dict(kwargs, chain_std=np.std(kwargs["chain"], axis=0))
+        if self.uses_context:
+            self.check_kwargs(kwargs, self.required_kwargs[self.name])
+        return ProposalContext(**(kwargs or {}))
+
     def assign_kwargs(self, keys, kwargs):
         """Assign the kwargs to the class
 
@@ -15,6 +15,8 @@ class DifferentialEvolution(JumpProposal):
     kwargs: dict
         dictionary of kwargs
     """
+    uses_context = True
+
     def __init__(self, kwargs=None):
         super(DifferentialEvolution, self).__init__()
         self.name = "DifferentialEvolution"
@@ -31,31 +33,34 @@ class DifferentialEvolution(JumpProposal):
         ----------
         samples: list
             list of samples
+        kwargs: ProposalContext, dict
+            sampler context
         """
-        self.check_kwargs(kwargs, self.required_kwargs[self.name])
-        self.assign_kwargs(self.required_kwargs[self.name], kwargs)
+        kwargs = self.context(kwargs)
+        rng = kwargs.random
 
         new_samples = samples.copy()
-        jumpind = np.random.randint(0, len(self.groups))
-        ndim = len(self.groups[jumpind])
+        jumpind = int(rng.random() * len(kwargs.groups))
+        group = kwargs.groups[jumpind]
+        ndim = len(group)
 
-        bufsize = np.alen(self.DEBuffer)
+        bufsize = len(kwargs.DEBuffer)
+        if bufsize < 2:
+            return new_samples, 0.0
 
-        mm = np.random.randint(0, bufsize)
-        nn = np.random.randint(0, bufsize)
-        while mm == nn:
-            nn = np.random.randint(0, bufsize)
+        # draw two different samples from the buffer
+        mm = int(rng.random() * bufsize)
+        nn = int(rng.random() * (bufsize - 1))
+        if nn >= mm:
+            nn += 1
 
-        prob = np.random.rand()
+        prob = rng.random()
         if prob > 0.5:
             scale = 1.0
         else:
-            rand = np.random.rand()
-            scale = rand * 2.4 / np.sqrt(2 * ndim) * np.sqrt(1 / self.beta)
-
-        for ii in range(ndim):
-            first_term = self.DEBuffer[mm, self.groups[jumpind][ii]]
-            second_term = self.DEBuffer[nn, self.groups[jumpind][ii]]
-            sigma = first_term - second_term
-            new_samples[self.groups[jumpind][ii]] += scale * sigma
+            rand = rng.random()
+            scale = rand * 2.4 / np.sqrt(2 * ndim) * np.sqrt(1 / kwargs.beta)
+
+        new_samples[group] += scale * (
+            kwargs.DEBuffer[mm, group] - kwargs.DEBuffer[nn, group])
         return new_samples, 0.0
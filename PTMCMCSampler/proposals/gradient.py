@@ -99,10 +99,15 @@ class Gradient(JumpProposal):
         fv, fg = self.func_grad(x)
         return fv, np.dot(self.cov_cf, fg)
 
-    def draw_momenta(self):
+    def draw_momenta(self, rng=np.random):
         """Draw new momentum variables
+
+        Parameters
+        ----------
+        rng: RandomStream, optional
+            random numbers to draw from. Default np.random
         """
-        return np.random.randn(len(self.mm_inv))
+        return rng.standard_normal(len(self.mm_inv))
 
     def loghamiltonian(self, logl, r):
         """Return the value of the Hamiltonian
@@ -180,14 +185,15 @@ class MALA(Gradient):
         if len(np.shape(samples)) > 1:
             raise ValueError('samples is expected to be a 1-D array')
 
+        rng = self.context(kwargs).random
         new_samples0 = self.forward(samples)
         logp, grad0 = self.func_grad_white(new_samples0)
 
         # Choose an eigenvector to jump in, and the size
-        i = np.random.randint(0, self.ndim)
+        i = int(rng.random() * self.ndim)
         vec = self._u[i,:]
         val = self._s[i]
-        dist = np.random.randn()
+        dist = rng.standard_normal()
 
         # Do the leapfrog
         mq0 = new_samples0 + 0.5 * vec * self.cd**2 * np.dot(vec, grad0)/2 / val
@@ -225,14 +231,15 @@ class HMC(Gradient):
         if len(np.shape(samples)) > 1:
             raise ValueError('samples is expected to be a 1-D array')
 
+        rng = self.context(kwargs).random
         new_samples0 = self.forward(samples)
         qxy = 0
         logp0, grad0 = self.func_grad_white(new_samples0)
 
-        p0 = self.draw_momenta()
+        p0 = self.draw_momenta(rng)
         joint0 = self.loghamiltonian(logp0, p0)
 
-        nsteps = np.random.randint(self.nminsteps, self.nmaxsteps)
+        nsteps = self.nminsteps + int(rng.random() * (self.nmaxsteps - self.nminsteps))
         p, new_samples, grad = np.copy(p0), np.copy(new_samples0), np.copy(grad0)
 
         for ii in range(nsteps):
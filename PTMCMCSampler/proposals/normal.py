@@ -1,7 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import numpy as np
 from .base import JumpProposal
 
 
@@ -30,6 +29,9 @@ class Normal(JumpProposal):
         ----------
         samples: list
             list of samples
+        kwargs: ProposalContext, dict
+            sampler context
         """
-        new_samples = [np.random.normal(i, self.step_size) for i in samples]
+        rng = self.context(kwargs).random
+        new_samples = [i + self.step_size * rng.standard_normal() for i in samples]
         return new_samples, 0.0
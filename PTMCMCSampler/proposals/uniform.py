@@ -1,7 +1,6 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import numpy as np
 from .base import JumpProposal
 
 
@@ -30,6 +29,9 @@ class Uniform(JumpProposal):
         ----------
         samples: list
             list of samples
+        kwargs: ProposalContext, dict
+            sampler context
         """
-        new_samples = np.random.uniform(self.pmin, self.pmax, len(samples))
+        rng = self.context(kwargs).random
+        new_samples = self.pmin + (self.pmax - self.pmin) * rng.random(len(samples))
         return new_samples, 0.0
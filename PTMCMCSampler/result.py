@@ -1,5 +1,6 @@
 import numpy as np
 from . import plots
+from . import chainfile
 
 try:
     import arviz as az
@@ -13,8 +14,16 @@ class Result(object):
 
     Parameters
     ----------
-    initial_samples: numpy.array
-        array of samples that have not been burnt in
+    initial_samples: numpy.array/str
+        array of samples that have not been burnt in, or the path to a .npy
+        file containing them. Files are memory-mapped when the samples are
+        first needed
+    initial_likelihood_vals: numpy.array/str, optional
+        array of likelihood values for each sample, or the path to a .npy file
+        containing them
+    initial_prior_vals: numpy.array/str, optional
+        array of posterior values for each sample, or the path to a .npy file
+        containing them
     """
 
     def __init__(
@@ -26,13 +35,81 @@ class Result(object):
         num_chains=2,
         jump_proposal_name=None,
     ):
-        self.initial_samples = initial_samples
-        self.inital_likelihood_vals = initial_likelihood_vals
-        self.initial_prior_vals = initial_prior_vals
+        self._initial_samples = initial_samples
+        self._inital_likelihood_vals = initial_likelihood_vals
+        self._initial_prior_vals = initial_prior_vals
         self.burnin = burnin
         self.jump_proposal_name = jump_proposal_name
         self.num_chains = num_chains
 
+    @classmethod
+    def from_chain_files(cls, fnames, burnin=0, jump_proposal_name=None):
+        """Read the samples from the chain files written by the sampler.
+        Both text and binary chain files are supported. When more than one
+        file is given each is treated as a separate chain, and all chains are
+        truncated to the length of the shortest
+
+        Parameters
+        ----------
+        fnames: str/list
+            path to a chain file, or a list of paths
+        burnin: int, optional
+            number of samples to discard from burnin. Default 0
+        jump_proposal_name: str, optional
+            name of the jump proposal used to generate the samples
+        """
+        if isinstance(fnames, str):
+            fnames = [fnames]
+        chains = []
+        for fname in fnames:
+            if chainfile.is_chain_file(fname):
+                chains.append(chainfile.load(fname))
+            else:
+                chains.append(np.loadtxt(fname, ndmin=2))
+        length = min(len(chain) for chain in chains)
+        chains = np.array([chain[:length] for chain in chains])
+        return cls(
+            chains[:, :, :-4],
+            initial_likelihood_vals=chains[:, :, -3],
+            initial_prior_vals=chains[:, :, -4],
+            burnin=burnin,
+            num_chains=len(fnames),
+            jump_proposal_name=jump_proposal_name,
+        )
+
+    def _load(self, attr):
+        """Return an array, memory-mapping it from file if it has only been
+        given as a path
+
+        Parameters
+        ----------
+        attr: str
+            name of the attribute storing the array
+        """
+        value = getattr(self, attr)
+        if isinstance(value, str):
+            value = np.load(value, mmap_mode="r")
+            setattr(self, attr, value)
+        return value
+
+    @property
+    def initial_samples(self):
+        """Return all samples, including those during burnin
+        """
+        return self._load("_initial_samples")
+
+    @property
+    def inital_likelihood_vals(self):
+        """Return the likelihood values of all samples
+        """
+        return self._load("_inital_likelihood_vals")
+
+    @property
+    def initial_prior_vals(self):
+        """Return the posterior values of all samples
+        """
+        return self._load("_initial_prior_vals")
+
     def save(self, outfile=None, outdir="./"):
         """Save the samples to file
 
@@ -0,0 +1,108 @@
+import numpy as np
+
+
+class RandomStream(object):
+    """Random numbers of a single chain, drawn from its own
+    ``np.random.Generator``. The scalar uniforms, log-uniforms and standard
+    normals used on every iteration are drawn in blocks of ``blocksize`` and
+    handed out one at a time, which avoids calling the generator for every
+    number. The method names match those of ``np.random`` so either can be
+    used by the jump proposals. Streams for other chains or processes are
+    created with ``spawn``, so they are statistically independent and
+    reproducible from a single seed
+
+    Parameters
+    ----------
+    seed: int, np.random.SeedSequence, optional
+        seed of the stream. Default None, in which case fresh entropy is
+        taken from the operating system
+    blocksize: int, optional
+        number of each kind of random number drawn at once. Default 1024
+    """
+    def __init__(self, seed=None, blocksize=1024):
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_sequence = seed
+        else:
+            self.seed_sequence = np.random.SeedSequence(seed)
+        self.generator = np.random.Generator(np.random.PCG64(self.seed_sequence))
+        self.blocksize = blocksize
+        self._uniform = []
+        self._log_uniform = []
+        self._normal = []
+
+    def spawn(self, n):
+        """Return independent streams, for example for other chains
+
+        Parameters
+        ----------
+        n: int
+            number of streams to return
+        """
+        return [
+            RandomStream(seed, self.blocksize)
+            for seed in self.seed_sequence.spawn(n)
+        ]
+
+    def random(self, size=None):
+        """Return uniform random numbers on [0, 1)
+
+        Parameters
+        ----------
+        size: int, optional
+            number of random numbers. Default None, which returns a single
+            float taken from the current block
+        """
+        if size is not None:
+            return self.generator.random(size)
+        if not self._uniform:
+            self._uniform = self.generator.random(self.blocksize).tolist()
+        return self._uniform.pop()
+
+    def log_random(self):
+        """Return the log of a uniform random number on [0, 1), as used in
+        the Hastings and temperature swap acceptance tests
+        """
+        if not self._log_uniform:
+            self._log_uniform = np.log(self.generator.random(self.blocksize)).tolist()
+        return self._log_uniform.pop()
+
+    def standard_normal(self, size=None):
+        """Return random numbers from a standard normal distribution
+
+        Parameters
+        ----------
+        size: int, optional
+            number of random numbers. Default None, which returns a single
+            float taken from the current block
+        """
+        if size is not None:
+            return self.generator.standard_normal(size)
+        if not self._normal:
+            self._normal = self.generator.standard_normal(self.blocksize).tolist()
+        return self._normal.pop()
+
+    def get_state(self):
+        """Return the state of the generator and the random numbers that have
+        been drawn but not used, for example to save in a checkpoint
+        """
+        return {
+            "seed_sequence": self.seed_sequence,
+            "bit_generator": self.generator.bit_generator.state,
+            "uniform": list(self._uniform),
+            "log_uniform": list(self._log_uniform),
+            "normal": list(self._normal),
+        }
+
+    def set_state(self, state):
+        """Restore the stream from the output of ``get_state``
+
+        Parameters
+        ----------
+        state: dict
+            dictionary returned by ``get_state``
+        """
+        self.seed_sequence = state["seed_sequence"]
+        self.generator.bit_generator.state = state["bit_generator"]
+        self._uniform = list(state["uniform"])
+        self._log_uniform = list(state["log_uniform"])
+        self._normal = list(state["normal"])
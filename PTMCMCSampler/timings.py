@@ -0,0 +1,107 @@
+import time
+from contextlib import contextmanager
+
+
+class Timings(object):
+    """Wall clock time spent in each phase of the sampling loop of one
+    process, measured with ``time.perf_counter``. The phases recorded by
+    ``PTSampler`` are
+
+    - ``likelihood`` and ``prior``: evaluations of logl and logp
+    - ``proposal:<name>``: drawing a jump with the proposal ``<name>``
+    - ``covariance`` and ``DE``: adapting the covariance matrix and
+      refreshing the DE buffer
+    - ``swap``: in-process temperature swaps
+    - ``swap_wait``: blocking receives of the MPI temperature swaps, which
+      is time that the process spends waiting for the next hotter chain
+    - ``write`` and ``checkpoint``: queueing the chain files and checkpoints
+      to be written
+
+    Parameters
+    ----------
+    rank: int, optional
+        MPI rank of the process the timings are recorded for. Default 0
+    """
+    header = "rank,phase,calls,time,mean_time\n"
+
+    def __init__(self, rank=0):
+        self.rank = rank
+        self.calls = {}
+        self.time = {}
+
+    def add(self, phase, elapsed, calls=1):
+        """Add time spent in a phase
+
+        Parameters
+        ----------
+        phase: str
+            name of the phase
+        elapsed: float
+            time in seconds spent in the phase
+        calls: int, optional
+            number of times the phase was entered. Default 1
+        """
+        self.calls[phase] = self.calls.get(phase, 0) + calls
+        self.time[phase] = self.time.get(phase, 0.0) + elapsed
+
+    @contextmanager
+    def timer(self, phase):
+        """Context manager which adds the time spent in its block to a phase
+
+        Parameters
+        ----------
+        phase: str
+            name of the phase
+        """
+        tstart = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - tstart)
+
+    def merge(self, other):
+        """Add the timings of another Timings object, for example from a
+        chain run in another process
+
+        Parameters
+        ----------
+        other: Timings
+            timings to add to these
+        """
+        for phase in other.time:
+            self.add(phase, other.time[phase], other.calls[phase])
+
+    @property
+    def total(self):
+        """Return the total time recorded over every phase
+        """
+        return sum(self.time.values())
+
+    def to_csv(self):
+        """Return the timings as lines of a csv file with columns given by
+        ``Timings.header``, the phases taking the most time first
+        """
+        return "".join(
+            "%d,%s,%d,%.6g,%.6g\n"
+            % (
+                self.rank,
+                phase,
+                self.calls[phase],
+                self.time[phase],
+                self.time[phase] / max(1, self.calls[phase]),
+            )
+            for phase in sorted(self.time, key=self.time.get, reverse=True)
+        )
+
+    def summary(self):
+        """Return a table of the time spent in each phase and its fraction
+        of the total
+        """
+        total = max(self.total, 1e-300)
+        lines = ["%-44s %10s %12s %8s" % ("phase", "calls", "time [s]", "frac")]
+        for phase in sorted(self.time, key=self.time.get, reverse=True):
+            lines.append(
+                "%-44s %10d %12.4g %8.3f"
+                % (phase, self.calls[phase], self.time[phase], self.time[phase] / total)
+            )
+        return "\n".join(lines)
@@ -0,0 +1,146 @@
+"""Write output files in a background thread so that the sampler does not
+wait for the disk
+"""
+import os
+import threading
+import queue
+import numpy as np
+
+
+class AsyncWriter(object):
+    """Run file writes in a background thread. Writes are passed to the
+    thread through a bounded queue, so if the disk can not keep up the
+    sampler blocks rather than using more and more memory. Anything passed
+    to ``submit`` must not be modified afterwards, so arrays should be copies.
+    A writer can be shared by several threads, for example the cold chains of
+    a thread pool, and there is only ever one background thread
+
+    Parameters
+    ----------
+    maxsize: int
+        maximum number of writes waiting in the queue. Default 16
+    """
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self.queue = queue.Queue(maxsize)
+        self.thread = None
+        self.error = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # the queue and thread can not be pickled, so a copy sent to another
+        # process starts its own
+        return {"maxsize": self.maxsize}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def submit(self, func, *args):
+        """Call ``func(*args)`` in the background thread, starting the thread
+        if it is not running
+
+        Parameters
+        ----------
+        func: function
+            function which writes to file
+        *args: tuple
+            arguments passed to func
+        """
+        self._raise()
+        if self.thread is None:
+            with self._lock:
+                # another thread may have started it while we waited
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, daemon=True)
+                    self.thread.start()
+        self.queue.put((func, args))
+
+    def flush(self):
+        """Block until every submitted write has finished
+        """
+        if self.thread is not None:
+            self.queue.join()
+        self._raise()
+
+    def close(self):
+        """Finish every submitted write and stop the background thread. An
+        exception raised by any of the writes is raised here
+        """
+        with self._lock:
+            if self.thread is not None:
+                self.queue.put(None)
+                self.thread.join()
+                self.thread = None
+        self._raise()
+
+    def _run(self):
+        while True:
+            task = self.queue.get()
+            try:
+                if task is None:
+                    return
+                func, args = task
+                # keep draining the queue after an error so the sampler never
+                # blocks on a full queue
+                if self.error is None:
+                    func(*args)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.queue.task_done()
+
+    def _raise(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+
+def write_text(fname, text, mode="w"):
+    """Write a string to file
+
+    Parameters
+    ----------
+    fname: str
+        path to the file
+    text: str
+        string to write
+    mode: str
+        mode to open the file with. Default "w"
+    """
+    with open(fname, mode) as f:
+        f.write(text)
+
+
+def write_atomic(fname, data):
+    """Write bytes to a temporary file and then move it into place, so that
+    the file is never left partially written if the process is killed
+
+    Parameters
+    ----------
+    fname: str
+        path to the file
+    data: bytes
+        data to write
+    """
+    tmp = fname + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, fname)
+
+
+def append_text(fname, records, fmt):
+    """Append records to a tab separated text file
+
+    Parameters
+    ----------
+    fname: str
+        path to the file
+    records: np.ndarray
+        2d array of records with one row per sample
+    fmt: list
+        format of each column
+    """
+    with open(fname, "ab") as f:
+        np.savetxt(f, records, fmt=fmt, delimiter="\t")
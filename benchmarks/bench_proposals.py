@@ -0,0 +1,53 @@
+"""Time taken to draw a jump with each jump proposal in proposals/, given
+the context that the sampler passes to the jumps
+"""
+import numpy as np
+from PTMCMCSampler import proposals as prop
+from PTMCMCSampler.rng import RandomStream
+from .likelihoods import Gaussian
+
+NJUMPS = 1000
+
+
+class Proposals(object):
+    """Each jump proposal versus the number of parameters
+    """
+    params = (
+        [name for name in prop.__all__ if hasattr(prop, name)],
+        [2, 10, 50],
+    )
+    param_names = ["proposal", "ndim"]
+
+    def setup(self, proposal, ndim):
+        like = Gaussian(ndim)
+        rng = np.random.default_rng(1)
+        chain = rng.normal(size=(1000, ndim))
+        self.context = prop.ProposalContext(
+            iter=1000,
+            beta=1.0,
+            groups=[np.arange(ndim)],
+            U=[np.eye(ndim)],
+            S=[np.full(ndim, 0.01)],
+            naccepted=300,
+            chain_std=np.std(chain, axis=0),
+            DEBuffer=chain,
+            rng=RandomStream(1),
+        )
+        kwargs = {
+            "step_size": 0.1,
+            "pmin": -10.0,
+            "pmax": 10.0,
+            "loglik_grad": like.lnlikefn_grad,
+            "logprior_grad": like.lnpriorfn_grad,
+            "mm_inv": np.eye(ndim) * 0.1 ** 2,
+            "nburn": 100,
+            "nminsteps": 2,
+            "nmaxsteps": 5,
+        }
+        self.jump = getattr(prop, proposal)(kwargs)
+        self.jump.bind(self.context)
+        self.x = like.p0()
+
+    def time_jump(self, proposal, ndim):
+        for _ in range(NJUMPS):
+            self.jump(self.x, self.context)
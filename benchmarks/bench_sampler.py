@@ -0,0 +1,191 @@
+"""Throughput of PTSampler.sample and of the functions on its hot path. The
+iterations per second of a run are tracked alongside its time so that
+results at different sizes can be compared directly
+"""
+import shutil
+import tempfile
+import time
+import numpy as np
+from PTMCMCSampler.PTMCMCSampler import PTSampler
+from PTMCMCSampler.result import Result
+from .likelihoods import LIKELIHOODS
+
+NITER = 2000
+
+WEIGHTS = {
+    "AdaptiveCovariance": 5,
+    "SingleComponentAdaptiveCovariance": 5,
+    "DifferentialEvolution": 5,
+}
+
+
+def make_sampler(outdir, ndim, likelihood="gaussian", cost=0, **kwargs):
+    """Return a sampler of one of the synthetic likelihoods
+
+    Parameters
+    ----------
+    outdir: str
+        output directory of the sampler
+    ndim: int
+        number of parameters
+    likelihood: str, optional
+        name of the likelihood in ``LIKELIHOODS``. Default "gaussian"
+    cost: int, optional
+        extra cost of each likelihood evaluation. Default 0
+    **kwargs: dict
+        other arguments passed to PTSampler
+    """
+    like = LIKELIHOODS[likelihood](ndim, cost=cost)
+    sampler = PTSampler(
+        ndim, like.lnlikefn, like.lnpriorfn, np.eye(ndim) * 0.1 ** 2,
+        outDir=outdir, verbose=False, **kwargs)
+    return sampler, like.p0()
+
+
+class _Run(object):
+    """Base class of the benchmarks that run the sampler in a temporary
+    directory
+    """
+    timeout = 300
+
+    def setup(self, *params):
+        self.outdir = tempfile.mkdtemp()
+
+    def teardown(self, *params):
+        shutil.rmtree(self.outdir)
+
+    def _iterations_per_second(self, run, *params):
+        start = time.perf_counter()
+        niter = run(*params)
+        return niter / (time.perf_counter() - start)
+
+
+class Sample(_Run):
+    """Single cold chain versus the number of parameters, the likelihood and
+    its cost
+    """
+    params = ([2, 10, 50], ["gaussian", "rosenbrock"], [0, 20])
+    param_names = ["ndim", "likelihood", "cost"]
+
+    def run(self, ndim, likelihood, cost):
+        sampler, p0 = make_sampler(self.outdir, ndim, likelihood, cost)
+        sampler.sample(
+            p0, NITER, burn=500, covUpdate=500, n_cold_chains=1, seed=1,
+            weights=WEIGHTS)
+        return NITER
+
+    def time_sample(self, ndim, likelihood, cost):
+        self.run(ndim, likelihood, cost)
+
+    def track_iterations_per_second(self, ndim, likelihood, cost):
+        return self._iterations_per_second(self.run, ndim, likelihood, cost)
+
+    track_iterations_per_second.unit = "iterations/s"
+
+
+class SampleColdChains(_Run):
+    """Number of cold chains, sampled one after another or in a pool
+    """
+    params = ([1, 2, 4], [None, "thread", "process"])
+    param_names = ["n_cold_chains", "parallel_chains"]
+
+    def run(self, n_cold_chains, parallel_chains):
+        sampler, p0 = make_sampler(self.outdir, 10)
+        sampler.sample(
+            p0, NITER, burn=500, covUpdate=500, n_cold_chains=n_cold_chains,
+            parallel_chains=parallel_chains, seed=1, weights=WEIGHTS)
+        return NITER * n_cold_chains
+
+    def time_sample(self, n_cold_chains, parallel_chains):
+        self.run(n_cold_chains, parallel_chains)
+
+    def track_iterations_per_second(self, n_cold_chains, parallel_chains):
+        return self._iterations_per_second(
+            self.run, n_cold_chains, parallel_chains)
+
+    track_iterations_per_second.unit = "iterations/s"
+
+
+class SampleThin(_Run):
+    """Thinning of the chains, with the chains written to file
+    """
+    params = ([1, 10, 100], ["text", "binary"])
+    param_names = ["thin", "chain_format"]
+
+    def run(self, thin, chain_format):
+        sampler, p0 = make_sampler(self.outdir, 10, chain_format=chain_format)
+        sampler.sample(
+            p0, NITER, burn=500, covUpdate=500, thin=thin, isave=500,
+            n_cold_chains=1, write_cold_chains=True, seed=1, weights=WEIGHTS)
+        sampler._writer.flush()
+        return NITER
+
+    def time_sample(self, thin, chain_format):
+        self.run(thin, chain_format)
+
+
+class UpdateRecursive(_Run):
+    """Adapting the covariance matrix from a block of samples
+    """
+    params = ([2, 10, 50, 200], ["dense", "block"])
+    param_names = ["ndim", "covariance"]
+
+    def setup(self, ndim, covariance):
+        super(UpdateRecursive, self).setup()
+        groups = [np.arange(ndim)]
+        if covariance == "block":
+            groups = np.array_split(np.arange(ndim), max(1, ndim // 10))
+        self.sampler, _ = make_sampler(
+            self.outdir, ndim, groups=groups, covariance=covariance)
+        self.sampler.initialize(
+            1000, burn=1000, covUpdate=1000, n_cold_chains=1, seed=1)
+        for iter in range(1001):
+            self.sampler._AMbuffer.append(0, iter, np.random.normal(size=ndim))
+
+    def time_update_recursive(self, ndim, covariance):
+        self.sampler._updateRecursive(1000, 1000, 0)
+
+
+class WriteToFile(_Run):
+    """Writing a block of isave samples to the chain file
+    """
+    params = ([2, 50], ["text", "binary"])
+    param_names = ["ndim", "chain_format"]
+
+    def setup(self, ndim, chain_format):
+        super(WriteToFile, self).setup()
+        self.sampler, _ = make_sampler(self.outdir, ndim, chain_format=chain_format)
+        self.sampler.initialize(
+            10000, isave=1000, n_cold_chains=1, write_cold_chains=True, seed=1)
+        self.sampler._chain[:] = np.random.normal(size=self.sampler._chain.shape)
+
+    def time_write_to_file(self, ndim, chain_format):
+        self.sampler._writeToFile(1000, 0, start=0)
+        self.sampler._writer.flush()
+
+
+class ResultPostProcessing(_Run):
+    """Reading the chain files back and discarding the burn in
+    """
+    params = (["text", "binary"],)
+    param_names = ["chain_format"]
+
+    def setup(self, chain_format):
+        super(ResultPostProcessing, self).setup()
+        sampler, p0 = make_sampler(self.outdir, 10, chain_format=chain_format)
+        sampler.sample(
+            p0, 5000, burn=500, covUpdate=500, isave=1000, n_cold_chains=2,
+            write_cold_chains=True, seed=1, weights=WEIGHTS)
+        sampler._writer.flush()
+        ext = ".txt" if chain_format == "text" else ".bin"
+        self.fnames = [
+            "{0}/chain_1_{1}{2}".format(self.outdir, ii, ext) for ii in range(2)
+        ]
+
+    def time_from_chain_files(self, chain_format):
+        Result.from_chain_files(self.fnames)
+
+    def time_samples(self, chain_format):
+        result = Result.from_chain_files(self.fnames, burnin=1000)
+        result.samples
+        result.likelihood_values
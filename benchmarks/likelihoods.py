@@ -0,0 +1,82 @@
+"""Synthetic likelihoods used by the benchmarks. The cost of an evaluation
+can be increased with ``cost``, the number of extra ndim x ndim
+matrix-vector products done on each call, to mimic likelihoods that are
+more expensive than the sampler itself
+"""
+import numpy as np
+
+
+class _Likelihood(object):
+    """Base class of the synthetic likelihoods
+
+    Parameters
+    ----------
+    ndim: int
+        number of parameters
+    cost: int, optional
+        number of extra matrix-vector products done on each evaluation.
+        Default 0
+    bound: float, optional
+        the prior is uniform on [-bound, bound] in every parameter. Default 10
+    """
+    def __init__(self, ndim, cost=0, bound=10.0):
+        self.ndim = ndim
+        self.cost = cost
+        self.bound = bound
+        self._work = np.eye(ndim)
+
+    def _burn(self, x):
+        y = x
+        for _ in range(self.cost):
+            y = np.dot(self._work, y)
+        return y
+
+    def lnpriorfn(self, x):
+        if np.all(np.abs(x) <= self.bound):
+            return 0.0
+        return -np.inf
+
+    def lnpriorfn_grad(self, x):
+        return self.lnpriorfn(x), np.zeros_like(x)
+
+    def p0(self, seed=0):
+        """Return a starting point drawn from the prior
+
+        Parameters
+        ----------
+        seed: int, optional
+            seed of the draw. Default 0
+        """
+        return np.random.default_rng(seed).uniform(-1, 1, self.ndim)
+
+
+class Gaussian(_Likelihood):
+    """Uncorrelated unit Gaussian likelihood
+    """
+    def lnlikefn(self, x):
+        x = self._burn(x)
+        return -0.5 * np.dot(x, x)
+
+    def lnlikefn_grad(self, x):
+        x = self._burn(x)
+        return -0.5 * np.dot(x, x), -x
+
+
+class Rosenbrock(_Likelihood):
+    """Rosenbrock likelihood, with a curved, strongly correlated ridge
+    """
+    def lnlikefn(self, x):
+        x = self._burn(x)
+        return -np.sum(100.0 * (x[1:] - x[:-1] ** 2) ** 2 + (1 - x[:-1]) ** 2) / 20.0
+
+    def lnlikefn_grad(self, x):
+        x = self._burn(x)
+        grad = np.zeros_like(x)
+        diff = x[1:] - x[:-1] ** 2
+        grad[:-1] += 400.0 * x[:-1] * diff + 2.0 * (1 - x[:-1])
+        grad[1:] -= 200.0 * diff
+        lnlike = -np.sum(100.0 * diff ** 2 + (1 - x[:-1]) ** 2) / 20.0
+        return lnlike, grad / 20.0
+
+
+LIKELIHOODS = {"gaussian": Gaussian, "rosenbrock": Rosenbrock}
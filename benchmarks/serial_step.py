@@ -0,0 +1,68 @@
+"""Measure the number of iterations per second of a single process run, for a
+trivial Gaussian likelihood where the sampler overhead dominates
+
+    python benchmarks/serial_step.py --niter 50000
+
+By default the sampler chooses its step function, which is _serialStep for a
+single process run. Pass ``--step PTMCMCOneStep`` to time the general step
+instead
+"""
+import argparse
+import shutil
+import tempfile
+import time
+import numpy as np
+from PTMCMCSampler.PTMCMCSampler import PTSampler
+
+
+def lnlikefn(x):
+    return -0.5 * np.sum(x ** 2)
+
+
+def lnpriorfn(x):
+    return 0.0
+
+
+def iterations_per_second(niter, ndim, step=None):
+    """Return the number of iterations per second of a single cold chain
+
+    Parameters
+    ----------
+    niter: int
+        number of iterations to run
+    ndim: int
+        number of parameters
+    step: str, optional
+        name of the step function used in place of _serialStep, for example
+        "PTMCMCOneStep". Default None, which keeps the sampler's choice
+    """
+    outdir = tempfile.mkdtemp()
+    try:
+        sampler = PTSampler(
+            ndim, lnlikefn, lnpriorfn, np.eye(ndim) * 0.1 ** 2, outDir=outdir,
+            verbose=False)
+        if step is not None:
+            sampler._serialStep = getattr(sampler, step)
+        np.random.seed(1234)
+        start = time.perf_counter()
+        sampler.sample(
+            np.zeros(ndim), niter, burn=1000, covUpdate=1000, n_cold_chains=1,
+            weights={"AdaptiveCovariance": 1, "SingleComponentAdaptiveCovariance": 1})
+        return niter / (time.perf_counter() - start)
+    finally:
+        shutil.rmtree(outdir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--niter", type=int, default=50000)
+    parser.add_argument("--ndim", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--step", default=None)
+    args = parser.parse_args()
+
+    rates = [
+        iterations_per_second(args.niter, args.ndim, args.step)
+        for _ in range(args.repeat)
+    ]
+    print("%s: %.0f iterations/s" % (args.step or "default step", max(rates)))
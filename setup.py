@@ -56,7 +56,7 @@ setup(
     + "---------\n\n"
     + open("HISTORY.md").read(),
     package_data={"": ["README.md", "HISTORY.md"]},
-    install_requires=["numpy", "scipy"],
+    install_requires=["numpy>=1.17", "scipy"],
     classifiers=[
         "Development Status :: 5 - Production/Stable",
         "Intended Audience :: Developers",
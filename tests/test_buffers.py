@@ -0,0 +1,120 @@
+import pytest
+import numpy as np
+from PTMCMCSampler.buffers import CircularBuffer, ReservoirBuffer, RunningStatistics
+
+
+class TestCircularBuffer(object):
+    """Test the CircularBuffer class
+    """
+    def setup(self):
+        """Setup the CircularBuffer class
+        """
+        self.samples = np.random.normal(size=(2, 25, 3))
+        self.buffer = CircularBuffer(2, 10, 3)
+        for iter in range(25):
+            for chain_ind in range(2):
+                self.buffer.append(chain_ind, iter, self.samples[chain_ind, iter])
+
+    def test_last(self):
+        """Test that the most recent samples are returned oldest first
+        """
+        for chain_ind in range(2):
+            np.testing.assert_array_equal(
+                self.buffer.last(chain_ind, 25, 10),
+                self.samples[chain_ind, 15:25])
+            np.testing.assert_array_equal(
+                self.buffer.last(chain_ind, 23, 4),
+                self.samples[chain_ind, 19:23])
+
+    def test_last_too_many(self):
+        """Test that asking for more samples than the buffer holds raises
+        a ValueError
+        """
+        with pytest.raises(ValueError):
+            self.buffer.last(0, 25, 11)
+
+    def test_chain_slice(self):
+        """Test that a buffer for a subset of chains shares memory with the
+        original buffer
+        """
+        buffer = self.buffer[1:2]
+        buffer.append(0, 25, np.zeros(3))
+        np.testing.assert_array_equal(self.buffer.last(1, 26, 1)[0], np.zeros(3))
+        np.testing.assert_array_equal(
+            buffer.last(0, 25, 9), self.samples[1, 16:25])
+
+
+class TestRunningStatistics(object):
+    """Test the RunningStatistics class
+    """
+    def setup(self):
+        """Setup the RunningStatistics class
+        """
+        self.samples = np.random.normal(3.0, 2.0, size=(2, 500, 3))
+        self.stats = RunningStatistics(2, 3)
+
+    def test_update(self):
+        """Test that the running mean and standard deviation match those of
+        every sample added so far
+        """
+        np.testing.assert_array_equal(self.stats.std(0), np.zeros(3))
+        for iter in range(500):
+            for chain_ind in range(2):
+                self.stats.update(chain_ind, self.samples[chain_ind, iter])
+            if (iter + 1) % 100 == 0:
+                for chain_ind in range(2):
+                    samples = self.samples[chain_ind, :iter + 1]
+                    np.testing.assert_allclose(
+                        self.stats.mean[chain_ind], np.mean(samples, axis=0))
+                    np.testing.assert_allclose(
+                        self.stats.std(chain_ind), np.std(samples, axis=0))
+
+    def test_chain_slice(self):
+        """Test that the statistics of a subset of chains share memory with
+        the original statistics
+        """
+        stats = self.stats[1:2]
+        stats.update(0, self.samples[1, 0])
+        assert self.stats.count[1] == 1
+        np.testing.assert_array_equal(self.stats.mean[1], self.samples[1, 0])
+
+
+class TestReservoirBuffer(object):
+    """Test the ReservoirBuffer class
+    """
+    def setup(self):
+        """Setup the ReservoirBuffer class
+        """
+        np.random.seed(1234)
+        self.buffer = ReservoirBuffer(2, 100, 1, thin=10)
+
+    def test_fill(self):
+        """Test that every thinned sample is stored until the buffer is full
+        """
+        for iter in range(500):
+            self.buffer.append(0, iter, [iter])
+        np.testing.assert_array_equal(
+            self.buffer.samples(0)[:, 0], np.arange(0, 500, 10))
+        assert len(self.buffer.samples(1)) == 0
+
+    def test_uniform(self):
+        """Test that once the buffer is full it holds samples from the whole
+        run with equal probability
+        """
+        for iter in range(100000):
+            self.buffer.append(0, iter, [iter])
+        samples = self.buffer.samples(0)[:, 0]
+        assert len(samples) == 100
+        assert len(np.unique(samples)) == 100
+        assert np.all(samples % 10 == 0)
+        # the mean of 100 draws from a uniform distribution on [0, 1e5)
+        # has a standard deviation of about 2900
+        assert abs(np.mean(samples) - 50000) < 12000
+
+    def test_chain_slice(self):
+        """Test that a buffer for a subset of chains shares memory with the
+        original buffer
+        """
+        buffer = self.buffer[1:2]
+        buffer.append(0, 0, [5.])
+        np.testing.assert_array_equal(self.buffer.samples(1), [[5.]])
@@ -0,0 +1,51 @@
+import pytest
+import numpy as np
+import os
+from PTMCMCSampler import chainfile
+
+
+class TestChainFile(object):
+    """Test the binary chain file functions
+    """
+    def setup(self):
+        """Setup a binary chain file
+        """
+        self.records = np.random.normal(size=(10, 6))
+        self.fname = "test_chain.bin"
+        chainfile.create(self.fname, 6)
+
+    def teardown(self):
+        """Remove the binary chain file
+        """
+        os.remove(self.fname)
+
+    def test_append(self):
+        """Test that appended records are read back unchanged
+        """
+        chainfile.append(self.fname, self.records[:4])
+        chainfile.append(self.fname, self.records[4:])
+        assert chainfile.is_chain_file(self.fname)
+        np.testing.assert_array_equal(chainfile.load(self.fname), self.records)
+
+    def test_partial_record(self):
+        """Test that a partially written record is ignored
+        """
+        chainfile.append(self.fname, self.records)
+        with open(self.fname, "ab") as f:
+            f.write(np.ones(3).tobytes())
+        np.testing.assert_array_equal(chainfile.load(self.fname), self.records)
+
+    def test_truncate(self):
+        """Test that records after the first nrecords are removed
+        """
+        chainfile.append(self.fname, self.records)
+        chainfile.truncate(self.fname, 4)
+        np.testing.assert_array_equal(chainfile.load(self.fname), self.records[:4])
+
+    def test_not_chain_file(self):
+        """Test that reading a text file raises a ValueError
+        """
+        np.savetxt(self.fname, self.records)
+        assert not chainfile.is_chain_file(self.fname)
+        with pytest.raises(ValueError):
+            chainfile.load(self.fname)
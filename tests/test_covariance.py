@@ -0,0 +1,93 @@
+import pytest
+import numpy as np
+from PTMCMCSampler.covariance import BlockCovariance, CovarianceFactorization
+
+
+class TestCovarianceFactorization(object):
+    """Test the CovarianceFactorization class
+    """
+    def setup(self):
+        """Setup the CovarianceFactorization class
+        """
+        np.random.seed(1234)
+        A = np.random.normal(size=(6, 6))
+        self.cov = np.dot(A, A.T) + np.eye(6)
+        self.groups = [np.array([0, 2, 4]), np.array([1, 3]), np.arange(6)]
+        self.factorization = CovarianceFactorization(self.groups)
+
+    def test_update(self):
+        """Test that the factorization of each group matches its covariance
+        """
+        assert self.factorization.update(self.cov) == 3
+        for ct, group in enumerate(self.groups):
+            covgroup = self.cov[np.ix_(group, group)]
+            U, S = self.factorization.U[ct], self.factorization.S[ct]
+            L = self.factorization.L[ct]
+            np.testing.assert_allclose(np.dot(U * S, U.T), covgroup)
+            np.testing.assert_allclose(np.dot(L, L.T), covgroup)
+            np.testing.assert_allclose(S, np.linalg.svd(covgroup)[1])
+
+    def test_skip_unchanged(self):
+        """Test that only the groups whose covariance has changed by more than
+        the tolerance are factorized again
+        """
+        self.factorization.update(self.cov)
+        U = list(self.factorization.U)
+        cov = self.cov * (1 + 1e-5)
+        cov[1, 1] *= 2
+        assert self.factorization.update(cov) == 2
+        assert self.factorization.U[0] is U[0]
+        assert self.factorization.U[1] is not U[1]
+        assert self.factorization.update(cov, force=True) == 3
+
+    def test_set(self):
+        """Test that setting the decomposition of a group updates L
+        """
+        U, S = np.eye(2), np.array([4., 9.])
+        self.factorization.set(1, U, S)
+        np.testing.assert_array_equal(self.factorization.L[1], np.diag([2., 3.]))
+
+
+class TestBlockCovariance(object):
+    """Test the BlockCovariance class
+    """
+    def setup(self):
+        """Setup the BlockCovariance class
+        """
+        np.random.seed(1234)
+        self.groups = [np.array([0, 2, 4]), np.array([1, 3])]
+        self.cov = BlockCovariance(5, self.groups, np.eye(5) * 0.1**2)
+        self.samples = np.random.normal(size=(3000, 5))
+        self.samples[:, 2] += self.samples[:, 0]
+
+    def test_update(self):
+        """Test that the blocks match the sample covariance of every sample
+        seen so far, and that parameters in different groups are
+        uncorrelated
+        """
+        for count in range(0, 3000, 1000):
+            self.cov.update(self.samples[count:count + 1000], count)
+            full = np.cov(self.samples[:count + 1000].T)
+            for group, block in zip(self.groups, self.cov.blocks):
+                np.testing.assert_allclose(block, full[np.ix_(group, group)])
+            np.testing.assert_allclose(
+                self.cov.mu, np.mean(self.samples[:count + 1000], axis=0))
+        np.testing.assert_allclose(self.cov.variances, np.diag(full))
+        dense = self.cov.toarray()
+        assert dense[0, 1] == 0
+        np.testing.assert_allclose(dense[0, 2], full[0, 2])
+
+    def test_factorization(self):
+        """Test that the factorization uses the blocks
+        """
+        self.cov.update(self.samples, 0)
+        factorization = CovarianceFactorization(self.groups)
+        factorization.update(self.cov)
+        for L, block in zip(factorization.L, self.cov.blocks):
+            np.testing.assert_allclose(np.dot(L, L.T), block)
+
+    def test_invalid_blocks(self):
+        """Test that the wrong number of blocks raises a ValueError
+        """
+        with pytest.raises(ValueError):
+            BlockCovariance(5, self.groups, [np.eye(3)])
@@ -0,0 +1,83 @@
+import pytest
+import numpy as np
+from PTMCMCSampler.cycle import ProposalCycle
+
+
+def jump_a(x, kwargs):
+    return x, 0
+
+
+def jump_b(x, kwargs):
+    return x, 0
+
+
+def jump_c(x, kwargs):
+    return x, 0
+
+
+class TestProposalCycle(object):
+    """Test the ProposalCycle class
+    """
+    def setup(self):
+        """Setup the ProposalCycle class
+        """
+        np.random.seed(1234)
+        self.cycle = ProposalCycle(blocksize=100)
+        self.cycle.add(jump_a, 0.5)
+        self.cycle.add(jump_b, 3)
+        self.cycle.add(jump_c, 1.5)
+
+    def frequencies(self, ndraws=50000):
+        """Return the fraction of draws which select each proposal
+        """
+        names = [self.cycle.draw().__name__ for _ in range(ndraws)]
+        return np.array([names.count(name) for name in self.cycle.names]) / ndraws
+
+    def test_draw(self):
+        """Test that proposals are drawn in proportion to their weights
+        """
+        np.testing.assert_allclose(
+            self.frequencies(), [0.1, 0.6, 0.3], atol=0.01)
+
+    def test_add_existing(self):
+        """Test that adding a proposal already in the cycle increases its
+        weight
+        """
+        self.cycle.add(jump_a, 1)
+        assert len(self.cycle) == 3
+        np.testing.assert_array_equal(self.cycle.weights, [1.5, 3, 1.5])
+
+    def test_set_weights(self):
+        """Test that changing the weights discards the selections already
+        drawn and changes the frequencies
+        """
+        self.cycle.draw()
+        self.cycle.set_weights([0, 1, 1])
+        np.testing.assert_allclose(
+            self.frequencies(), [0, 0.5, 0.5], atol=0.01)
+
+    def test_invalid_weights(self):
+        """Test that negative weights, weights which are all 0 and the wrong
+        number of weights raise a ValueError
+        """
+        with pytest.raises(ValueError):
+            self.cycle.set_weights([1, -1, 1])
+        with pytest.raises(ValueError):
+            self.cycle.set_weights([0, 0, 0])
+        with pytest.raises(ValueError):
+            self.cycle.set_weights([1, 1])
+
+    def test_state(self):
+        """Test that a cycle restored from its state draws the same
+        proposals
+        """
+        for _ in range(30):
+            self.cycle.draw()
+        state = self.cycle.get_state()
+        cycle = ProposalCycle(blocksize=100)
+        cycle.set_state(
+            state, {jump.__name__: jump for jump in (jump_a, jump_b, jump_c)})
+        random_state = np.random.get_state()
+        names = [self.cycle.draw().__name__ for _ in range(200)]
+        np.random.set_state(random_state)
+        assert [cycle.draw().__name__ for _ in range(200)] == names
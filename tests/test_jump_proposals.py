@@ -1,6 +1,9 @@
 import pytest
+import shutil
+from collections.abc import Mapping
 import numpy as np
 from PTMCMCSampler import proposals as prop
+from PTMCMCSampler.PTMCMCSampler import PTSampler
 
 
 class Base(object):
@@ -338,3 +341,76 @@ class TestUniform(Base):
         """
         super(TestUniform, self).test_1d_case()
         super(TestUniform, self).test_2d_case()
+
+
+class TestProposalContext(object):
+    """Test the ProposalContext class
+    """
+    def setup(self):
+        """Setup the ProposalContext class
+        """
+        self.context = prop.ProposalContext(
+            groups=[np.array([0, 1])], beta=1.0,
+            U=[np.array([[1., 0.], [0., 1.]])], S=[np.array([0.01, 0.01])])
+
+    def test_items(self):
+        """Test that the context can be read like a dictionary of kwargs
+        """
+        assert self.context["beta"] == 1.0
+        assert self.context["DEBuffer"] is None
+        assert "groups" in self.context
+        assert sorted(self.context.keys()) == sorted(
+            prop.ProposalContext.__slots__)
+        with pytest.raises(KeyError):
+            self.context["step_size"]
+        assert isinstance(self.context, Mapping)
+        assert self.context.get("step_size", 0.1) == 0.1
+        assert dict(self.context)["beta"] == 1.0
+        assert len(self.context) == len(self.context.values())
+        with pytest.raises(AttributeError):
+            self.context.step_size = 0.1
+
+    def test_jump(self):
+        """Test that a jump proposal reads the context and gives the same
+        jump as with a dictionary of kwargs
+        """
+        jump = prop.AdaptiveCovariance({})
+        jump.bind(self.context)
+        samples = np.array([1., 2.])
+        kwargs = {key: self.context[key] for key in ["groups", "beta", "U", "S"]}
+        np.random.seed(10)
+        new_samples, _ = jump(samples, self.context)
+        np.random.seed(10)
+        np.testing.assert_array_equal(jump(samples, kwargs)[0], new_samples)
+
+    def test_bind(self):
+        """Test that proposals initialized with their own kwargs can be bound
+        to the context
+        """
+        prop.Normal({"step_size": 0.1}).bind(self.context)
+        prop.Uniform({"pmin": 0.0, "pmax": 10.0}).bind(self.context)
+
+    def test_dict_jump(self):
+        """Test that a jump function written for a dictionary of kwargs can
+        read the context with get and items when added to the sampler
+        """
+        seen = []
+
+        def jump(x, kwargs):
+            assert kwargs.get("step_size") is None
+            seen.append(dict(kwargs.items())["iter"])
+            return x + 0.1 * np.random.normal(size=len(x)), 0
+
+        sampler = PTSampler(
+            2, lambda x: -0.5 * np.sum(x ** 2), lambda x: 0.0, np.eye(2) * 0.01,
+            outDir="./test_chains", verbose=False)
+        sampler.addProposalToCycle(jump, 20)
+        try:
+            sampler.sample(
+                np.zeros(2), 500, burn=100, covUpdate=100, n_cold_chains=1,
+                weights={"AdaptiveCovariance": 5})
+        finally:
+            shutil.rmtree("./test_chains")
+        assert len(seen) > 0
+        assert seen == sorted(seen)
+
@@ -0,0 +1,74 @@
+import numpy as np
+from PTMCMCSampler.jumpstats import JumpStatistics
+
+
+class TestJumpStatistics(object):
+    """Test the JumpStatistics class
+    """
+    def setup(self):
+        """Setup the JumpStatistics class
+        """
+        self.stats = JumpStatistics()
+        self.stats.add("AdaptiveCovariance", 20)
+        self.stats.add("SingleComponentAdaptiveCovariance", 10)
+        self.stats.add("AdaptiveCovariance", 10)
+        for accepted in [True, False, True]:
+            self.stats.record("AdaptiveCovariance", accepted, 0.5, 2.0 * accepted)
+        self.stats.record("SingleComponentAdaptiveCovariance", False, 0.25)
+
+    def test_record(self):
+        """Test that the jumps are recorded for the right proposal
+        """
+        assert "AdaptiveCovariance" in self.stats
+        assert "DifferentialEvolution" not in self.stats
+        np.testing.assert_array_equal(self.stats.weights, [30, 10])
+        assert self.stats.as_dict() == {
+            "AdaptiveCovariance": [3, 2],
+            "SingleComponentAdaptiveCovariance": [1, 0],
+        }
+        np.testing.assert_allclose(self.stats.acceptance_rates, [2 / 3., 0])
+        np.testing.assert_allclose(self.stats.time, [1.5, 0.25])
+        np.testing.assert_allclose(self.stats.mean_sq_jumps, [4 / 3., 0])
+        np.testing.assert_allclose(self.stats.jump_rates, [4 / 1.5, 0])
+
+    def test_set_weight(self):
+        """Test that the weight of a proposal can be changed
+        """
+        self.stats.set_weight("SingleComponentAdaptiveCovariance", 2.5)
+        np.testing.assert_array_equal(self.stats.weights, [30, 2.5])
+
+    def test_merge(self):
+        """Test that the statistics of another chain are added
+        """
+        other = JumpStatistics()
+        other.add("DifferentialEvolution", 5)
+        other.add("AdaptiveCovariance", 30)
+        other.record("DifferentialEvolution", True)
+        other.record("AdaptiveCovariance", True)
+        self.stats.merge(other)
+        assert self.stats.as_dict() == {
+            "AdaptiveCovariance": [4, 3],
+            "SingleComponentAdaptiveCovariance": [1, 0],
+            "DifferentialEvolution": [1, 1],
+        }
+
+    def test_to_csv(self):
+        """Test that one line is written for each proposal
+        """
+        lines = self.stats.to_csv(1000, chain=1).splitlines()
+        assert len(lines) == 2
+        assert lines[0].split(",")[:6] == [
+            "1000", "1", "AdaptiveCovariance", "0.75", "3", "2"]
+        columns = JumpStatistics.header.strip().split(",")
+        assert all(len(line.split(",")) == len(columns) for line in lines)
+
+    def test_to_csv_fractional_weights(self):
+        """Test that fractional weights are written as fractions of their
+        total
+        """
+        stats = JumpStatistics()
+        stats.add("a", 0.2)
+        stats.add("b", 0.3)
+        lines = stats.to_csv(10).splitlines()
+        assert [line.split(",")[3] for line in lines] == ["0.4", "0.6"]
+
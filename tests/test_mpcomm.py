@@ -0,0 +1,178 @@
+import pytest
+import numpy as np
+
+# the communicator needs multiprocessing.shared_memory, added in Python 3.8
+pytest.importorskip("multiprocessing.shared_memory")
+
+from PTMCMCSampler import mpcomm
+from PTMCMCSampler.PTMCMCSampler import PTSampler
+
+
+def exchange(comm):
+    """Exchange a python object and an array between neighbouring ranks
+    """
+    rank, size = comm.Get_rank(), comm.Get_size()
+    right, left = (rank + 1) % size, (rank - 1) % size
+    comm.send({"rank": rank}, dest=right, tag=5)
+    obj = comm.recv(source=left, tag=5)
+
+    recvbuf = np.empty(3)
+    comm.Sendrecv(
+        np.arange(3.) + rank, dest=right, sendtag=19, recvbuf=recvbuf,
+        source=left, recvtag=19)
+    comm.barrier()
+    return obj["rank"], recvbuf
+
+
+def probe(comm):
+    """Check that Iprobe only reports messages with a matching source and tag
+    """
+    if comm.Get_rank() == 0:
+        comm.send(np.ones(10), dest=1, tag=222)
+        comm.barrier()
+        return None
+    comm.barrier()
+    # messages are delivered asynchronously so wait until it has arrived
+    while not comm.Iprobe(source=0, tag=222):
+        pass
+    found = [comm.Iprobe(source=0, tag=111), comm.Iprobe(source=0, tag=222)]
+    return found, comm.recv(source=0, tag=222)
+
+
+def nonblocking(comm):
+    """Check that a posted receive completes once the message arrives
+    """
+    if comm.Get_rank() == 0:
+        comm.barrier()
+        comm.send(1.5, dest=1, tag=18)
+        comm.barrier()
+        return None
+    request = comm.irecv(source=0, tag=18)
+    before = request.test()
+    comm.barrier()
+    comm.barrier()
+    after = request.test()
+    while not after[0]:
+        after = request.test()
+    return before, after, request.test()
+
+
+def large_array(comm):
+    """Arrays larger than a shared-memory slot are sent through the queue
+    """
+    if comm.Get_rank() == 0:
+        comm.send(np.ones((100, 100)), dest=1, tag=111)
+        return None
+    return comm.recv(source=0, tag=111)
+
+
+def broadcast(comm):
+    """Broadcast twice on a duplicate communicator while sending an ordinary
+    message with the same tag on the original communicator
+    """
+    dup = comm.Dup()
+    buf = np.zeros(4)
+    if comm.Get_rank() == 0:
+        comm.send("not a broadcast", dest=1, tag=-1)
+        for value in [1., 2.]:
+            buf[:] = value
+            dup.Ibcast(buf, root=0).Wait()
+        return None
+    received = []
+    for _ in range(2):
+        request = dup.Ibcast(buf, root=0)
+        request.Wait()
+        received.append(buf.copy())
+    return received, comm.recv(source=0, tag=-1)
+
+
+def failing(comm):
+    raise ValueError("rank failed")
+
+
+def lnlikefn(x):
+    return -0.5 * np.sum(x ** 2)
+
+
+def lnpriorfn(x):
+    if np.all(np.abs(x) < 10.):
+        return 0.0
+    return -np.inf
+
+
+def run_sampler(comm, outdir, covariance="dense"):
+    sampler = PTSampler(
+        2, lnlikefn, lnpriorfn, np.eye(2) * 0.1, comm=comm, outDir=outdir,
+        verbose=False, covariance=covariance)
+    result = sampler.sample(
+        np.zeros(2), 1000, burn=200, covUpdate=200, Tskip=10, n_cold_chains=1)
+    return (
+        sampler.temp, sampler.swapProposed, result.samples.shape,
+        sampler._denseCovariance(), sampler.U, sampler.S)
+
+
+class TestSharedMemoryComm(object):
+    """Test the SharedMemoryComm communicator
+    """
+    def test_exchange(self):
+        """Test that objects and arrays are passed between ranks
+        """
+        outputs = mpcomm.run(exchange, 3)
+        for rank, (source, recvbuf) in enumerate(outputs):
+            assert source == (rank - 1) % 3
+            np.testing.assert_array_equal(recvbuf, np.arange(3.) + source)
+
+    def test_iprobe(self):
+        """Test the `Iprobe` method
+        """
+        found, array = mpcomm.run(probe, 2)[1]
+        assert found == [False, True]
+        np.testing.assert_array_equal(array, np.ones(10))
+
+    def test_irecv(self):
+        """Test the `irecv` method
+        """
+        before, after, again = mpcomm.run(nonblocking, 2)[1]
+        assert before == (False, None)
+        assert after == (True, 1.5)
+        assert again == (False, None)
+
+    def test_large_array(self):
+        """Test that arrays which do not fit in a slot are still received
+        """
+        array = mpcomm.run(large_array, 2, slotsize=1024)[1]
+        np.testing.assert_array_equal(array, np.ones((100, 100)))
+
+    def test_ibcast(self):
+        """Test the `Dup` and `Ibcast` methods
+        """
+        received, message = mpcomm.run(broadcast, 2)[1]
+        np.testing.assert_array_equal(received[0], np.ones(4))
+        np.testing.assert_array_equal(received[1], 2 * np.ones(4))
+        assert message == "not a broadcast"
+
+    def test_failure(self):
+        """Test that an error on one rank is raised in the parent process
+        """
+        with pytest.raises(RuntimeError):
+            mpcomm.run(failing, 2)
+
+    @pytest.mark.parametrize("covariance", ["dense", "block"])
+    def test_sampler(self, tmpdir, covariance):
+        """Test that PTSampler runs with one temperature per process
+        """
+        outputs = mpcomm.run(run_sampler, 3, args=(str(tmpdir), covariance))
+        temps = [output[0] for output in outputs]
+        assert temps[0] == 1
+        assert np.all(np.diff(temps) > 0)
+        assert outputs[0][1] == (1000 - 1) // 10
+        assert outputs[0][2] == (1, 1000 - 200, 2)
+
+        # the adapted covariance matrix and its decomposition are broadcast
+        # from the T = 1 chain to every other chain
+        cov, U, S = outputs[0][3:]
+        assert not np.allclose(cov, np.eye(2) * 0.1)
+        for output in outputs[1:]:
+            np.testing.assert_allclose(output[3], cov)
+            np.testing.assert_allclose(output[4][0], U[0])
+            np.testing.assert_allclose(output[5][0], S[0])
@@ -19,3 +19,9 @@ class TestMPIDummp(object):
         """Test the `Get_size` function
         """
         assert self.mpidummy.Get_size() == 1
+
+    def test_irecv(self):
+        """Test that the `irecv` method returns a request that never completes
+        """
+        request = self.mpidummy.irecv(source=0, tag=111)
+        assert request.test() == (False, None)
@@ -0,0 +1,47 @@
+import io
+from PTMCMCSampler.progress import ProgressReporter
+
+
+class TestProgressReporter(object):
+    """Test the ProgressReporter class
+    """
+    def setup(self):
+        """Setup the ProgressReporter class
+        """
+        self.stream = io.StringIO()
+        self.reporter = ProgressReporter(interval=60, stream=self.stream)
+        self.reporter.start(1000, label="chain 1/2", naccepted=100)
+
+    def test_throttled(self):
+        """Test that nothing is written before the interval has passed
+        """
+        assert not self.reporter.update(10, 105)
+        assert self.reporter.reports == 0
+        assert self.stream.getvalue() == ""
+        assert self.reporter.stride >= 1
+
+    def test_report(self):
+        """Test that a report gives the progress, acceptance rates and
+        number of effective samples
+        """
+        assert self.reporter.update(500, 350, swap_acceptance=0.25, neff=40,
+                                    force=True)
+        line = self.stream.getvalue()
+        assert line.endswith("\n")
+        assert line.startswith("chain 1/2 | 500/1000 (50.0%)")
+        assert "it/s" in line
+        assert "acceptance 0.500" in line
+        assert "swap acceptance 0.250" in line
+        assert "ESS 40" in line
+
+    def test_finish(self):
+        """Test that the final report is always written, without the
+        quantities that are not known
+        """
+        self.reporter.finish(1000, 100)
+        line = self.stream.getvalue()
+        assert self.reporter.reports == 1
+        assert "1000/1000 (100.0%)" in line
+        assert "acceptance 0.000" in line
+        assert "swap" not in line
+        assert "ESS" not in line
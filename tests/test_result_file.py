@@ -188,3 +188,46 @@ class TestResult2d(BaseResult):
         """Test that we can produce a corner plot
         """
         super(TestResult2d, self).test_plot_corner()
+
+
+class TestResultMemmap(BaseResult):
+    """Class to test the Result object when the samples are stored in .npy
+    files
+    """
+    def setup(self):
+        """Setup the Result object
+        """
+        self.n_cold_chains = 2
+        self.initial_samples = np.random.random((self.n_cold_chains, 1000, 2))
+        self.initial_likelihood_vals = np.random.random((self.n_cold_chains, 1000))
+        self.initial_prior_vals = np.random.random((self.n_cold_chains, 1000))
+        self.files = ["test_chain.npy", "test_lnlike.npy", "test_lnprob.npy"]
+        for fname, array in zip(self.files, [
+                self.initial_samples, self.initial_likelihood_vals,
+                self.initial_prior_vals]):
+            np.save(fname, array)
+
+        self.burnin = 100
+        self.result = Result(
+            self.files[0], burnin=self.burnin,
+            initial_likelihood_vals=self.files[1],
+            initial_prior_vals=self.files[2],
+            num_chains=self.n_cold_chains
+            )
+
+    def teardown(self):
+        """Remove the .npy files and the files generated by the `save`
+        function
+        """
+        for fname in self.files + ["test_chain0.txt", "test_chain1.txt"]:
+            if os.path.isfile(fname):
+                os.remove(fname)
+
+    def test_memmap(self):
+        """Test that the files are only opened when the samples are needed,
+        and are then memory-mapped
+        """
+        assert isinstance(self.result._initial_samples, str)
+        np.testing.assert_array_equal(
+            self.result.samples, self.initial_samples[:, self.burnin:])
+        assert isinstance(self.result._initial_samples, np.memmap)
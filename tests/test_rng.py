@@ -0,0 +1,60 @@
+import numpy as np
+from PTMCMCSampler.rng import RandomStream
+
+
+class TestRandomStream(object):
+    """Test the RandomStream class
+    """
+    def setup(self):
+        """Setup the RandomStream class
+        """
+        self.stream = RandomStream(1234, blocksize=100)
+
+    def draw(self, stream, n=250):
+        """Return a mixture of the scalar random numbers of a stream
+        """
+        return [
+            (stream.random(), stream.log_random(), stream.standard_normal())
+            for _ in range(n)
+        ]
+
+    def test_seed(self):
+        """Test that streams with the same seed give the same numbers and
+        streams with different seeds do not
+        """
+        assert self.draw(self.stream) == self.draw(RandomStream(1234, blocksize=100))
+        assert self.draw(RandomStream(1234)) != self.draw(RandomStream(4321))
+
+    def test_distributions(self):
+        """Test that the blocks are drawn from the right distributions
+        """
+        uniform = np.array([self.stream.random() for _ in range(20000)])
+        log_uniform = np.array([self.stream.log_random() for _ in range(20000)])
+        normal = np.array([self.stream.standard_normal() for _ in range(20000)])
+        assert np.all((uniform >= 0) & (uniform < 1))
+        np.testing.assert_allclose(np.mean(uniform), 0.5, atol=0.01)
+        np.testing.assert_allclose(np.mean(log_uniform), -1, atol=0.02)
+        np.testing.assert_allclose(
+            [np.mean(normal), np.std(normal)], [0, 1], atol=0.02)
+        assert len(self.stream.random(5)) == 5
+        assert len(self.stream.standard_normal(5)) == 5
+
+    def test_spawn(self):
+        """Test that spawned streams are reproducible and independent
+        """
+        children = self.stream.spawn(2)
+        again = RandomStream(1234, blocksize=100).spawn(2)
+        assert self.draw(children[0]) == self.draw(again[0])
+        first = np.array([children[0].standard_normal() for _ in range(5000)])
+        second = np.array([children[1].standard_normal() for _ in range(5000)])
+        assert abs(np.corrcoef(first, second)[0, 1]) < 0.05
+
+    def test_state(self):
+        """Test that a stream restored from its state gives the same numbers,
+        including those already drawn into the blocks
+        """
+        self.draw(self.stream, n=30)
+        state = self.stream.get_state()
+        stream = RandomStream(1, blocksize=100)
+        stream.set_state(state)
+        assert self.draw(stream) == self.draw(self.stream)
@@ -0,0 +1,51 @@
+import time
+import numpy as np
+from PTMCMCSampler.timings import Timings
+
+
+class TestTimings(object):
+    """Test the Timings class
+    """
+    def setup(self):
+        """Setup the Timings class
+        """
+        self.timings = Timings(rank=1)
+        self.timings.add("likelihood", 0.5)
+        self.timings.add("likelihood", 0.25)
+        self.timings.add("proposal:AdaptiveCovariance", 0.1)
+
+    def test_add(self):
+        """Test that the calls and times of each phase are accumulated
+        """
+        assert self.timings.calls == {
+            "likelihood": 2, "proposal:AdaptiveCovariance": 1}
+        np.testing.assert_allclose(self.timings.time["likelihood"], 0.75)
+        np.testing.assert_allclose(self.timings.total, 0.85)
+
+    def test_timer(self):
+        """Test that the timer adds the time spent in its block
+        """
+        with self.timings.timer("write"):
+            time.sleep(0.01)
+        assert self.timings.calls["write"] == 1
+        assert self.timings.time["write"] >= 0.01
+
+    def test_merge(self):
+        """Test that merging adds the calls and times of another object
+        """
+        other = Timings()
+        other.add("likelihood", 1.0, calls=3)
+        other.add("swap_wait", 2.0)
+        self.timings.merge(other)
+        assert self.timings.calls["likelihood"] == 5
+        np.testing.assert_allclose(self.timings.time["likelihood"], 1.75)
+        np.testing.assert_allclose(self.timings.time["swap_wait"], 2.0)
+
+    def test_to_csv(self):
+        """Test that each phase is written, the slowest first
+        """
+        lines = self.timings.to_csv().splitlines()
+        assert len(lines) == 2
+        assert lines[0].split(",")[:3] == ["1", "likelihood", "2"]
+        assert len(lines[0].split(",")) == len(Timings.header.split(","))
+        assert "proposal:AdaptiveCovariance" in self.timings.summary()
@@ -2,6 +2,8 @@ import pytest
 import numpy as np
 from PTMCMCSampler.result import Result
 from PTMCMCSampler import PTMCMCSampler
+from PTMCMCSampler.buffers import CircularBuffer
+from PTMCMCSampler.timings import Timings
 import shutil
 
 
@@ -27,6 +29,13 @@ class GaussianLikelihood(object):
             return -np.inf
         return 0.0
 
+    def lnlikefn_vectorized(self, x):
+        return -0.5*np.sum(x**2, axis=1)-x.shape[1]*0.5*np.log(2*np.pi)
+
+    def lnpriorfn_vectorized(self, x):
+        inside = np.all(self.a <= x, axis=1) & np.all(self.b >= x, axis=1)
+        return np.where(inside, 0.0, -np.inf)
+
     def lnpriorfn_grad(self, x):
         return self.lnpriorfn(x), np.zeros_like(x)
 
@@ -39,6 +48,12 @@ class GaussianLikelihood(object):
         return lnpost_grad(x)[0]
 
 
+def small_jump(x, kwargs):
+    """Jump proposal which barely moves the chain
+    """
+    return x + 1e-4 * np.random.normal(size=len(x)), 0
+
+
 class TestWorkflow(object):
     """Test the workflow from start to end and make sure that there are no
     failures
@@ -68,3 +83,412 @@ class TestWorkflow(object):
         data = self.sampler.sample(
             self.p0, 5000, burn=500, thin=1, covUpdate=500)
         assert isinstance(data, Result)
+
+    def test_sample_memmap(self):
+        """Try running the workflow with the chains stored in memory-mapped
+        files
+        """
+        data = self.sampler.sample(
+            self.p0, 2000, burn=500, thin=1, covUpdate=500, memmap=True)
+        assert isinstance(data, Result)
+        chain = np.load("./test_chains/chain_1_chain.npy")
+        assert chain.shape == (2, 2000, self.ndim)
+        np.testing.assert_array_equal(data.initial_samples, chain)
+        assert np.all(chain[:, -1] != 0)
+
+    @pytest.mark.parametrize("chain_format", ["text", "binary"])
+    def test_write_cold_chains(self, chain_format):
+        """Try writing the cold chains to file in both formats and reading
+        them back
+        """
+        sampler = PTMCMCSampler.PTSampler(
+            self.ndim, self.glo.lnlikefn, self.glo.lnpriorfn, np.copy(self.cov),
+            outDir='./test_chains', chain_format=chain_format)
+        data = sampler.sample(
+            self.p0, 3000, burn=500, thin=1, covUpdate=500, isave=1000,
+            write_cold_chains=True)
+        ext = ".txt" if chain_format == "text" else ".bin"
+        fnames = ["./test_chains/chain_1_{}{}".format(i, ext) for i in range(2)]
+        result = Result.from_chain_files(fnames)
+        nsamples = result.initial_samples.shape[1]
+        assert nsamples == 3000
+        np.testing.assert_allclose(
+            result.initial_samples, data.initial_samples[:, :nsamples])
+        # the text files only store the likelihood to 6 decimal places
+        np.testing.assert_allclose(
+            result.inital_likelihood_vals,
+            data.inital_likelihood_vals[:, :nsamples], atol=1e-6)
+
+        # the jump statistics of each save are appended to one csv file
+        stats = np.genfromtxt(
+            "./test_chains/jump_stats.csv", delimiter=",", names=True,
+            dtype=None, encoding=None)
+        last = stats[stats["iter"] == stats["iter"][-1]]
+        assert set(last["proposal"]) == set(sampler.jumpDict)
+
+    @pytest.mark.parametrize("chain_format", ["text", "binary"])
+    def test_checkpoint(self, chain_format):
+        """Test that a run which is killed and resumed from its checkpoint
+        gives the same samples as a run which is not interrupted
+        """
+        class Killed(Exception):
+            pass
+
+        def run(outdir, resume=False, ncalls=None):
+            calls = []
+
+            def lnlikefn(x):
+                calls.append(1)
+                if ncalls is not None and len(calls) > ncalls:
+                    raise Killed()
+                return self.glo.lnlikefn(x)
+
+            sampler = PTMCMCSampler.PTSampler(
+                self.ndim, lnlikefn, self.glo.lnpriorfn, np.copy(self.cov),
+                outDir=outdir, resume=resume, chain_format=chain_format)
+            np.random.seed(1)
+            data = sampler.sample(
+                self.p0, 3000, burn=500, covUpdate=500, isave=500,
+                write_cold_chains=True, checkpoint=True)
+            return data, len(calls)
+
+        data, ncalls = run('./test_chains')
+        with pytest.raises(Killed):
+            run('./test_chains/killed', ncalls=int(0.75 * ncalls))
+        resumed, nresumed = run('./test_chains/killed', resume=True)
+        # the first cold chain and the checkpointed part of the second are
+        # not sampled again
+        assert nresumed < 0.5 * ncalls
+        np.testing.assert_array_equal(
+            resumed.initial_samples, data.initial_samples)
+
+    @pytest.mark.parametrize("chain_format", ["text", "binary"])
+    def test_resume_cold_chains(self, chain_format):
+        """Test that resuming a run with two cold chains replays the chain
+        file of each chain and appends to it, rather than emptying it
+        """
+        def run(Niter, resume=False):
+            sampler = PTMCMCSampler.PTSampler(
+                self.ndim, self.glo.lnlikefn, self.glo.lnpriorfn,
+                np.copy(self.cov), outDir='./test_chains', verbose=False,
+                resume=resume, chain_format=chain_format)
+            data = sampler.sample(
+                self.p0, Niter, burn=500, covUpdate=500, isave=500,
+                n_cold_chains=2, write_cold_chains=True,
+                weights={"AdaptiveCovariance": 5})
+            fnames = [sampler._chainFileName(ii) for ii in range(2)]
+            return data, Result.from_chain_files(fnames).initial_samples
+
+        data, files = run(1001)
+        resumed, resumed_files = run(2001, resume=True)
+        assert resumed_files.shape == (2, 2001, self.ndim)
+        np.testing.assert_array_equal(resumed_files[:, :1001], files)
+        np.testing.assert_array_equal(
+            resumed.initial_samples[:, :1001], data.initial_samples[:, :1001])
+
+    def test_checkpoint_invalid(self):
+        """Test that asking for checkpoints with parallel chains is rejected
+        before the chain files of an earlier run are touched
+        """
+        sampler = PTMCMCSampler.PTSampler(
+            self.ndim, self.glo.lnlikefn, self.glo.lnpriorfn, np.copy(self.cov),
+            outDir='./test_chains', verbose=False)
+        sampler.sample(
+            self.p0, 1001, burn=500, covUpdate=500, isave=500, n_cold_chains=1,
+            write_cold_chains=True, weights={"AdaptiveCovariance": 5})
+        with open(sampler.fname, "rb") as f:
+            chain = f.read()
+        assert len(chain) > 0
+        for kwargs in [{"parallel_chains": "thread"}, {"ntemps": 2}]:
+            with pytest.raises(ValueError):
+                sampler.sample(
+                    self.p0, 1001, burn=500, covUpdate=500, isave=500,
+                    n_cold_chains=1, write_cold_chains=True, checkpoint=True,
+                    weights={"AdaptiveCovariance": 5}, **kwargs)
+            with open(sampler.fname, "rb") as f:
+                assert f.read() == chain
+
+    def test_sample_block_covariance(self):
+        """Try running the workflow with a block diagonal covariance matrix
+        """
+        glo = GaussianLikelihood(ndim=4, pmin=self.pmin, pmax=self.pmax)
+        sampler = PTMCMCSampler.PTSampler(
+            4, glo.lnlikefn, glo.lnpriorfn,
+            [np.eye(2) * 0.1**2, np.eye(2) * 0.1**2],
+            groups=[np.array([0, 1]), np.array([2, 3])],
+            outDir='./test_chains', covariance="block")
+        data = sampler.sample(
+            np.random.uniform(self.pmin, self.pmax, 4), 3000, burn=500,
+            thin=1, covUpdate=500, n_cold_chains=1)
+        assert isinstance(data, Result)
+        assert len(sampler.cov.blocks) == 2
+        # the blocks have been adapted from the initial covariance
+        assert not np.allclose(sampler.cov.blocks[0], np.eye(2) * 0.1**2)
+
+    def test_serial_step(self):
+        """Test that the single process step gives the same samples as the
+        general step
+        """
+        outputs = []
+        for step in ["_serialStep", "PTMCMCOneStep"]:
+            sampler = PTMCMCSampler.PTSampler(
+                self.ndim, self.glo.lnlikefn, self.glo.lnpriorfn,
+                np.copy(self.cov), outDir='./test_chains', verbose=False)
+            sampler._serialStep = getattr(sampler, step)
+            np.random.seed(42)
+            outputs.append(sampler.sample(
+                self.p0, 3000, burn=500, thin=1, covUpdate=500,
+                n_cold_chains=1, weights={
+                    "AdaptiveCovariance": 5, "SingleComponentAdaptiveGaussian": 5,
+                    "DifferentialEvolution": 5}))
+            assert sampler._serial
+        np.testing.assert_array_equal(
+            outputs[0].initial_samples, outputs[1].initial_samples)
+
+    def test_chain_stats_tracking(self):
+        """Test that the running statistics of the chains are only kept when
+        a proposal reads them
+        """
+        self.sampler.sample(
+            self.p0, 1000, burn=500, thin=1, covUpdate=500, n_cold_chains=1,
+            weights={"AdaptiveCovariance": 5})
+        assert not self.sampler._trackChainStats
+        assert np.all(self.sampler._chainStats.count == 0)
+
+    def test_jump_stats_parallel_chains_twice(self):
+        """Test that sampling twice with a pool adds the jumps of the second
+        run once, rather than once per chain
+        """
+        sampler = PTMCMCSampler.PTSampler(
+            self.ndim, self.glo.lnlikefn, self.glo.lnpriorfn, np.copy(self.cov),
+            outDir='./test_chains', verbose=False)
+        counts = []
+        for _ in range(2):
+            sampler.sample(
+                self.p0, 1000, burn=500, covUpdate=500, n_cold_chains=2,
+                parallel_chains="thread", weights={"AdaptiveCovariance": 5})
+            counts.append(np.sum(sampler.jumpStats.proposed))
+        assert counts[0] == 2 * 999
+        assert counts[1] == 2 * counts[0]
+
+    def test_jump_stats_parallel_chains(self):
+        """Test that the jump statistics written by each cold chain in a
+        pool are labelled with the index of the chain
+        """
+        sampler = PTMCMCSampler.PTSampler(
+            self.ndim, self.glo.lnlikefn, self.glo.lnpriorfn, np.copy(self.cov),
+            outDir='./test_chains', verbose=False)
+        sampler.sample(
+            self.p0, 2001, burn=500, thin=1, covUpdate=500, isave=1000,
+            n_cold_chains=2, parallel_chains="thread", write_cold_chains=True,
+            weights={"AdaptiveCovariance": 5})
+        stats = np.genfromtxt(
+            "./test_chains/jump_stats.csv", delimiter=",", names=True,
+            dtype=None, encoding=None)
+        for chain in range(2):
+            rows = stats[stats["chain"] == chain]
+            assert set(rows["iter"]) == {1000, 2000, 2001}
+            assert len(rows) == 3 * len(sampler.jumpDict)
+
+    def test_save_jump_stats_deprecated(self):
+        """Test that passing the deprecated save_jump_stats warns
+        """
+        with pytest.warns(DeprecationWarning):
+            self.sampler.sample(
+                self.p0, 100, burn=50, covUpdate=50, n_cold_chains=1,
+                save_jump_stats=True, weights={"AdaptiveCovariance": 5})
+
+    def test_timing(self):
+        """Test that the time spent in each phase is recorded and written
+        next to the chain file only when timing is switched on
+        """
+        assert self.sampler.timings is None
+        sampler = PTMCMCSampler.PTSampler(
+            self.ndim, self.glo.lnlikefn, self.glo.lnpriorfn, np.copy(self.cov),
+            outDir='./test_chains', verbose=False, timing=True)
+        sampler.sample(
+            self.p0, 2000, burn=500, thin=1, covUpdate=500, n_cold_chains=1,
+            write_cold_chains=True, weights={
+                "AdaptiveCovariance": 5, "DifferentialEvolution": 5})
+        timings = sampler.timings
+        # jumps outside the prior are rejected without evaluating logl
+        assert timings.calls["prior"] >= 1999
+        assert 0 < timings.calls["likelihood"] <= timings.calls["prior"]
+        assert timings.calls["covariance"] == 3
+        assert timings.calls["DE"] == 3
+        assert "proposal:AdaptiveCovariance" in timings.calls
+        assert "proposal:DifferentialEvolution" in timings.calls
+        sampler._writer.flush()
+        with open("./test_chains/chain_1_timings.csv") as f:
+            assert f.readline() == Timings.header
+            assert len(f.readlines()) == len(timings.time)
+
+    def test_timing_parallel_chains(self):
+        """Test that the timings of cold chains sampled in a pool are merged
+        """
+        sampler = PTMCMCSampler.PTSampler(
+            self.ndim, self.glo.lnlikefn, self.glo.lnpriorfn, np.copy(self.cov),
+            outDir='./test_chains', verbose=False, timing=True)
+        sampler.sample(
+            self.p0, 1000, burn=500, thin=1, covUpdate=500, n_cold_chains=2,
+            parallel_chains="process", weights={"AdaptiveCovariance": 5})
+        assert sampler.timings.calls["prior"] >= 2 * 999
+
+    def test_progress(self):
+        """Test that the progress of each cold chain is reported to stderr
+        when verbose, and that nothing is reported when switched off
+        """
+        sampler = PTMCMCSampler.PTSampler(
+            self.ndim, self.glo.lnlikefn, self.glo.lnpriorfn, np.copy(self.cov),
+            outDir='./test_chains', verbose=True)
+        sampler.sample(
+            self.p0, 1000, burn=500, thin=1, covUpdate=500, n_cold_chains=2,
+            progress_interval=None, weights={"AdaptiveCovariance": 5})
+        assert sampler._progress is None
+        sampler.sample(
+            self.p0, 1000, burn=500, thin=1, covUpdate=500, n_cold_chains=2,
+            progress_interval=60, weights={"AdaptiveCovariance": 5})
+        # only the final report of each chain is due within the interval
+        assert sampler._progress.reports == 2
+        assert sampler._progress.label == "chain 2/2"
+
+    def test_invalid_chain_format(self):
+        """Test that an unknown chain format raises a ValueError
+        """
+        with pytest.raises(ValueError):
+            PTMCMCSampler.PTSampler(
+                self.ndim, self.glo.lnlikefn, self.glo.lnpriorfn,
+                np.copy(self.cov), outDir='./test_chains', chain_format="hdf5")
+
+    def test_update_recursive(self):
+        """Test that the blocked covariance update matches the sample
+        covariance of every sample seen so far
+        """
+        samples = np.random.normal(size=(1, 3000, self.ndim))
+        samples[0, :, 1] += 0.5 * samples[0, :, 0]
+        self.sampler._AMbuffer = CircularBuffer(1, 1001, self.ndim)
+        for iter in range(3000):
+            self.sampler._AMbuffer.append(0, iter, samples[0, iter])
+            if (iter + 1) % 1000 == 0:
+                self.sampler._updateRecursive(iter + 1, 1000, 0)
+                np.testing.assert_allclose(
+                    self.sampler.cov, np.cov(samples[0, :iter + 1].T))
+                np.testing.assert_allclose(
+                    self.sampler.mu, np.mean(samples[0, :iter + 1], axis=0))
+
+    def test_adapt_weights(self):
+        """Test that the weights of the proposal cycle are only re-weighted
+        during burn in, and that a proposal which barely moves the chain is
+        given less weight
+        """
+        self.sampler.addProposalToCycle(small_jump, 5)
+        adapt = self.sampler._adaptProposalWeights
+        iters = []
+
+        def count_adapt():
+            iters.append(self.sampler.jump_proposal_kwargs["iter"])
+            adapt()
+
+        self.sampler._adaptProposalWeights = count_adapt
+        self.sampler.sample(
+            self.p0, 3000, burn=1000, thin=1, covUpdate=250, n_cold_chains=1,
+            adapt_weights=True)
+        assert iters == [250, 500, 750, 1000]
+        weights = self.sampler.propCycle.weights
+        assert np.isclose(np.sum(weights), 10)
+        assert weights[self.sampler.propCycle.names.index("small_jump")] < 1
+        np.testing.assert_allclose(self.sampler.jumpStats.weights, weights)
+
+    def test_sample_parallel_chains(self):
+        """Try running the cold chains concurrently in a thread and a process
+        pool
+        """
+        for pool in ["thread", "process"]:
+            data = self.sampler.sample(
+                self.p0, 2000, burn=500, thin=1, covUpdate=500,
+                n_cold_chains=2, parallel_chains=pool)
+            assert isinstance(data, Result)
+            assert data.samples.shape == (2, 2000 - 500, self.ndim)
+            # every iteration of both chains should have been recorded
+            assert np.all(data.initial_samples[:, -1] != 0)
+            assert not np.allclose(
+                data.initial_samples[0], data.initial_samples[1])
+
+    def test_seed(self):
+        """Test that runs with the same seed give the same samples, even with
+        the cold chains sampled concurrently, and runs with a different seed
+        do not
+        """
+        outputs = []
+        for seed in [5, 5, 6]:
+            sampler = PTMCMCSampler.PTSampler(
+                self.ndim, self.glo.lnlikefn, self.glo.lnpriorfn,
+                np.copy(self.cov), outDir='./test_chains', verbose=False)
+            outputs.append(sampler.sample(
+                self.p0, 2000, burn=500, thin=1, covUpdate=500,
+                n_cold_chains=2, parallel_chains="thread", seed=seed,
+                weights={
+                    "AdaptiveCovariance": 5, "SingleComponentAdaptiveGaussian": 5,
+                    "DifferentialEvolution": 5}).initial_samples)
+        np.testing.assert_array_equal(outputs[0], outputs[1])
+        assert not np.allclose(outputs[0], outputs[2])
+        assert not np.allclose(outputs[0][0], outputs[0][1])
+
+    def test_sample_parallel_chains_invalid_pool(self):
+        """Make sure that an unknown pool type raises a ValueError
+        """
+        with pytest.raises(ValueError):
+            self.sampler.sample(self.p0, 100, parallel_chains="mpi")
+
+    def test_sample_vectorized(self):
+        """Try running the workflow with a vectorized likelihood and prior
+        which are called once per step for all cold chains
+        """
+        ncalls = []
+
+        def lnlikefn(x):
+            ncalls.append(x.shape)
+            return self.glo.lnlikefn_vectorized(x)
+
+        sampler = PTMCMCSampler.PTSampler(
+            self.ndim, lnlikefn, self.glo.lnpriorfn_vectorized,
+            np.copy(self.cov), outDir='./test_chains', vectorized=True)
+        data = sampler.sample(
+            self.p0, 2000, burn=500, thin=1, covUpdate=500, n_cold_chains=3)
+        assert isinstance(data, Result)
+        assert data.samples.shape == (3, 2000 - 500, self.ndim)
+        assert len(ncalls) <= 2000
+        assert all(shape[1] == self.ndim for shape in ncalls)
+        assert max(shape[0] for shape in ncalls) == 3
+
+    def test_sample_in_process_tempering(self):
+        """Try running an in-process temperature ladder without MPI
+        """
+        data = self.sampler.sample(
+            self.p0, 2000, burn=500, thin=1, covUpdate=500, Tskip=10,
+            n_cold_chains=1, ntemps=4)
+        assert isinstance(data, Result)
+        assert len(self.sampler.ladder) == 4
+        assert self.sampler.ladder[0] == 1
+        assert np.all(np.diff(self.sampler.ladder) > 0)
+        assert self.sampler.swapProposed == (2000 - 1) // 10
+        assert 0 < self.sampler.nswap_accepted <= self.sampler.swapProposed
+
+    def test_in_process_tempering_zero_likelihood(self):
+        """Test that replicas which start where the likelihood is zero keep a
+        log posterior of -inf through the temperature swaps, rather than nan
+        """
+        def lnlikefn(x):
+            if x[0] > 5:
+                return -np.inf
+            return self.glo.lnlikefn(x)
+
+        sampler = PTMCMCSampler.PTSampler(
+            self.ndim, lnlikefn, self.glo.lnpriorfn, np.copy(self.cov),
+            outDir='./test_chains', verbose=False)
+        sampler.sample(
+            np.full(self.ndim, 8.0), 200, burn=100, thin=1, covUpdate=100,
+            Tskip=1, n_cold_chains=1, ntemps=3, weights={"AdaptiveCovariance": 5})
+        lnprob = sampler._lnprob[0, :200]
+        assert not np.any(np.isnan(lnprob))
+        assert lnprob[0] == -np.inf
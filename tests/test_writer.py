@@ -0,0 +1,111 @@
+import pytest
+import numpy as np
+import pickle
+import os
+import threading
+import time
+from PTMCMCSampler.writer import AsyncWriter, write_text, write_atomic, append_text
+
+
+def fail(*args):
+    raise IOError("disk full")
+
+
+class TestAsyncWriter(object):
+    """Test the AsyncWriter class
+    """
+    def setup(self):
+        """Setup the AsyncWriter class
+        """
+        self.writer = AsyncWriter(maxsize=2)
+        self.fname = "test_writer.txt"
+
+    def teardown(self):
+        """Stop the writer and remove the file it wrote to
+        """
+        self.writer.close()
+        if os.path.isfile(self.fname):
+            os.remove(self.fname)
+
+    def test_order(self):
+        """Test that writes are made in the order they were submitted
+        """
+        records = np.random.normal(size=(20, 3))
+        for ii in range(0, 20, 2):
+            self.writer.submit(append_text, self.fname, records[ii:ii + 2], "%.18e")
+        self.writer.flush()
+        np.testing.assert_array_equal(np.loadtxt(self.fname), records)
+
+    def test_threads(self):
+        """Test that writes submitted from several threads at once are all
+        made by a single background thread
+        """
+        started = []
+
+        class SlowThread(threading.Thread):
+            # widen the gap between checking for and starting the thread
+            def __init__(self, *args, **kwargs):
+                started.append(1)
+                time.sleep(0.01)
+                super(SlowThread, self).__init__(*args, **kwargs)
+
+        writer = AsyncWriter(maxsize=2)
+        barrier = threading.Barrier(8)
+
+        def submit(ii):
+            barrier.wait()
+            for jj in range(10):
+                writer.submit(write_text, self.fname, "%d\n" % ii, "a")
+
+        threads = [threading.Thread(target=submit, args=(ii,)) for ii in range(8)]
+        Thread, threading.Thread = threading.Thread, SlowThread
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            threading.Thread = Thread
+        writer.flush()
+        assert len(started) == 1
+        assert len(np.loadtxt(self.fname)) == 80
+        writer.close()
+
+    def test_close(self):
+        """Test that all writes are finished when the writer is closed, and
+        that the writer can be used again
+        """
+        self.writer.submit(write_text, self.fname, "a\n", "a")
+        self.writer.close()
+        assert self.writer.thread is None
+        self.writer.submit(write_text, self.fname, "b\n", "a")
+        self.writer.close()
+        with open(self.fname, "r") as f:
+            assert f.read() == "a\nb\n"
+
+    def test_error(self):
+        """Test that an error raised in the background thread is raised in
+        the caller, and that later writes are skipped
+        """
+        self.writer.submit(fail)
+        self.writer.queue.put((write_text, (self.fname, "a\n", "a")))
+        with pytest.raises(IOError):
+            self.writer.close()
+        assert not os.path.isfile(self.fname)
+
+    def test_write_atomic(self):
+        """Test that write_atomic replaces the file and leaves no temporary
+        file behind
+        """
+        write_text(self.fname, "old")
+        write_atomic(self.fname, b"new")
+        with open(self.fname, "r") as f:
+            assert f.read() == "new"
+        assert not os.path.isfile(self.fname + ".tmp")
+
+    def test_pickle(self):
+        """Test that a pickled writer can be used in another process
+        """
+        self.writer.submit(write_text, self.fname, "a\n", "a")
+        writer = pickle.loads(pickle.dumps(self.writer))
+        assert writer.thread is None and writer.maxsize == 2